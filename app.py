@@ -1,444 +1,461 @@
 import streamlit as st
-import fitz  # PyMuPDF
-from docx import Document
-from docx.oxml.text.paragraph import CT_P
-from docx.oxml.table import CT_Tbl
-from docx.table import _Cell, Table
-from docx.text.paragraph import Paragraph
-from PIL import Image
-import io
 import os
 from pathlib import Path
 import base64
-import re
-import cv2
-import numpy as np
-import pandas as pd
-import zipfile
+import io
 from datetime import datetime
 import time
-try:
-    import pytesseract
-    # Streamlit Cloud sẽ cài Tesseract tự động
-    TESSERACT_AVAILABLE = True
-except ImportError:
-    TESSERACT_AVAILABLE = False
+import multiprocessing
+import uuid
+import weakref
+from conversion_cache import ConversionCache
+from job_queue import JobQueue, file_type_of
+from workspace import WorkspaceManager
+from ocr_cache import OcrCache
+from profiling import StageTimer, stage, summarize_samples
+from converter import (
+    TESSERACT_AVAILABLE,
+    DEFAULT_OCR_WORKERS,
+    SCANNED_OCR_DPI,
+    create_zip_file,
+    create_batch_zip,
+)
+from document import render_html, render_latex, render_markdown, write_html
 
-def optimize_image(image_path, max_width=1200, quality=85):
-    """Tối ưu hóa kích thước và chất lượng hình ảnh"""
-    try:
-        img = Image.open(image_path)
-        
-        # Resize nếu ảnh quá lớn
-        if img.width > max_width:
-            ratio = max_width / img.width
-            new_height = int(img.height * ratio)
-            img = img.resize((max_width, new_height), Image.LANCZOS)
-        
-        # Lưu lại với chất lượng tối ưu
-        img.save(image_path, optimize=True, quality=quality)
-        
-        return True
-    except Exception as e:
-        return False
+@st.cache_resource
+def get_conversion_cache():
+    """Cache kết quả chuyển đổi dùng chung cho mọi phiên"""
+    return ConversionCache()
 
-def detect_table_in_image(image_path, language='vie+eng'):
-    """Phát hiện và trích xuất bảng từ hình ảnh bằng OCR"""
-    if not TESSERACT_AVAILABLE:
-        return None
-    
-    try:
-        # Đọc ảnh
-        img = cv2.imread(image_path)
-        if img is None:
-            return None
-        
-        # Chuyển sang grayscale
-        gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
-        
-        # Áp dụng threshold để làm nổi bật đường viền
-        thresh = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY_INV + cv2.THRESH_OTSU)[1]
-        
-        # Phát hiện đường ngang và dọc (đặc trưng của bảng)
-        horizontal_kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (40, 1))
-        vertical_kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (1, 40))
-        
-        horizontal_lines = cv2.morphologyEx(thresh, cv2.MORPH_OPEN, horizontal_kernel, iterations=2)
-        vertical_lines = cv2.morphologyEx(thresh, cv2.MORPH_OPEN, vertical_kernel, iterations=2)
-        
-        # Kết hợp đường ngang và dọc
-        table_mask = cv2.add(horizontal_lines, vertical_lines)
-        
-        # Nếu phát hiện đủ nhiều đường => có thể là bảng
-        if cv2.countNonZero(table_mask) > 100:
-            # Sử dụng OCR để đọc text với ngôn ngữ tiếng Việt + English
-            ocr_data = pytesseract.image_to_string(img, lang=language)
-            
-            # Thử parse thành bảng
-            lines = [line.strip() for line in ocr_data.split('\n') if line.strip()]
-            if len(lines) >= 2:  # Ít nhất có header và 1 row
-                # Tạo bảng Markdown
-                return lines
-        
-        return None
-    except Exception as e:
-        return None
+@st.cache_resource
+def get_ocr_cache():
+    """Cache kết quả OCR theo nội dung ảnh dùng chung cho mọi phiên (và dòng lệnh)"""
+    return OcrCache()
 
-def lines_to_markdown_table(lines):
-    """Chuyển đổi danh sách dòng thành bảng Markdown"""
-    if not lines or len(lines) < 2:
-        return None
-    
-    markdown_table = ""
-    
-    # Header
-    header_parts = [p.strip() for p in lines[0].split() if p.strip()]
-    if len(header_parts) > 0:
-        markdown_table += "| " + " | ".join(header_parts) + " |\n"
-        markdown_table += "| " + " | ".join(["---"] * len(header_parts)) + " |\n"
-        
-        # Rows
-        for line in lines[1:]:
-            row_parts = [p.strip() for p in line.split() if p.strip()]
-            if len(row_parts) > 0:
-                # Đảm bảo số cột bằng header
-                while len(row_parts) < len(header_parts):
-                    row_parts.append("")
-                markdown_table += "| " + " | ".join(row_parts[:len(header_parts)]) + " |\n"
-    
-    return markdown_table if markdown_table else None
+@st.cache_resource
+def get_job_queue():
+    """Hàng đợi chuyển đổi chạy nền dùng chung cho mọi phiên (trạng thái job lưu trên đĩa)"""
+    return JobQueue(conversion_cache=get_conversion_cache(), ocr_cache=get_ocr_cache()).start()
 
-def markdown_to_latex(markdown_content):
-    """Chuyển đổi Markdown sang LaTeX"""
-    latex_content = markdown_content
-    
-    # Thay thế headers
-    latex_content = re.sub(r'^# (.+)$', r'\\section{\1}', latex_content, flags=re.MULTILINE)
-    latex_content = re.sub(r'^## (.+)$', r'\\subsection{\1}', latex_content, flags=re.MULTILINE)
-    latex_content = re.sub(r'^### (.+)$', r'\\subsubsection{\1}', latex_content, flags=re.MULTILINE)
-    latex_content = re.sub(r'^#### (.+)$', r'\\paragraph{\1}', latex_content, flags=re.MULTILINE)
-    
-    # Thay thế bold và italic
-    latex_content = re.sub(r'\*\*(.+?)\*\*', r'\\textbf{\1}', latex_content)
-    latex_content = re.sub(r'\*(.+?)\*', r'\\textit{\1}', latex_content)
+@st.cache_resource
+def get_workspace_manager():
+    """Thư mục tạm theo phiên/job dùng chung cho mọi phiên (giới hạn dung lượng)"""
+    return WorkspaceManager()
+
+class _SessionWorkspace:
+    """Gắn vào session_state: khi phiên kết thúc và bị thu hồi, thư mục tạm của phiên bị xóa"""
     
-    # Thay thế hình ảnh
-    latex_content = re.sub(
-        r'!\[([^\]]*)\]\(([^\)]+)\)',
-        r'\\begin{figure}[h]\n\\centering\n\\includegraphics[width=0.8\\textwidth]{\2}\n\\caption{\1}\n\\end{figure}',
-        latex_content
+    def __init__(self, manager):
+        self.session_id = uuid.uuid4().hex
+        weakref.finalize(self, manager.release_session, self.session_id)
+
+def get_session_id():
+    """Mã phiên hiện tại (mỗi tab trình duyệt một thư mục tạm riêng)"""
+    if '_session_workspace' not in st.session_state:
+        st.session_state['_session_workspace'] = _SessionWorkspace(get_workspace_manager())
+    return st.session_state['_session_workspace'].session_id
+
+def cached_file(file_path, build, update=None):
+    """Nội dung file xuất (ZIP, HTML): chỉ tạo lần đầu trên đĩa, các lần rerun sau đọc lại file.
+    
+    build(đường dẫn) ghi file; build(None) trả về file tạm đã seek về đầu.
+    update(thư mục): đo lại dung lượng thư mục sau khi ghi (mặc định WorkspaceManager.update).
+    """
+    file_dir = os.path.dirname(file_path)
+    if not os.path.isdir(file_dir):
+        # Thư mục tạm đã bị loại bỏ do hết dung lượng => tạo file tạm thời
+        with build(None) as tmp_file:
+            return tmp_file.read()
+    if not os.path.exists(file_path):
+        build(file_path + ".tmp")
+        os.replace(file_path + ".tmp", file_path)
+        (update or get_workspace_manager().update)(file_dir)
+    with open(file_path, "rb") as f:
+        return f.read()
+
+def result_zip(result):
+    """ZIP (Markdown + ảnh) của một kết quả, lưu trong thư mục tạm của kết quả"""
+    stem = Path(result['filename']).stem
+    return cached_file(
+        os.path.join(result['temp_dir'], f"{stem}.zip"),
+        lambda output: create_zip_file(result['markdown'], result['images_dir'], f"{stem}.md", output),
+        get_job_queue().update
     )
-    
-    # Thay thế bảng Markdown sang LaTeX
-    lines = latex_content.split('\n')
-    new_lines = []
-    in_table = False
-    table_lines = []
-    
-    for line in lines:
-        if '|' in line and not in_table:
-            in_table = True
-            table_lines = [line]
-        elif in_table:
-            if '|' in line:
-                table_lines.append(line)
-            else:
-                # Kết thúc bảng, convert sang LaTeX
-                latex_table = convert_markdown_table_to_latex(table_lines)
-                new_lines.append(latex_table)
-                new_lines.append(line)
-                in_table = False
-                table_lines = []
-        else:
-            new_lines.append(line)
-    
-    if in_table and table_lines:
-        latex_table = convert_markdown_table_to_latex(table_lines)
-        new_lines.append(latex_table)
-    
-    latex_content = '\n'.join(new_lines)
-    
-    # Thay thế horizontal rule
-    latex_content = re.sub(r'^---+$', r'\\hrulefill', latex_content, flags=re.MULTILINE)
-    
-    # Tạo document LaTeX hoàn chỉnh
-    full_latex = f"""\\documentclass[12pt,a4paper]{{article}}
-\\usepackage[utf8]{{inputenc}}
-\\usepackage[vietnamese]{{babel}}
-\\usepackage{{graphicx}}
-\\usepackage{{amsmath}}
-\\usepackage{{hyperref}}
-\\usepackage{{booktabs}}
-\\usepackage{{longtable}}
 
-\\title{{Converted Document}}
-\\author{{PDF to Markdown Converter}}
-\\date{{\\today}}
+# Khoảng thời gian (giây) giữa hai lần hỏi lại trạng thái job đang chạy
+JOB_POLL_SECONDS = 1.0
+# Xem trước kết quả: mỗi lần chỉ hiển thị một trang (trang PDF, trang dài/DOCX được chia
+# theo số ký tự); ảnh được thu nhỏ và tổng dung lượng ảnh nhúng của một trang bị giới hạn
+PREVIEW_PAGE_CHARS = 20000
+PREVIEW_MAX_IMAGE_BYTES = 2 * 1024 * 1024
+PREVIEW_THUMBNAIL_WIDTH = 640
 
-\\begin{{document}}
+def make_result(filename, document, stats, images_dir, temp_dir, image_prefix):
+    """Kết quả chuyển đổi của một file: mô hình tài liệu và Markdown (sinh một lần)"""
+    return {
+        'filename': filename,
+        'document': document,
+        'markdown': render_markdown(document.blocks, image_prefix),
+        'stats': stats,
+        'images_dir': images_dir,
+        'temp_dir': temp_dir,
+        'image_prefix': image_prefix,
+        # LaTeX đã sinh: chỉ sinh một lần cho mỗi kết quả
+        'latex': None
+    }
 
-\\maketitle
+def result_latex(result):
+    """LaTeX của một kết quả, sinh từ mô hình tài liệu lần đầu rồi dùng lại qua các lần rerun"""
+    if result['latex'] is None:
+        result['latex'] = render_latex(result['document'].blocks, result['image_prefix'])
+    return result['latex']
 
-{latex_content}
+def result_html(result, inline_images=True):
+    """HTML của một kết quả: ghi dần ra file trong thư mục tạm của kết quả lần đầu, các lần sau đọc lại.
+    
+    inline_images: nhúng ảnh (data URI) để file HTML xem được khi đứng riêng.
+    """
+    stem = Path(result['filename']).stem
+    images_dir = result['images_dir'] if inline_images else None
+    
+    def build(output):
+        if output is None:
+            html_content = render_html(result['document'].blocks, result['image_prefix'], stem, images_dir)
+            return io.BytesIO(html_content.encode('utf-8'))
+        with open(output, "w", encoding="utf-8") as f:
+            write_html(result['document'].blocks, f, result['image_prefix'], stem, images_dir)
+    
+    return cached_file(
+        os.path.join(result['temp_dir'], f"{stem}{'_inline' if inline_images else ''}.html"), build,
+        get_job_queue().update
+    )
 
-\\end{{document}}
-"""
+@st.cache_data(max_entries=1000, show_spinner=False)
+def thumbnail_data_uri(img_path, mtime):
+    """Ảnh thu nhỏ dạng data URI (cache theo đường dẫn + thời điểm sửa file), None nếu không đọc được"""
+    from PIL import Image
     
-    return full_latex
+    buffer = io.BytesIO()
+    try:
+        with Image.open(img_path) as img:
+            img.thumbnail((PREVIEW_THUMBNAIL_WIDTH, PREVIEW_THUMBNAIL_WIDTH * 4))
+            if img.mode in ('RGBA', 'LA', 'P'):
+                img.save(buffer, 'PNG', optimize=True)
+                mime = 'png'
+            else:
+                img.convert('RGB').save(buffer, 'JPEG', quality=80)
+                mime = 'jpeg'
+    except OSError:
+        return None
+    return f"data:image/{mime};base64,{base64.b64encode(buffer.getvalue()).decode()}"
 
-def convert_markdown_table_to_latex(table_lines):
-    """Chuyển đổi bảng Markdown sang LaTeX"""
-    if len(table_lines) < 2:
-        return ""
-    
-    # Parse header
-    header = [cell.strip() for cell in table_lines[0].split('|') if cell.strip()]
-    num_cols = len(header)
-    
-    # Bỏ qua dòng separator (---)
-    data_lines = [line for line in table_lines[2:] if '|' in line]
-    
-    # Tạo LaTeX table
-    latex_table = f"""
-\\begin{{table}}[h]
-\\centering
-\\begin{{tabular}}{{{'l' * num_cols}}}
-\\toprule
-{' & '.join(header)} \\\\
-\\midrule
-"""
-    
-    for line in data_lines:
-        cells = [cell.strip() for cell in line.split('|') if cell.strip()]
-        if len(cells) == num_cols:
-            latex_table += ' & '.join(cells) + ' \\\\\n'
-    
-    latex_table += """\\bottomrule
-\\end{tabular}
-\\end{table}
-"""
-    
-    return latex_table
+def split_preview_pages(document):
+    """Chia tài liệu thành các trang xem trước: theo trang PDF, trang quá dài cắt ở ranh giới khối"""
+    pages = []
+    for page_blocks in document.pages():
+        chunk = []
+        size = 0
+        for block in page_blocks:
+            block_size = len(render_markdown([block]))
+            if chunk and size + block_size > PREVIEW_PAGE_CHARS:
+                pages.append(chunk)
+                chunk = []
+                size = 0
+            chunk.append(block)
+            size += block_size
+        pages.append(chunk)
+    return pages
 
-def extract_images_from_pdf(pdf_path, output_folder, optimize_imgs=True, enable_ocr=True, ocr_lang='vie+eng'):
-    """Trích xuất hình ảnh từ PDF"""
-    doc = fitz.open(pdf_path)
-    images = []
-    
-    for page_num in range(len(doc)):
-        page = doc[page_num]
-        image_list = page.get_images()
-        
-        for img_index, img in enumerate(image_list):
-            xref = img[0]
-            base_image = doc.extract_image(xref)
-            image_bytes = base_image["image"]
-            image_ext = base_image["ext"]
-            
-            # Lưu hình ảnh
-            image_name = f"image_page{page_num + 1}_{img_index + 1}.{image_ext}"
-            image_path = os.path.join(output_folder, image_name)
-            
-            with open(image_path, "wb") as img_file:
-                img_file.write(image_bytes)
-            
-            # Tối ưu hóa ảnh nếu được bật
-            if optimize_imgs:
-                optimize_image(image_path)
-            
-            # Thử phát hiện bảng trong ảnh nếu OCR được bật
-            table_data = None
-            if enable_ocr:
-                table_data = detect_table_in_image(image_path, ocr_lang)
-            
-            images.append({
-                'page': page_num,
-                'path': image_path,
-                'name': image_name,
-                'is_table': table_data is not None,
-                'table_data': table_data
-            })
+def render_preview_page(page_blocks, images_dir, image_prefix=''):
+    """Markdown của một trang xem trước, ảnh thay bằng ảnh thu nhỏ nhúng; ảnh vượt giới hạn dung lượng chỉ hiện tên"""
+    budget = PREVIEW_MAX_IMAGE_BYTES
+    
+    def embed(image):
+        nonlocal budget
+        img_path = os.path.join(images_dir, image.name)
+        if not os.path.isfile(img_path):
+            return None
+        data_uri = thumbnail_data_uri(img_path, os.path.getmtime(img_path))
+        if data_uri is None or len(data_uri) > budget:
+            return f"*🖼️ {image.name}*"
+        budget -= len(data_uri)
+        return f'<img src="{data_uri}" alt="{image.name}" loading="lazy" style="max-width:100%; height:auto;"/>'
     
-    doc.close()
-    return images
+    return render_markdown(page_blocks, image_prefix, image=embed)
 
-def pdf_to_markdown(pdf_path, output_folder, image_path_prefix='', optimize_imgs=True, enable_ocr=True, ocr_lang='vie+eng'):
-    """Chuyển đổi PDF sang Markdown"""
-    doc = fitz.open(pdf_path)
-    markdown_content = ""
-    
-    # Tạo thư mục cho hình ảnh
-    os.makedirs(output_folder, exist_ok=True)
-    
-    # Trích xuất hình ảnh
-    images = extract_images_from_pdf(pdf_path, output_folder, optimize_imgs, enable_ocr, ocr_lang)
-    image_index = 0
-    
-    stats = {
-        'pages': len(doc),
-        'images': len(images),
-        'tables': sum(1 for img in images if img.get('is_table', False))
-    }
-    
-    for page_num in range(len(doc)):
-        page = doc[page_num]
-        
-        # Lấy văn bản
-        text = page.get_text()
+def render_stats(stats):
+    """Các chỉ số dạng số của stats (thời gian từng bước hiển thị riêng bằng render_stages)"""
+    values = {key: value for key, value in stats.items() if not isinstance(value, dict)}
+    stat_cols = st.columns(len(values))
+    for idx, (key, value) in enumerate(values.items()):
+        with stat_cols[idx]:
+            st.metric(key.capitalize(), value)
+
+def render_stages(stats, ui_timer):
+    """Bảng thời gian từng bước: của lần chuyển đổi (stats['stages']) và của lần hiển thị này (ZIP, preview)"""
+    stages = dict(stats.get('stages', {}))
+    stages.update(summarize_samples(ui_timer.drain()))
+    if stages:
+        st.table([{'stage': name, **values} for name, values in stages.items()])
+
+def render_results(all_results, export_format, show_stages=False, html_inline_images=True):
+    """Hiển thị kết quả chuyển đổi (dùng lại được qua các lần rerun)"""
+    ui_timer = StageTimer()
+    # Nếu chỉ 1 file, hiển thị chi tiết
+    if len(all_results) == 1:
+        result = all_results[0]
         
-        # Thêm văn bản vào markdown
-        if text.strip():
-            # Phân tích cấu trúc cơ bản
-            lines = text.split('\n')
-            for line in lines:
-                line = line.strip()
-                if line:
-                    # Phát hiện tiêu đề (dòng ngắn, in hoa hoặc có font size lớn)
-                    if len(line) < 100 and (line.isupper() or len(line.split()) <= 10):
-                        markdown_content += f"\n## {line}\n\n"
-                    else:
-                        markdown_content += f"{line}\n\n"
+        # Hiển thị thống kê
+        st.subheader("📊 Thống kê")
+        render_stats(result['stats'])
+        # Điền sau khi tạo ZIP/preview để có cả thời gian của các bước đó
+        stages_panel = st.expander("⏱️ Thời gian từng bước") if show_stages else None
         
-        # Thêm hình ảnh từ trang này
-        page_images = [img for img in images if img['page'] == page_num]
-        for img in page_images:
-            # Nếu ảnh là bảng, hiển thị bảng thay vì ảnh
-            if img.get('is_table') and img.get('table_data'):
-                table_md = lines_to_markdown_table(img['table_data'])
-                if table_md:
-                    markdown_content += f"\n**📊 Bảng (OCR):**\n\n{table_md}\n\n"
-                else:
-                    image_path = f"{image_path_prefix}{img['name']}"
-                    markdown_content += f"![Image]({image_path})\n\n"
-            else:
-                image_path = f"{image_path_prefix}{img['name']}"
-                markdown_content += f"![Image]({image_path})\n\n"
+        # Tạo 2 cột
+        col1, col2 = st.columns(2)
         
-        # Phân cách trang
-        if page_num < len(doc) - 1:
-            markdown_content += "\n---\n\n"
-    
-    doc.close()
-    return markdown_content, stats
-
-def extract_images_from_docx(docx_path, output_folder):
-    """Trích xuất hình ảnh từ Word"""
-    doc = Document(docx_path)
-    images = []
-    
-    os.makedirs(output_folder, exist_ok=True)
-    
-    # Trích xuất hình ảnh từ relationships
-    for rel in doc.part.rels.values():
-        if "image" in rel.target_ref:
-            image_data = rel.target_part.blob
-            image_ext = rel.target_ref.split('.')[-1]
-            image_name = f"image_{len(images) + 1}.{image_ext}"
-            image_path = os.path.join(output_folder, image_name)
+        with col1:
+            st.subheader("📝 Nội dung Markdown")
+            st.text_area("Markdown Output", result['markdown'], height=400)
             
-            with open(image_path, "wb") as img_file:
-                img_file.write(image_data)
+            # Nút download markdown
+            if "Markdown (.md)" in export_format:
+                st.download_button(
+                    label="💾 Tải xuống Markdown",
+                    data=result['markdown'],
+                    file_name=f"{Path(result['filename']).stem}.md",
+                    mime="text/markdown"
+                )
             
-            images.append({
-                'path': image_path,
-                'name': image_name
-            })
-    
-    return images
-
-def docx_to_markdown(docx_path, output_folder, image_path_prefix=''):
-    """Chuyển đổi Word sang Markdown"""
-    doc = Document(docx_path)
-    markdown_content = ""
-    
-    # Tạo thư mục cho hình ảnh
-    os.makedirs(output_folder, exist_ok=True)
-    
-    # Trích xuất hình ảnh
-    images = extract_images_from_docx(docx_path, output_folder)
-    image_index = 0
-    
-    stats = {
-        'paragraphs': len(doc.paragraphs),
-        'images': len(images),
-        'tables': len(doc.tables)
-    }
-    
-    for element in doc.element.body:
-        if isinstance(element, CT_P):
-            paragraph = Paragraph(element, doc)
-            text = paragraph.text.strip()
+            # Nút download LaTeX
+            if "LaTeX (.tex)" in export_format:
+                st.download_button(
+                    label="📐 Tải xuống LaTeX",
+                    data=result_latex(result),
+                    file_name=f"{Path(result['filename']).stem}.tex",
+                    mime="application/x-tex"
+                )
+        
             
-            if text:
-                # Xác định style
-                style = paragraph.style.name.lower()
-                
-                if 'heading 1' in style:
-                    markdown_content += f"# {text}\n\n"
-                elif 'heading 2' in style:
-                    markdown_content += f"## {text}\n\n"
-                elif 'heading 3' in style:
-                    markdown_content += f"### {text}\n\n"
-                elif 'heading 4' in style:
-                    markdown_content += f"#### {text}\n\n"
-                elif 'heading 5' in style:
-                    markdown_content += f"##### {text}\n\n"
-                elif 'heading 6' in style:
-                    markdown_content += f"###### {text}\n\n"
-                else:
-                    # Xử lý định dạng văn bản
-                    formatted_text = text
-                    for run in paragraph.runs:
-                        run_text = run.text
-                        if run.bold:
-                            formatted_text = formatted_text.replace(run_text, f"**{run_text}**")
-                        if run.italic:
-                            formatted_text = formatted_text.replace(run_text, f"*{run_text}*")
-                    
-                    markdown_content += f"{formatted_text}\n\n"
+            # Nút download ZIP
+            if "ZIP (MD + Images)" in export_format:
+                with stage(ui_timer, 'zip'):
+                    zip_data = result_zip(result)
+                st.download_button(
+                    label="📦 Tải xuống ZIP (MD + Images)",
+                    data=zip_data,
+                    file_name=f"{Path(result['filename']).stem}.zip",
+                    mime="application/zip"
+                )
             
-            # Kiểm tra xem paragraph có chứa hình ảnh không
-            if paragraph._element.xpath('.//pic:pic'):
-                if image_index < len(images):
-                    image_path = f"{image_path_prefix}{images[image_index]['name']}"
-                    markdown_content += f"![Image]({image_path})\n\n"
-                    image_index += 1
+            # HTML Export
+            if "HTML" in export_format:
+                with stage(ui_timer, 'html'):
+                    html_data = result_html(result, html_inline_images)
+                st.download_button(
+                    label="📄 Tải xuống HTML",
+                    data=html_data,
+                    file_name=f"{Path(result['filename']).stem}.html",
+                    mime="text/html"
+                )
         
-        elif isinstance(element, CT_Tbl):
-            table = Table(element, doc)
-            markdown_content += "\n"
+        with col2:
+            st.subheader("👁️ Preview Markdown")
+            # Chỉ gửi một trang tới trình duyệt, ảnh đã thu nhỏ (cache qua các lần rerun)
+            if 'preview_pages' not in result:
+                result['preview_pages'] = split_preview_pages(result['document'])
+            preview_pages = result['preview_pages']
+            page_index = 0
+            if len(preview_pages) > 1:
+                page_index = st.number_input(
+                    f"Trang xem trước (1-{len(preview_pages)})",
+                    min_value=1, max_value=len(preview_pages), value=1, key=f"preview_page_{result['temp_dir']}"
+                ) - 1
+            with stage(ui_timer, 'preview') as measure:
+                preview_content = render_preview_page(
+                    preview_pages[page_index], result['images_dir'], result['image_prefix']
+                )
+                measure['bytes'] = len(preview_content)
             
-            # Header
-            if table.rows:
-                header_cells = table.rows[0].cells
-                markdown_content += "| " + " | ".join([cell.text.strip() for cell in header_cells]) + " |\n"
-                markdown_content += "| " + " | ".join(["---" for _ in header_cells]) + " |\n"
+            # Hiển thị trong container có scroll
+            st.markdown(
+                f"""
+                <div style="
+                    height: 400px; 
+                    overflow-y: auto; 
+                    overflow-x: auto;
+                    border: 1px solid #ddd; 
+                    border-radius: 5px; 
+                    padding: 15px;
+                    background-color: #f8f9fa;
+                    font-family: -apple-system, BlinkMacSystemFont, 'Segoe UI', Roboto, sans-serif;
+                ">
+                    {preview_content}
+                </div>
+                """,
+                unsafe_allow_html=True
+            )
+        
+        if stages_panel is not None:
+            with stages_panel:
+                render_stages(result['stats'], ui_timer)
+        
+        # Hiển thị hình ảnh đã trích xuất
+        if os.path.exists(result['images_dir']):
+            image_files = [f for f in os.listdir(result['images_dir']) if f.endswith(('.png', '.jpg', '.jpeg', '.gif', '.bmp'))]
+            if image_files:
+                st.subheader(f"🖼️ Hình ảnh đã trích xuất ({len(image_files)} ảnh)")
                 
-                # Các hàng còn lại
-                for row in table.rows[1:]:
-                    markdown_content += "| " + " | ".join([cell.text.strip() for cell in row.cells]) + " |\n"
-            
-            markdown_content += "\n"
-    
-    return markdown_content, stats
-
-def create_zip_file(markdown_content, images_dir, md_filename):
-    """Tạo file ZIP chứa markdown và tất cả hình ảnh"""
-    zip_buffer = io.BytesIO()
+                cols = st.columns(3)
+                for idx, img_file in enumerate(image_files):
+                    with cols[idx % 3]:
+                        img_path = os.path.join(result['images_dir'], img_file)
+                        st.image(img_path, caption=img_file, use_container_width=True)
+                        
+                        # Nút download từng ảnh
+                        with open(img_path, "rb") as f:
+                            st.download_button(
+                                label=f"⬇️ Tải {img_file}",
+                                data=f,
+                                file_name=img_file,
+                                mime="image/png",
+                                key=f"download_{img_file}"
+                            )
     
-    with zipfile.ZipFile(zip_buffer, 'w', zipfile.ZIP_DEFLATED) as zip_file:
-        # Thêm file markdown
-        zip_file.writestr(md_filename, markdown_content)
+    # Nếu nhiều file, hiển thị tổng hợp
+    else:
+        st.subheader("📊 Tổng hợp kết quả")
         
-        # Thêm tất cả hình ảnh
-        if os.path.exists(images_dir):
-            for filename in os.listdir(images_dir):
-                file_path = os.path.join(images_dir, filename)
-                if os.path.isfile(file_path):
-                    zip_file.write(file_path, f"images/{filename}")
-    
-    zip_buffer.seek(0)
-    return zip_buffer
+        for idx, result in enumerate(all_results):
+            with st.expander(f"📄 {result['filename']}", expanded=False):
+                # Thống kê
+                render_stats(result['stats'])
+                
+                # Download buttons
+                cols = st.columns(4)
+                with cols[0]:
+                    if "Markdown (.md)" in export_format:
+                        st.download_button(
+                            label="💾 MD",
+                            data=result['markdown'],
+                            file_name=f"{Path(result['filename']).stem}.md",
+                            mime="text/markdown",
+                            key=f"md_{idx}"
+                        )
+                with cols[1]:
+                    if "ZIP (MD + Images)" in export_format:
+                        with stage(ui_timer, 'zip'):
+                            zip_data = result_zip(result)
+                        st.download_button(
+                            label="📦 ZIP",
+                            data=zip_data,
+                            file_name=f"{Path(result['filename']).stem}.zip",
+                            mime="application/zip",
+                            key=f"zip_{idx}"
+                        )
+                with cols[2]:
+                    if "HTML" in export_format:
+                        with stage(ui_timer, 'html'):
+                            html_data = result_html(result, html_inline_images)
+                        st.download_button(
+                            label="📄 HTML",
+                            data=html_data,
+                            file_name=f"{Path(result['filename']).stem}.html",
+                            mime="text/html",
+                            key=f"html_{idx}"
+                        )
+                with cols[3]:
+                    if "LaTeX (.tex)" in export_format:
+                        st.download_button(
+                            label="📐 LaTeX",
+                            data=result_latex(result),
+                            file_name=f"{Path(result['filename']).stem}.tex",
+                            mime="application/x-tex",
+                            key=f"latex_{idx}"
+                        )
+                
+                if show_stages:
+                    st.caption("⏱️ Thời gian từng bước")
+                    render_stages(result['stats'], ui_timer)
+        
+        # Download tất cả thành 1 ZIP lớn
+        st.subheader("📦 Tải xuống tất cả")
+        all_zip = cached_file(
+            os.path.join(st.session_state['conversion_zip_dir'], "all.zip"),
+            lambda output: create_batch_zip(
+                [(Path(result['filename']).stem, result['markdown'], result['images_dir']) for result in all_results],
+                output
+            )
+        )
+        st.download_button(
+            label="📦 Tải xuống tất cả (ZIP)",
+            data=all_zip,
+            file_name=f"converted_files_{datetime.now().strftime('%Y%m%d_%H%M%S')}.zip",
+            mime="application/zip"
+        )
+
+def job_results(queue, jobs):
+    """Kết quả (make_result) của các job đã xong; job có kết quả đã bị xóa được bỏ qua"""
+    all_results = []
+    for job in jobs:
+        result = queue.result(job['id']) if job['status'] == 'done' else None
+        if result is None:
+            continue
+        document, stats, images_dir = result
+        all_results.append(make_result(
+            job['filename'], document, stats, images_dir, queue.job_dir(job['id']),
+            job['options'].get('image_prefix', '')
+        ))
+    return all_results
+
+def render_jobs(queue, job_ids, export_format, show_stages=False, html_inline_images=True):
+    """Tiến độ các job chuyển đổi (hỏi lại sau mỗi JOB_POLL_SECONDS); khi tất cả đã xong thì hiển thị kết quả"""
+    jobs = queue.jobs(job_ids)
+    if len(jobs) < len(job_ids):
+        st.warning("⚠️ Một số kết quả đã hết hạn và bị xóa - hãy chuyển đổi lại")
+    
+    if any(job['status'] in ('queued', 'running') for job in jobs):
+        for job in jobs:
+            if job['status'] == 'queued':
+                text = "đang chờ..."
+            elif job['status'] == 'running':
+                text = job['message'] or "đang xử lý..."
+            else:
+                text = "xong" if job['status'] == 'done' else "lỗi"
+            st.progress(job['progress'], text=f"{job['filename']}: {text}")
+        # Job chạy nền: script chỉ đọc trạng thái rồi chạy lại sau một khoảng ngắn
+        time.sleep(JOB_POLL_SECONDS)
+        st.rerun()
+    
+    for job in jobs:
+        if job['status'] == 'failed':
+            st.error(f"❌ Lỗi khi xử lý {job['filename']}: {job['error']}")
+    
+    # Đọc kết quả từ đĩa một lần, các lần rerun sau (bấm tải xuống, đổi tùy chọn) dùng lại
+    if st.session_state.get('conversion_results_jobs') != job_ids:
+        st.session_state['conversion_results'] = job_results(queue, jobs)
+        st.session_state['conversion_results_jobs'] = job_ids
+    all_results = st.session_state['conversion_results']
+    if not all_results:
+        return
+    # Kết quả đang hiển thị là kết quả mới dùng => bị loại bỏ sau cùng khi hàng đợi đầy
+    queue.touch(job_ids)
+    
+    finished = [job for job in jobs if job['status'] == 'done']
+    elapsed_time = max(job['finished'] for job in finished) - min(job['created'] for job in finished)
+    from_cache = sum(job['cached'] for job in finished)
+    st.success(
+        f"✅ Chuyển đổi thành công {len(all_results)} file(s) trong {elapsed_time:.2f}s!"
+        + (f" ({from_cache} lấy từ cache)" if from_cache else "")
+    )
+    evicted = [result['filename'] for result in all_results if not os.path.isdir(result['images_dir'])]
+    if evicted:
+        st.warning(f"⚠️ Kết quả của {', '.join(evicted)} đã hết hạn và bị xóa - hãy chuyển đổi lại")
+    
+    # ZIP chung của cả lô được tạo một lần khi cần, trong thư mục tạm riêng của phiên
+    if 'conversion_zip_dir' not in st.session_state:
+        st.session_state['conversion_zip_dir'] = get_workspace_manager().allocate(get_session_id(), "all_zip")
+    render_results(all_results, export_format, show_stages, html_inline_images)
 
 def main():
     st.set_page_config(page_title="Chuyển đổi PDF/Word sang Markdown", page_icon="📝", layout="wide")
@@ -446,6 +463,11 @@ def main():
     st.title("📝 Chuyển đổi PDF/Word sang Markdown")
     st.write("Upload file PDF hoặc Word để chuyển đổi sang định dạng Markdown (bao gồm cả hình ảnh)")
     
+    workspaces = get_workspace_manager()
+    queue = get_job_queue()
+    # Dọn thư mục tạm của các phiên đã bỏ đi mà chưa được thu hồi
+    workspaces.release_idle_sessions()
+    
     # Hiển thị trạng thái OCR
     if TESSERACT_AVAILABLE:
         st.success("✅ OCR đã được kích hoạt - Có thể nhận diện bảng từ hình ảnh (Tiếng Việt + English)!")
@@ -457,12 +479,29 @@ def main():
         st.header("⚙️ Tùy chọn")
         
         st.subheader("📊 OCR Settings")
+        extract_tables = st.checkbox(
+            "Nhận diện bảng PDF từ đường kẻ", value=True,
+            help="Bảng kẻ bằng đường vector trong PDF được chuyển thẳng sang Markdown, không cần OCR"
+        )
         enable_ocr = st.checkbox("Bật OCR nhận diện bảng", value=True, help="Tự động phát hiện và chuyển đổi bảng từ hình ảnh")
+        ocr_scanned = st.checkbox(
+            "OCR trang scan", value=True,
+            help="Trang PDF không có lớp văn bản (ảnh scan) được chuyển thành ảnh và nhận diện chữ cả trang"
+        )
+        ocr_dpi = st.select_slider(
+            "Độ phân giải OCR trang scan (DPI)", options=[150, 200, 300, 400], value=SCANNED_OCR_DPI,
+            disabled=not ocr_scanned, help="DPI cao hơn: nhận diện chính xác hơn nhưng chậm hơn và tốn bộ nhớ hơn"
+        )
         ocr_language = st.selectbox(
             "Ngôn ngữ OCR",
             ["vie+eng", "eng", "vie"],
             help="vie+eng: Tiếng Việt + English (khuyên dùng)"
         )
+        ocr_workers = st.number_input(
+            "Số luồng OCR",
+            min_value=1, max_value=os.cpu_count() or 1, value=min(DEFAULT_OCR_WORKERS, os.cpu_count() or 1),
+            help="Số ảnh được nhận diện bảng cùng lúc (mỗi luồng chạy một tiến trình Tesseract)"
+        )
         
         st.subheader("🖼️ Hình ảnh")
         optimize_images = st.checkbox("Tối ưu kích thước ảnh", value=True, help="Giảm kích thước ảnh để file nhẹ hơn")
@@ -478,6 +517,46 @@ def main():
             ["Markdown (.md)", "ZIP (MD + Images)", "HTML", "LaTeX (.tex)"],
             default=["Markdown (.md)", "ZIP (MD + Images)"]
         )
+        html_inline_images = st.checkbox(
+            "Nhúng ảnh vào HTML", value=True, disabled="HTML" not in export_format,
+            help="File HTML chứa luôn hình ảnh (xem được khi đứng riêng, nhưng lớn hơn)"
+        )
+        
+        st.subheader("⚡ Hiệu năng")
+        page_workers = st.number_input(
+            "Số tiến trình xử lý PDF",
+            min_value=1, max_value=os.cpu_count() or 1, value=1,
+            help="Chia các trang PDF cho nhiều tiến trình (nên dùng cho PDF nhiều trang, có OCR)"
+        )
+        show_stages = st.checkbox(
+            "Hiển thị thời gian từng bước", value=False,
+            help="Thời gian đọc văn bản, trích xuất/tối ưu ảnh, OpenCV, Tesseract, tạo ZIP... của từng file"
+        )
+        
+        st.subheader("🗄️ Cache")
+        cache_stats = get_conversion_cache().stats()
+        st.caption(
+            f"{cache_stats['entries']} kết quả - {cache_stats['bytes'] / (1024 * 1024):.1f} MB | "
+            f"Hit: {cache_stats['hits']} / Miss: {cache_stats['misses']} ({cache_stats['hit_rate']:.0%})"
+        )
+        ocr_cache_stats = get_ocr_cache().stats()
+        st.caption(
+            f"OCR: {ocr_cache_stats['entries']} ảnh - {ocr_cache_stats['bytes'] / (1024 * 1024):.1f} MB | "
+            f"Hit: {ocr_cache_stats['hits']} / Miss: {ocr_cache_stats['misses']} ({ocr_cache_stats['hit_rate']:.0%})"
+        )
+        workspace_stats = workspaces.stats()
+        st.caption(
+            f"Thư mục tạm: {workspace_stats['bytes'] / (1024 * 1024):.1f} / "
+            f"{workspace_stats['max_bytes'] / (1024 * 1024):.0f} MB - "
+            f"{workspace_stats['sessions']} phiên, {workspace_stats['jobs']} file"
+        )
+        queue_stats = queue.stats()
+        st.caption(
+            f"Hàng đợi: {queue_stats['queued']} chờ, {queue_stats['running']} đang chạy "
+            f"({queue_stats['workers']} worker) | Chờ TB {queue_stats['wait_ms_avg'] / 1000:.1f}s, "
+            f"xử lý TB {queue_stats['run_ms_avg'] / 1000:.1f}s | "
+            f"{queue_stats['bytes'] / (1024 * 1024):.1f} / {queue_stats['max_bytes'] / (1024 * 1024):.0f} MB"
+        )
     
     # Upload file (có thể nhiều file)
     uploaded_files = st.file_uploader(
@@ -487,6 +566,8 @@ def main():
         help="Có thể chọn nhiều file cùng lúc"
     )
     
+    files_signature = [(f.name, f.size) for f in uploaded_files or []]
+    
     if uploaded_files:
         # Hiển thị thông tin files
         if len(uploaded_files) == 1:
@@ -494,280 +575,45 @@ def main():
         else:
             st.info(f"📄 Đã chọn {len(uploaded_files)} files - Tổng: {sum(f.size for f in uploaded_files) / 1024:.2f} KB")
         
-        # Nút chuyển đổi
+        # Nút chuyển đổi: chỉ đưa file vào hàng đợi, worker nền chuyển đổi
         if st.button("🚀 Chuyển đổi sang Markdown", type="primary"):
-            start_time = time.time()
-            
-            all_results = []
+            # Kết quả cũ của phiên không còn được hiển thị => xóa các job cũ đã xong và ZIP chung
+            # (job cũ còn chờ/đang chạy được giữ lại, dọn theo thời hạn/giới hạn dung lượng)
+            queue.release(st.session_state.pop('conversion_jobs', None) or [])
+            st.session_state.pop('conversion_results', None)
+            st.session_state.pop('conversion_results_jobs', None)
+            if 'conversion_zip_dir' in st.session_state:
+                workspaces.release(st.session_state.pop('conversion_zip_dir'))
             
+            options = {
+                'enable_ocr': enable_ocr, 'ocr_lang': ocr_language, 'optimize_imgs': optimize_images,
+                'extract_tables': extract_tables, 'ocr_scanned': ocr_scanned, 'ocr_dpi': ocr_dpi,
+                'page_workers': page_workers, 'ocr_workers': ocr_workers, 'image_prefix': image_path
+            }
+            # Các file cùng lô dùng chung kho ảnh (ảnh giống nhau chỉ xử lý một lần)
+            batch = uuid.uuid4().hex
+            job_ids = []
             for uploaded_file in uploaded_files:
-                with st.spinner(f"Đang xử lý {uploaded_file.name}..."):
-                    try:
-                        # Tạo thư mục tạm để xử lý
-                        temp_dir = f"temp_output_{uploaded_file.name.replace('.', '_')}"
-                        images_dir = os.path.join(temp_dir, "images")
-                        os.makedirs(images_dir, exist_ok=True)
-                        
-                        # Lưu file tạm
-                        temp_file_path = os.path.join(temp_dir, uploaded_file.name)
-                        with open(temp_file_path, "wb") as f:
-                            f.write(uploaded_file.getbuffer())
-                        
-                        # Xác định loại file và xử lý
-                        if uploaded_file.name.endswith('.pdf'):
-                            markdown_content, stats = pdf_to_markdown(
-                                temp_file_path, images_dir, image_path, 
-                                optimize_images, enable_ocr, ocr_language
-                            )
-                        elif uploaded_file.name.endswith('.docx'):
-                            markdown_content, stats = docx_to_markdown(temp_file_path, images_dir, image_path)
-                        else:
-                            st.error(f"❌ {uploaded_file.name}: Định dạng không được hỗ trợ!")
-                            continue
-                        
-                        all_results.append({
-                            'filename': uploaded_file.name,
-                            'markdown': markdown_content,
-                            'stats': stats,
-                            'images_dir': images_dir,
-                            'temp_dir': temp_dir
-                        })
-                        
-                    except Exception as e:
-                        st.error(f"❌ Lỗi khi xử lý {uploaded_file.name}: {str(e)}")
-                        continue
+                if file_type_of(uploaded_file.name) is None:
+                    st.error(f"❌ {uploaded_file.name}: Định dạng không được hỗ trợ!")
+                    continue
+                job_ids.append(queue.submit(uploaded_file.getvalue(), uploaded_file.name, options, batch))
             
-            if all_results:
-                elapsed_time = time.time() - start_time
-                st.success(f"✅ Chuyển đổi thành công {len(all_results)} file(s) trong {elapsed_time:.2f}s!")
-                
-                # Nếu chỉ 1 file, hiển thị chi tiết
-                if len(all_results) == 1:
-                    result = all_results[0]
-                    
-                    # Hiển thị thống kê
-                    st.subheader("📊 Thống kê")
-                    stat_cols = st.columns(len(result['stats']))
-                    for idx, (key, value) in enumerate(result['stats'].items()):
-                        with stat_cols[idx]:
-                            st.metric(key.capitalize(), value)
-                    
-                    # Tạo 2 cột
-                    col1, col2 = st.columns(2)
-                    
-                    with col1:
-                        st.subheader("📝 Nội dung Markdown")
-                        st.text_area("Markdown Output", result['markdown'], height=400)
-                        
-                        # Nút download markdown
-                        if "Markdown (.md)" in export_format:
-                            st.download_button(
-                                label="💾 Tải xuống Markdown",
-                                data=result['markdown'],
-                                file_name=f"{Path(result['filename']).stem}.md",
-                                mime="text/markdown"
-                            )
-                        
-                        # Nút download LaTeX
-                        if "LaTeX (.tex)" in export_format:
-                            latex_content = markdown_to_latex(result['markdown'])
-                            st.download_button(
-                                label="📐 Tải xuống LaTeX",
-                                data=latex_content,
-                                file_name=f"{Path(result['filename']).stem}.tex",
-                                mime="application/x-tex"
-                            )
-                    
-                        
-                        # Nút download ZIP
-                        if "ZIP (MD + Images)" in export_format:
-                            zip_file = create_zip_file(
-                                result['markdown'], 
-                                result['images_dir'], 
-                                f"{Path(result['filename']).stem}.md"
-                            )
-                            st.download_button(
-                                label="📦 Tải xuống ZIP (MD + Images)",
-                                data=zip_file,
-                                file_name=f"{Path(result['filename']).stem}.zip",
-                                mime="application/zip"
-                            )
-                        
-                        # HTML Export
-                        if "HTML" in export_format:
-                            html_content = f"""
-<!DOCTYPE html>
-<html>
-<head>
-    <meta charset="UTF-8">
-    <title>{Path(result['filename']).stem}</title>
-    <style>
-        body {{ font-family: Arial, sans-serif; max-width: 800px; margin: 50px auto; padding: 20px; }}
-        img {{ max-width: 100%; height: auto; }}
-        table {{ border-collapse: collapse; width: 100%; margin: 20px 0; }}
-        th, td {{ border: 1px solid #ddd; padding: 8px; text-align: left; }}
-        th {{ background-color: #f2f2f2; }}
-    </style>
-</head>
-<body>
-{result['markdown']}
-</body>
-</html>
-"""
-                            st.download_button(
-                                label="📄 Tải xuống HTML",
-                                data=html_content,
-                                file_name=f"{Path(result['filename']).stem}.html",
-                                mime="text/html"
-                            )
-                    
-                    with col2:
-                        st.subheader("👁️ Preview Markdown")
-                        # Thay thế đường dẫn ảnh để hiển thị trong Streamlit
-                        preview_content = result['markdown']
-                        if os.path.exists(result['images_dir']):
-                            image_files = [f for f in os.listdir(result['images_dir']) if f.endswith(('.png', '.jpg', '.jpeg', '.gif', '.bmp'))]
-                            for img_file in image_files:
-                                img_path = os.path.join(result['images_dir'], img_file)
-                                # Đọc ảnh và convert sang base64 để hiển thị inline
-                                with open(img_path, "rb") as img_f:
-                                    img_data = base64.b64encode(img_f.read()).decode()
-                                    img_ext = img_file.split('.')[-1]
-                                    # Thay thế đường dẫn ảnh bằng data URI
-                                    preview_content = preview_content.replace(
-                                        f"![Image]({image_path}{img_file})",
-                                        f'<img src="data:image/{img_ext};base64,{img_data}" alt="{img_file}" style="max-width:100%; height:auto;"/>'
-                                    )
-                                    preview_content = preview_content.replace(
-                                        f"![Image]({img_file})",
-                                        f'<img src="data:image/{img_ext};base64,{img_data}" alt="{img_file}" style="max-width:100%; height:auto;"/>'
-                                    )
-                        
-                        # Hiển thị trong container có scroll
-                        st.markdown(
-                            f"""
-                            <div style="
-                                height: 400px; 
-                                overflow-y: auto; 
-                                overflow-x: auto;
-                                border: 1px solid #ddd; 
-                                border-radius: 5px; 
-                                padding: 15px;
-                                background-color: #f8f9fa;
-                                font-family: -apple-system, BlinkMacSystemFont, 'Segoe UI', Roboto, sans-serif;
-                            ">
-                                {preview_content}
-                            </div>
-                            """,
-                            unsafe_allow_html=True
-                        )
-                    
-                    # Hiển thị hình ảnh đã trích xuất
-                    if os.path.exists(result['images_dir']):
-                        image_files = [f for f in os.listdir(result['images_dir']) if f.endswith(('.png', '.jpg', '.jpeg', '.gif', '.bmp'))]
-                        if image_files:
-                            st.subheader(f"🖼️ Hình ảnh đã trích xuất ({len(image_files)} ảnh)")
-                            
-                            cols = st.columns(3)
-                            for idx, img_file in enumerate(image_files):
-                                with cols[idx % 3]:
-                                    img_path = os.path.join(result['images_dir'], img_file)
-                                    st.image(img_path, caption=img_file, use_container_width=True)
-                                    
-                                    # Nút download từng ảnh
-                                    with open(img_path, "rb") as f:
-                                        st.download_button(
-                                            label=f"⬇️ Tải {img_file}",
-                                            data=f,
-                                            file_name=img_file,
-                                            mime="image/png",
-                                            key=f"download_{img_file}"
-                                        )
-                
-                # Nếu nhiều file, hiển thị tổng hợp
-                else:
-                    st.subheader("📊 Tổng hợp kết quả")
-                    
-                    for idx, result in enumerate(all_results):
-                        with st.expander(f"📄 {result['filename']}", expanded=False):
-                            # Thống kê
-                            stat_cols = st.columns(len(result['stats']))
-                            for idx_stat, (key, value) in enumerate(result['stats'].items()):
-                                with stat_cols[idx_stat]:
-                                    st.metric(key.capitalize(), value)
-                            
-                            # Download buttons
-                            cols = st.columns(4)
-                            with cols[0]:
-                                if "Markdown (.md)" in export_format:
-                                    st.download_button(
-                                        label="💾 MD",
-                                        data=result['markdown'],
-                                        file_name=f"{Path(result['filename']).stem}.md",
-                                        mime="text/markdown",
-                                        key=f"md_{idx}"
-                                    )
-                            with cols[1]:
-                                if "ZIP (MD + Images)" in export_format:
-                                    zip_file = create_zip_file(
-                                        result['markdown'], 
-                                        result['images_dir'], 
-                                        f"{Path(result['filename']).stem}.md"
-                                    )
-                                    st.download_button(
-                                        label="📦 ZIP",
-                                        data=zip_file,
-                                        file_name=f"{Path(result['filename']).stem}.zip",
-                                        mime="application/zip",
-                                        key=f"zip_{idx}"
-                                    )
-                            with cols[2]:
-                                if "HTML" in export_format:
-                                    html_content = f"<!DOCTYPE html><html><body>{result['markdown']}</body></html>"
-                                    st.download_button(
-                                        label="📄 HTML",
-                                        data=html_content,
-                                        file_name=f"{Path(result['filename']).stem}.html",
-                                        mime="text/html",
-                                        key=f"html_{idx}"
-                                    )
-                            with cols[3]:
-                                if "LaTeX (.tex)" in export_format:
-                                    latex_content = markdown_to_latex(result['markdown'])
-                                    st.download_button(
-                                        label="📐 LaTeX",
-                                        data=latex_content,
-                                        file_name=f"{Path(result['filename']).stem}.tex",
-                                        mime="application/x-tex",
-                                        key=f"latex_{idx}"
-                                    )
-                    
-                    # Download tất cả thành 1 ZIP lớn
-                    st.subheader("📦 Tải xuống tất cả")
-                    all_zip_buffer = io.BytesIO()
-                    with zipfile.ZipFile(all_zip_buffer, 'w', zipfile.ZIP_DEFLATED) as zip_file:
-                        for result in all_results:
-                            # Thêm markdown
-                            zip_file.writestr(
-                                f"{Path(result['filename']).stem}/{Path(result['filename']).stem}.md",
-                                result['markdown']
-                            )
-                            # Thêm images
-                            if os.path.exists(result['images_dir']):
-                                for img_file in os.listdir(result['images_dir']):
-                                    img_path = os.path.join(result['images_dir'], img_file)
-                                    zip_file.write(
-                                        img_path,
-                                        f"{Path(result['filename']).stem}/images/{img_file}"
-                                    )
-                    all_zip_buffer.seek(0)
-                    st.download_button(
-                        label="📦 Tải xuống tất cả (ZIP)",
-                        data=all_zip_buffer,
-                        file_name=f"converted_files_{datetime.now().strftime('%Y%m%d_%H%M%S')}.zip",
-                        mime="application/zip"
-                    )
-        
+            st.session_state['conversion_jobs'] = job_ids
+            st.session_state['conversion_files'] = files_signature
+            # Mã job nằm trong URL: tải lại trang / kết nối lại vẫn lấy được kết quả
+            st.query_params['jobs'] = ",".join(job_ids)
+    
+    # Job của lần chuyển đổi gần nhất (của phiên, hoặc từ URL khi trình duyệt kết nối lại)
+    job_ids = st.session_state.get('conversion_jobs')
+    if job_ids is None and st.query_params.get('jobs'):
+        job_ids = st.query_params['jobs'].split(",")
+        st.session_state['conversion_jobs'] = job_ids
+    # Hiển thị cho đúng bộ file đang chọn (chưa chọn file: kết quả lấy lại sau khi kết nối lại)
+    if job_ids and (not uploaded_files or st.session_state.get('conversion_files') == files_signature):
+        render_jobs(queue, job_ids, export_format, show_stages, html_inline_images)
+    
+    if uploaded_files:
         # Hướng dẫn
         with st.expander("ℹ️ Hướng dẫn sử dụng"):
             st.markdown("""
@@ -806,4 +652,6 @@ def main():
             """)
 
 if __name__ == "__main__":
+    # Cần cho process pool khi đóng gói bằng PyInstaller
+    multiprocessing.freeze_support()
     main()
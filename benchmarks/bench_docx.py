@@ -0,0 +1,212 @@
+"""
+So sánh bộ chuyển đổi DOCX đọc dạng luồng (docx_to_markdown) với bộ cũ dựa trên python-docx.
+
+Bộ cũ dựng toàn bộ mô hình đối tượng của python-docx (hai lần: một lần cho văn bản, một
+lần cho ảnh) và đọc bảng qua table.rows[...].cells; bộ mới đọc word/document.xml bằng
+iterparse. Trên bộ tài liệu chung (các file DOCX của bench_suite và một file nhiều trường
+hợp đặc biệt: heading, run đậm/nghiêng, hyperlink, tab/xuống dòng, ô gộp ngang/dọc, bảng
+lồng nhau, ảnh) Markdown của hai bộ phải giống hệt nhau. Mỗi lần chạy nằm trong một
+tiến trình mới để đo đúng RSS đỉnh.
+
+Chạy:
+    python benchmarks/bench_docx.py
+    python benchmarks/bench_docx.py --sections 20 500 2000 --repeat 3
+"""
+import argparse
+import io
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from bench_suite import DEFAULT_CORPUS, ROOT, corpus_file, make_logo, peak_rss_mb  # noqa: E402
+
+
+def legacy_docx_to_markdown(docx_source, output_folder, image_path_prefix=''):
+    """Bộ chuyển đổi cũ (python-docx), giữ lại để so sánh kết quả và thời gian"""
+    from docx import Document
+    from docx.oxml.table import CT_Tbl
+    from docx.oxml.text.paragraph import CT_P
+    from docx.table import Table
+    from docx.text.hyperlink import Hyperlink
+    from docx.text.paragraph import Paragraph
+
+    import document as model
+
+    # Ghi Markdown bằng bộ ghi dùng chung (document.py): chỉ so sánh phần đọc tài liệu
+    doc = Document(docx_source)
+    blocks = []
+    os.makedirs(output_folder, exist_ok=True)
+
+    images = []
+    for rel in doc.part.rels.values():
+        if "image" in rel.target_ref:
+            image_name = f"image_{len(images) + 1}.{rel.target_ref.split('.')[-1]}"
+            with open(os.path.join(output_folder, image_name), "wb") as img_file:
+                img_file.write(rel.target_part.blob)
+            images.append({'name': image_name})
+    image_index = 0
+
+    stats = {'paragraphs': len(doc.paragraphs), 'images': len(images), 'tables': len(doc.tables)}
+
+    for element in doc.element.body:
+        if isinstance(element, CT_P):
+            paragraph = Paragraph(element, doc)
+            text = paragraph.text.strip()
+            if text:
+                style = paragraph.style.name.lower()
+                for level in range(1, 7):
+                    if f'heading {level}' in style:
+                        blocks.append(model.Heading(level, text))
+                        break
+                else:
+                    spans = []
+                    for item in paragraph.iter_inner_content():
+                        for run in item.runs if isinstance(item, Hyperlink) else [item]:
+                            spans.append(model.Span(run.text, run.bold, run.italic))
+                    blocks.append(model.Paragraph(spans))
+            if paragraph._element.xpath('.//pic:pic'):
+                if image_index < len(images):
+                    blocks.append(model.Image(images[image_index]['name']))
+                    image_index += 1
+        elif isinstance(element, CT_Tbl):
+            table = Table(element, doc)
+            blocks.append(model.Table([[model.clean_cell(cell.text) for cell in row.cells] for row in table.rows]))
+
+    return model.render_markdown(blocks, image_path_prefix), stats
+
+
+def make_edge_cases_docx(path):
+    """File DOCX gồm các trường hợp dễ lệch kết quả giữa hai bộ chuyển đổi"""
+    from docx import Document
+    from docx.enum.text import WD_BREAK
+    from docx.oxml import OxmlElement
+    from docx.oxml.ns import qn
+    from docx.shared import Inches
+
+    doc = Document()
+    logo = make_logo()
+    doc.add_heading("Tiêu đề tài liệu", 0)
+    for level in range(1, 7):
+        doc.add_heading(f"Heading cấp {level}", level)
+    doc.add_paragraph("Trích dẫn", style="Intense Quote")
+
+    paragraph = doc.add_paragraph("Văn bản thường, ")
+    paragraph.add_run("đậm").bold = True
+    paragraph.add_run(", ")
+    paragraph.add_run("nghiêng").italic = True
+    run = paragraph.add_run(" đậm nghiêng")
+    run.bold = run.italic = True
+    paragraph.add_run(" tắt đậm").bold = False
+    paragraph.add_run("\tcó tab\nvà xuống dòng")
+    run = paragraph.add_run("ngắt trang")
+    run.add_break(WD_BREAK.PAGE)
+
+    # Hyperlink: chữ trong <w:hyperlink> thuộc văn bản đoạn nhưng không thuộc paragraph.runs
+    paragraph = doc.add_paragraph("Xem ")
+    hyperlink = OxmlElement("w:hyperlink")
+    hyperlink.set(qn("w:anchor"), "muc1")
+    link_run = OxmlElement("w:r")
+    link_text = OxmlElement("w:t")
+    link_text.text = "liên kết"
+    link_run.append(link_text)
+    hyperlink.append(link_run)
+    paragraph._p.append(hyperlink)
+    paragraph.add_run(" tại đây").bold = True
+    no_break = OxmlElement("w:noBreakHyphen")
+    paragraph.runs[-1]._r.append(no_break)
+
+    doc.add_paragraph("   ")
+    doc.add_paragraph("a").runs[0].bold = True
+
+    table = doc.add_table(rows=4, cols=4)
+    for r, row in enumerate(table.rows):
+        for c, cell in enumerate(row.cells):
+            cell.text = f" ô {r}.{c} "
+    table.cell(0, 0).merge(table.cell(0, 1))
+    table.cell(1, 2).merge(table.cell(3, 2))
+    table.cell(2, 0).merge(table.cell(3, 1))
+    table.cell(1, 3).add_paragraph("dòng hai")
+    table.cell(1, 3).add_table(rows=1, cols=2).cell(0, 0).text = "bảng lồng"
+    table.cell(1, 1).paragraphs[0].add_run().add_picture(io.BytesIO(logo), width=Inches(0.5))
+
+    doc.add_table(rows=0, cols=2)
+    doc.add_picture(io.BytesIO(logo), width=Inches(1))
+    doc.add_paragraph("Hết.")
+    doc.save(path)
+
+
+def run_one(name, path):
+    """Chạy một bộ chuyển đổi (trong tiến trình riêng), trả về kết quả đo và Markdown"""
+    sys.path.insert(0, ROOT)
+    import converter
+
+    convert = legacy_docx_to_markdown if name == "legacy" else converter.docx_to_markdown
+    output = tempfile.mkdtemp(prefix="bench_docx_")
+    try:
+        start = time.perf_counter()
+        markdown, stats = convert(path, os.path.join(output, "images"), "images/")
+        seconds = time.perf_counter() - start
+        return {
+            "seconds": round(seconds, 3),
+            "peak_rss_mb": peak_rss_mb(),
+            "markdown": markdown,
+            "stats": {key: stats[key] for key in ("paragraphs", "images", "tables")},
+        }
+    finally:
+        shutil.rmtree(output, ignore_errors=True)
+
+
+def measure(name, path, repeat):
+    best = None
+    for _ in range(repeat):
+        result = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), "--run-one", name, path],
+            cwd=ROOT, capture_output=True, text=True, check=True
+        )
+        run = json.loads(result.stdout.strip().splitlines()[-1])
+        if best is None or run["seconds"] < best["seconds"]:
+            best = run
+    return best
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--corpus", default=DEFAULT_CORPUS, help="Thư mục bộ tài liệu (tự sinh nếu chưa có)")
+    parser.add_argument("--sections", type=int, nargs="+", default=[20, 500],
+                        help="Kích thước các file DOCX tổng hợp (số mục)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=1, help="Số lần chạy mỗi file, giữ lần nhanh nhất")
+    parser.add_argument("--run-one", nargs=2, metavar=("CONVERTER", "PATH"), help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.run_one:
+        print(json.dumps(run_one(*args.run_one), ensure_ascii=False))
+        return 0
+
+    edge_path = os.path.join(args.corpus, "docx_edge_cases.docx")
+    if not os.path.exists(edge_path):
+        os.makedirs(args.corpus, exist_ok=True)
+        make_edge_cases_docx(edge_path)
+    paths = [edge_path] + [corpus_file(args.corpus, "docx", size, args.seed) for size in args.sections]
+
+    mismatches = 0
+    print(f"{'file':<28}{'cũ (s)':>9}{'mới (s)':>9}{'nhanh hơn':>11}{'RSS cũ':>9}{'RSS mới':>9}  giống nhau")
+    for path in paths:
+        legacy = measure("legacy", path, args.repeat)
+        streaming = measure("streaming", path, args.repeat)
+        same = legacy["markdown"] == streaming["markdown"] and legacy["stats"] == streaming["stats"]
+        mismatches += not same
+        speedup = legacy["seconds"] / streaming["seconds"] if streaming["seconds"] else float("inf")
+        print(f"{os.path.basename(path):<28}{legacy['seconds']:>9.3f}{streaming['seconds']:>9.3f}{speedup:>10.1f}x"
+              f"{legacy['peak_rss_mb'] or 0:>9.1f}{streaming['peak_rss_mb'] or 0:>9.1f}  {'có' if same else 'KHÔNG'}")
+    return 1 if mismatches else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
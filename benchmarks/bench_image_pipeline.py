@@ -0,0 +1,117 @@
+"""
+So sánh pipeline xử lý ảnh cũ (ghi file -> optimize_image đọc/ghi lại -> cv2.imread)
+với pipeline một lần giải mã trong bộ nhớ (save_image + detect_table_in_image).
+
+Chạy:
+    python benchmarks/bench_image_pipeline.py --images 200
+
+Mặc định bỏ qua lời gọi Tesseract (thay bằng hàm rỗng) để chỉ đo I/O + giải mã
++ OpenCV; dùng --with-ocr để đo cả OCR.
+"""
+import argparse
+import io
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+import numpy as np
+from PIL import Image, ImageDraw
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import converter  # noqa: E402
+
+
+def make_images(count, width, height):
+    """Tạo ảnh thử: xen kẽ ảnh chụp (JPEG, nhiễu) và ảnh bảng (PNG, lưới kẻ)"""
+    rng = np.random.default_rng(0)
+    images = []
+    for i in range(count):
+        if i % 2 == 0:
+            pixels = rng.integers(0, 255, (height, width, 3), dtype=np.uint8)
+            buffer = io.BytesIO()
+            Image.fromarray(pixels).save(buffer, "JPEG", quality=90)
+            images.append((buffer.getvalue(), "jpeg"))
+        else:
+            img = Image.new("RGB", (width, height), "white")
+            draw = ImageDraw.Draw(img)
+            for y in range(0, height, height // 8):
+                draw.line([(0, y), (width, y)], fill="black", width=3)
+            for x in range(0, width, width // 5):
+                draw.line([(x, 0), (x, height)], fill="black", width=3)
+            buffer = io.BytesIO()
+            img.save(buffer, "PNG")
+            images.append((buffer.getvalue(), "png"))
+    return images
+
+
+def run_disk_pipeline(images, folder):
+    """Pipeline cũ: 2 lần ghi + 2 lần đọc/giải mã mỗi ảnh"""
+    io_bytes = 0
+    for idx, (image_bytes, ext) in enumerate(images):
+        image_path = os.path.join(folder, f"image_{idx}.{ext}")
+        with open(image_path, "wb") as f:
+            f.write(image_bytes)
+        io_bytes += len(image_bytes) * 2  # ghi + optimize_image đọc lại
+        converter.optimize_image(image_path)
+        optimized_size = os.path.getsize(image_path)
+        io_bytes += optimized_size * 2  # ghi lại + cv2.imread đọc lại
+        converter.detect_table_in_image(image_path)
+    return io_bytes
+
+
+def run_memory_pipeline(images, folder):
+    """Pipeline mới: giải mã một lần, ghi file đúng một lần"""
+    io_bytes = 0
+    for idx, (image_bytes, ext) in enumerate(images):
+        image_path = os.path.join(folder, f"image_{idx}.{ext}")
+        decoded = converter.save_image(image_bytes, image_path, optimize_imgs=True, decode=True)
+        io_bytes += os.path.getsize(image_path)
+        converter.detect_table_in_image(decoded)
+    return io_bytes
+
+
+def measure(pipeline, images, repeat):
+    best = None
+    io_bytes = 0
+    for _ in range(repeat):
+        folder = tempfile.mkdtemp(prefix="bench_images_")
+        try:
+            start = time.perf_counter()
+            io_bytes = pipeline(images, folder)
+            elapsed = time.perf_counter() - start
+        finally:
+            shutil.rmtree(folder, ignore_errors=True)
+        best = elapsed if best is None else min(best, elapsed)
+    return best, io_bytes
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--images", type=int, default=100, help="Số ảnh thử (mặc định: 100)")
+    parser.add_argument("--width", type=int, default=2000)
+    parser.add_argument("--height", type=int, default=1400)
+    parser.add_argument("--repeat", type=int, default=3, help="Số lần chạy, lấy thời gian tốt nhất")
+    parser.add_argument("--with-ocr", action="store_true", help="Gọi Tesseract thật")
+    args = parser.parse_args(argv)
+
+    if not args.with_ocr:
+        # Chỉ đo phần I/O + giải mã + OpenCV
+        converter.TESSERACT_AVAILABLE = True
+        sys.modules["pytesseract"] = type(sys)("pytesseract")
+        sys.modules["pytesseract"].image_to_string = lambda *a, **k: ""
+
+    images = make_images(args.images, args.width, args.height)
+    disk_time, disk_io = measure(run_disk_pipeline, images, args.repeat)
+    memory_time, memory_io = measure(run_memory_pipeline, images, args.repeat)
+
+    print(f"{args.images} ảnh {args.width}x{args.height}, tốt nhất trong {args.repeat} lần chạy")
+    print(f"  đĩa (cũ):      {disk_time:8.3f}s  {disk_io / 1e6:8.1f} MB I/O")
+    print(f"  bộ nhớ (mới):  {memory_time:8.3f}s  {memory_io / 1e6:8.1f} MB I/O")
+    print(f"  tăng tốc: x{disk_time / memory_time:.2f}, giảm I/O: x{disk_io / max(memory_io, 1):.2f}")
+
+
+if __name__ == "__main__":
+    main()
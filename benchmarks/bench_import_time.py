@@ -0,0 +1,97 @@
+"""
+Đo thời gian import khi khởi động (python -X importtime) để theo dõi hồi quy.
+
+Mỗi kịch bản chạy trong một tiến trình Python mới; kết quả là tổng thời gian
+cumulative của các import cấp cao nhất (micro giây), lấy giá trị nhỏ nhất sau
+nhiều lần chạy, kèm danh sách thư viện nặng đã bị nạp.
+
+Chạy:
+    python benchmarks/bench_import_time.py
+    python benchmarks/bench_import_time.py --save benchmarks/import_time_baseline.json
+    python benchmarks/bench_import_time.py --compare benchmarks/import_time_baseline.json
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Kịch bản: tên -> mã Python chạy trong tiến trình mới
+SCENARIOS = {
+    "converter": "import converter",
+    "doc2md": "import doc2md",
+    "app": "import app",
+    "docx_path": "import converter, docx_reader",
+}
+
+HEAVY_MODULES = ("fitz", "docx", "PIL", "cv2", "numpy", "pandas", "pytesseract", "streamlit")
+
+
+def measure(code):
+    """Chạy code với -X importtime, trả về (tổng micro giây, các thư viện nặng đã nạp)"""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=ROOT, capture_output=True, text=True, check=True
+    )
+    total = 0
+    loaded = set()
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        module = name.strip()
+        if module.split(".")[0] in HEAVY_MODULES:
+            loaded.add(module.split(".")[0])
+        # Import cấp cao nhất: tên chỉ thụt một khoảng trắng
+        if not name.startswith("  "):
+            total += int(cumulative)
+    return total, sorted(loaded)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=5, help="Số lần chạy mỗi kịch bản, lấy giá trị nhỏ nhất")
+    parser.add_argument("--save", help="Ghi kết quả ra file JSON")
+    parser.add_argument("--compare", help="So sánh với file JSON đã lưu")
+    parser.add_argument("--tolerance", type=float, default=0.2,
+                        help="Mức chậm hơn cho phép khi so sánh (mặc định: 0.2 = 20%%)")
+    args = parser.parse_args(argv)
+
+    results = {}
+    for name, code in SCENARIOS.items():
+        runs = [measure(code) for _ in range(args.repeat)]
+        results[name] = {
+            "us": min(total for total, _ in runs),
+            "heavy_modules": runs[0][1],
+        }
+        print(f"{name:<12}{results[name]['us'] / 1000:>10.1f} ms  {', '.join(results[name]['heavy_modules'])}")
+
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+            f.write("\n")
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = []
+        for name, result in results.items():
+            if name not in baseline:
+                continue
+            before = baseline[name]["us"]
+            if result["us"] > before * (1 + args.tolerance):
+                regressions.append(f"{name}: {before / 1000:.1f} ms -> {result['us'] / 1000:.1f} ms")
+            new_modules = set(result["heavy_modules"]) - set(baseline[name]["heavy_modules"])
+            if new_modules:
+                regressions.append(f"{name}: nạp thêm {', '.join(sorted(new_modules))}")
+        if regressions:
+            print("❌ Hồi quy thời gian import:\n  " + "\n  ".join(regressions))
+            return 1
+        print("✅ Không có hồi quy so với", args.compare)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,86 @@
+"""
+Kiểm tra thời gian sinh Markdown tăng tuyến tính theo số trang.
+
+Tạo PDF/DOCX tổng hợp với số trang khác nhau, chạy pdf_to_markdown và
+docx_to_markdown (tắt OCR và tối ưu ảnh) và in thời gian trên mỗi trang.
+Nếu bộ sinh tuyến tính thì cột ms/trang gần như không đổi khi số trang tăng.
+
+Chạy:
+    python benchmarks/bench_markdown_emit.py --pages 250 500 1000 2000
+"""
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+import fitz
+from docx import Document
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import converter  # noqa: E402
+
+LINES_PER_PAGE = 40
+BODY_LINE = "Dòng nội dung thử nghiệm đủ dài để không bị nhận là tiêu đề trong bộ chuyển đổi Markdown số {}"
+
+
+def make_pdf(path, pages):
+    doc = fitz.open()
+    for page_num in range(pages):
+        page = doc.new_page()
+        page.insert_text((72, 60), f"CHƯƠNG {page_num + 1}", fontsize=14)
+        text = "\n".join(BODY_LINE.format(i) for i in range(LINES_PER_PAGE))
+        page.insert_textbox(fitz.Rect(72, 80, 540, 800), text, fontsize=7)
+    doc.save(path)
+    doc.close()
+
+
+def make_docx(path, pages):
+    doc = Document()
+    for page_num in range(pages):
+        doc.add_heading(f"Chương {page_num + 1}", 1)
+        for i in range(LINES_PER_PAGE // 4):
+            paragraph = doc.add_paragraph(BODY_LINE.format(i) + " ")
+            paragraph.add_run("in đậm").bold = True
+    doc.save(path)
+
+
+def time_conversion(convert, path, output_folder, repeat):
+    best = None
+    for _ in range(repeat):
+        shutil.rmtree(output_folder, ignore_errors=True)
+        start = time.perf_counter()
+        convert(path, output_folder)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pages", type=int, nargs="+", default=[100, 200, 400, 800])
+    parser.add_argument("--repeat", type=int, default=3, help="Số lần chạy, lấy thời gian tốt nhất")
+    args = parser.parse_args(argv)
+
+    converters = {
+        "pdf": (make_pdf, lambda path, out: converter.pdf_to_markdown(path, out, optimize_imgs=False, enable_ocr=False)),
+        "docx": (make_docx, lambda path, out: converter.docx_to_markdown(path, out)),
+    }
+
+    work_dir = tempfile.mkdtemp(prefix="bench_emit_")
+    try:
+        print(f"{'loại':<6}{'trang':>8}{'thời gian (s)':>16}{'ms/trang':>12}")
+        for kind, (make, convert) in converters.items():
+            for pages in args.pages:
+                path = os.path.join(work_dir, f"doc_{pages}.{kind}")
+                make(path, pages)
+                elapsed = time_conversion(convert, path, os.path.join(work_dir, "images"), args.repeat)
+                print(f"{kind:<6}{pages:>8}{elapsed:>16.3f}{elapsed / pages * 1000:>12.3f}")
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""
+Kiểm tra định dạng đậm/nghiêng của đoạn văn Word có chi phí tuyến tính theo số run.
+
+Bộ cũ gọi formatted_text.replace(run_text, ...) cho từng run: O(số run x độ dài đoạn),
+và bọc mọi chỗ xuất hiện của chữ trong run (run "a" làm hỏng cả đoạn). format_runs duyệt
+các run một lần. Với mỗi số run, đo format_runs và bộ cũ trên cùng danh sách run, rồi
+docx_to_markdown trên file .docx có một đoạn văn chứa chừng ấy run. Nếu tuyến tính thì
+cột µs/run gần như không đổi khi số run tăng.
+
+Chạy:
+    python benchmarks/bench_run_formatting.py
+    python benchmarks/bench_run_formatting.py --runs 1000 4000 16000 64000
+"""
+import argparse
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import converter  # noqa: E402
+import document  # noqa: E402
+
+WORDS = ("a", "là", "số", "liệu", "báo cáo", "doanh thu", "the", "report", "quý", "năm")
+
+
+def make_runs(count, seed=0):
+    """Danh sách run (văn bản, đậm, nghiêng) ngẫu nhiên, nhiều run ngắn lặp lại"""
+    rng = random.Random(seed)
+    return [
+        (rng.choice(WORDS) + rng.choice(("", " ", " ", ", ")), rng.random() < 0.3, rng.random() < 0.2)
+        for _ in range(count)
+    ]
+
+
+def legacy_format_runs(runs):
+    """Cách định dạng cũ: thay thế trên cả đoạn cho từng run"""
+    formatted_text = "".join(text for text, _, _ in runs).strip()
+    for run_text, bold, italic in runs:
+        if bold:
+            formatted_text = formatted_text.replace(run_text, f"**{run_text}**")
+        if italic:
+            formatted_text = formatted_text.replace(run_text, f"*{run_text}*")
+    return formatted_text
+
+
+def make_docx(path, runs):
+    from docx import Document
+
+    doc = Document()
+    paragraph = doc.add_paragraph()
+    for text, bold, italic in runs:
+        run = paragraph.add_run(text)
+        run.bold = bold or None
+        run.italic = italic or None
+    doc.save(path)
+
+
+def best_time(func, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, nargs="+", default=[1000, 2000, 4000, 8000, 16000])
+    parser.add_argument("--repeat", type=int, default=3, help="Số lần chạy, lấy thời gian tốt nhất")
+    parser.add_argument("--legacy-max", type=int, default=8000,
+                        help="Không đo bộ cũ với số run lớn hơn mức này (chậm theo bình phương)")
+    args = parser.parse_args(argv)
+
+    work_dir = tempfile.mkdtemp(prefix="bench_runs_")
+    try:
+        print(f"{'số run':>8}{'format_runs':>14}{'µs/run':>9}{'cũ':>12}{'µs/run':>9}{'docx (s)':>11}{'µs/run':>9}")
+        for count in args.runs:
+            runs = make_runs(count)
+            new = best_time(lambda: document.format_runs(runs), args.repeat)
+            if count <= args.legacy_max:
+                old = best_time(lambda: legacy_format_runs(runs), args.repeat)
+                old_columns = f"{old:>12.4f}{old / count * 1e6:>9.2f}"
+            else:
+                old_columns = f"{'-':>12}{'-':>9}"
+
+            path = os.path.join(work_dir, f"runs_{count}.docx")
+            make_docx(path, runs)
+            images = os.path.join(work_dir, "images")
+            docx = best_time(lambda: converter.docx_to_markdown(path, images), args.repeat)
+            print(f"{count:>8}{new:>14.4f}{new / count * 1e6:>9.2f}{old_columns}{docx:>11.4f}{docx / count * 1e6:>9.2f}")
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
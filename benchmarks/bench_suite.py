@@ -0,0 +1,388 @@
+"""
+Bộ benchmark tái lập được cho các đường chuyển đổi chính, trên bộ tài liệu tổng hợp.
+
+Bộ tài liệu được sinh offline bằng PyMuPDF/python-docx với seed cố định (cùng tham
+số => cùng file): PDF nhiều chữ, nhiều ảnh, scan (ảnh cả trang, không có lớp văn bản),
+nhiều bảng kẻ, và DOCX. Mỗi file được chuyển đổi (pdf_to_markdown/docx_to_markdown,
+có và không có OCR) rồi nén ZIP (create_zip_file) trong một tiến trình Python mới để
+đo đúng RSS đỉnh. Kết quả: thời gian, thông lượng (trang/s, đoạn/s), RSS đỉnh và
+thời gian từng bước (stats['stages']) - lưu ra JSON để so sánh giữa các lần chạy.
+
+OCR chỉ chạy khi đã cài Tesseract; không có thì các lần chạy có OCR bị bỏ qua.
+
+Chạy:
+    python benchmarks/bench_suite.py                                  # bộ nhỏ (quick)
+    python benchmarks/bench_suite.py --profile full --save before.json   # 1 đến 2.000 trang
+    python benchmarks/bench_suite.py --profile full --compare before.json
+    python benchmarks/bench_suite.py --only text scanned --no-ocr --page-workers 4
+"""
+import argparse
+import io
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_CORPUS = os.path.join(ROOT, "benchmarks", "corpus")
+
+# Loại tài liệu -> kích thước (số trang PDF, số mục DOCX) theo từng mức
+PROFILES = {
+    "quick": {"text": [1, 50], "images": [1, 20], "scanned": [1, 5], "tables": [1, 20], "docx": [20]},
+    "full": {
+        "text": [1, 100, 2000],
+        "images": [1, 100, 500],
+        "scanned": [1, 20, 200],
+        "tables": [1, 100, 1000],
+        "docx": [20, 500, 2000],
+    },
+}
+
+WORDS = ("báo cáo doanh thu quý năm tổng hợp chi phí dự án kế hoạch thực hiện kết quả "
+         "phân tích số liệu khách hàng hợp đồng sản phẩm dịch vụ the report revenue total "
+         "quarter budget project result customer contract").split()
+
+
+def sentence(rng, words=12):
+    return " ".join(rng.choice(WORDS) for _ in range(words)).capitalize() + "."
+
+
+def make_photo(rng, width=480, height=320):
+    """Ảnh chụp giả (JPEG) - không phải bảng"""
+    import numpy as np
+    from PIL import Image
+
+    low = rng.integers(0, 255, (height // 40 + 2, width // 40 + 2, 3)).astype(np.uint8)
+    img = Image.fromarray(low).resize((width, height), Image.BICUBIC)
+    buffer = io.BytesIO()
+    img.save(buffer, "JPEG", quality=85)
+    return buffer.getvalue()
+
+
+def make_table_image(rng, width=900, height=420, rows=5, cols=4):
+    """Ảnh bảng kẻ lưới có chữ số trong ô (PNG)"""
+    from PIL import Image, ImageDraw
+
+    img = Image.new("L", (width, height), 255)
+    draw = ImageDraw.Draw(img)
+    for r in range(rows + 1):
+        y = 10 + r * (height - 20) // rows
+        draw.line([(10, y), (width - 10, y)], fill=0, width=2)
+    for c in range(cols + 1):
+        x = 10 + c * (width - 20) // cols
+        draw.line([(x, 10), (x, height - 10)], fill=0, width=2)
+    for r in range(rows):
+        for c in range(cols):
+            draw.text((25 + c * (width - 20) // cols, 25 + r * (height - 20) // rows),
+                      str(int(rng.integers(10, 99999))), fill=0)
+    buffer = io.BytesIO()
+    img.save(buffer, "PNG")
+    return buffer.getvalue()
+
+
+def make_logo():
+    """Logo giống nhau trên mọi trang (ảnh lặp lại)"""
+    from PIL import Image, ImageDraw
+
+    img = Image.new("RGB", (200, 60), "navy")
+    ImageDraw.Draw(img).text((20, 20), "DOC2MD", fill="white")
+    buffer = io.BytesIO()
+    img.save(buffer, "PNG")
+    return buffer.getvalue()
+
+
+def add_text_page(doc, rng, page_num, lines=40):
+    import fitz
+
+    page = doc.new_page()
+    page.insert_text((72, 60), f"CHƯƠNG {page_num + 1}", fontsize=14)
+    page.insert_textbox(fitz.Rect(72, 80, 540, 800), "\n".join(sentence(rng) for _ in range(lines)), fontsize=7)
+    return page
+
+
+def make_text_pdf(doc, rng, pages):
+    for page_num in range(pages):
+        add_text_page(doc, rng, page_num)
+
+
+def make_images_pdf(doc, rng, pages):
+    import fitz
+
+    logo = make_logo()
+    logo_xref = 0
+    for page_num in range(pages):
+        page = add_text_page(doc, rng, page_num, lines=10)
+        # xref != 0: dùng lại ảnh đã có trong PDF (logo chỉ lưu một lần)
+        logo_xref = page.insert_image(fitz.Rect(400, 20, 540, 62), stream=logo, xref=logo_xref)
+        page.insert_image(fitz.Rect(72, 250, 312, 410), stream=make_photo(rng))
+        if page_num % 3 == 0:
+            page.insert_image(fitz.Rect(72, 450, 540, 670), stream=make_table_image(rng))
+
+
+def make_scanned_pdf(doc, rng, pages, dpi=150):
+    """Mỗi trang là ảnh xám của một trang chữ (không có lớp văn bản)"""
+    import fitz
+
+    for page_num in range(pages):
+        source = fitz.open()
+        add_text_page(source, rng, page_num, lines=30)
+        pix = source[0].get_pixmap(dpi=dpi, colorspace=fitz.csGRAY)
+        source.close()
+        page = doc.new_page()
+        page.insert_image(page.rect, stream=pix.tobytes("png"))
+
+
+def make_tables_pdf(doc, rng, pages, rows=8, cols=4):
+    """Bảng kẻ bằng đường vector (nhận diện bằng find_tables, không cần OCR)"""
+    for page_num in range(pages):
+        page = add_text_page(doc, rng, page_num, lines=6)
+        top, left, row_height, col_width = 200, 72, 24, 117
+        for r in range(rows + 1):
+            page.draw_line((left, top + r * row_height), (left + cols * col_width, top + r * row_height))
+        for c in range(cols + 1):
+            page.draw_line((left + c * col_width, top), (left + c * col_width, top + rows * row_height))
+        for r in range(rows):
+            for c in range(cols):
+                text = f"Cột {c + 1}" if r == 0 else str(int(rng.integers(0, 100000)))
+                page.insert_text((left + c * col_width + 6, top + r * row_height + 16), text, fontsize=9)
+
+
+def make_docx(path, rng, sections):
+    from docx import Document
+    from docx.shared import Inches
+
+    doc = Document()
+    logo = make_logo()
+    for section in range(sections):
+        doc.add_heading(f"Mục {section + 1}", 1)
+        for _ in range(4):
+            paragraph = doc.add_paragraph(sentence(rng) + " ")
+            paragraph.add_run(sentence(rng, 3)).bold = True
+            paragraph.add_run(" " + sentence(rng, 6))
+        if section % 5 == 0:
+            table = doc.add_table(rows=4, cols=3)
+            for row in table.rows:
+                for cell in row.cells:
+                    cell.text = str(int(rng.integers(0, 10000)))
+        if section % 10 == 0:
+            doc.add_picture(io.BytesIO(logo), width=Inches(2))
+    doc.save(path)
+
+
+PDF_MAKERS = {
+    "text": make_text_pdf,
+    "images": make_images_pdf,
+    "scanned": make_scanned_pdf,
+    "tables": make_tables_pdf,
+}
+
+
+def corpus_file(corpus, kind, size, seed):
+    """Đường dẫn file của bộ tài liệu, sinh ra nếu chưa có (cùng kind/size/seed => cùng nội dung)"""
+    import numpy as np
+
+    ext = "docx" if kind == "docx" else "pdf"
+    path = os.path.join(corpus, f"{kind}_{size}_s{seed}.{ext}")
+    if os.path.exists(path):
+        return path
+    os.makedirs(corpus, exist_ok=True)
+    rng = np.random.default_rng([seed, size, list(PDF_MAKERS).index(kind) if kind in PDF_MAKERS else 99])
+    tmp_path = f"{path}.tmp.{ext}"
+    if kind == "docx":
+        make_docx(tmp_path, rng, size)
+    else:
+        import fitz
+
+        doc = fitz.open()
+        PDF_MAKERS[kind](doc, rng, size)
+        doc.save(tmp_path, garbage=3, deflate=True)
+        doc.close()
+    os.replace(tmp_path, path)
+    return path
+
+
+def peak_rss_mb():
+    """RSS đỉnh (MB) của tiến trình này và các tiến trình con (None nếu không đo được, vd: Windows)"""
+    try:
+        import resource
+    except ImportError:
+        return None
+    # Linux: VmHWM được đặt lại khi exec; ru_maxrss thì giữ giá trị của tiến trình cha
+    # trước khi exec (tiến trình chạy benchmark, đã nạp sẵn thư viện)
+    peak = None
+    try:
+        with open("/proc/self/status", encoding="ascii") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    peak = int(line.split()[1])
+    except OSError:
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        if sys.platform == "darwin":
+            peak //= 1024  # macOS: bytes
+    # Tiến trình con xử lý trang (chỉ có khi --page-workers > 1)
+    children = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    if sys.platform == "darwin":
+        children //= 1024
+    return round(max(peak, children) / 1024, 1)
+
+
+def run_one(path, ocr, page_workers):
+    """Chạy một lần chuyển đổi + nén ZIP (trong tiến trình riêng), trả về kết quả đo"""
+    sys.path.insert(0, ROOT)
+    import converter
+
+    output = tempfile.mkdtemp(prefix="bench_suite_")
+    try:
+        images_dir = os.path.join(output, "images")
+        start = time.perf_counter()
+        if path.endswith(".pdf"):
+            markdown, stats = converter.pdf_to_markdown(
+                path, images_dir, "images/", enable_ocr=ocr, ocr_scanned=ocr, workers=page_workers
+            )
+            units, unit = stats["pages"], "pages"
+        else:
+            markdown, stats = converter.docx_to_markdown(path, images_dir, "images/")
+            units, unit = stats["paragraphs"], "paragraphs"
+        convert_seconds = time.perf_counter() - start
+
+        start = time.perf_counter()
+        zip_path = os.path.join(output, "result.zip")
+        converter.create_zip_file(markdown, images_dir, "result.md", zip_path)
+        zip_seconds = time.perf_counter() - start
+
+        return {
+            "seconds": round(convert_seconds, 3),
+            "units": units,
+            "unit": unit,
+            "throughput": round(units / convert_seconds, 2) if convert_seconds else None,
+            "zip_seconds": round(zip_seconds, 3),
+            "zip_bytes": os.path.getsize(zip_path),
+            "markdown_chars": len(markdown),
+            "peak_rss_mb": peak_rss_mb(),
+            "stages": stats.get("stages", {}),
+        }
+    finally:
+        shutil.rmtree(output, ignore_errors=True)
+
+
+def measure(path, ocr, page_workers, repeat):
+    """Chạy run_one trong tiến trình mới repeat lần, giữ lần nhanh nhất (RSS lớn nhất)"""
+    best = None
+    peak = None
+    for _ in range(repeat):
+        result = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), "--run-one", path,
+             "--page-workers", str(page_workers)] + (["--ocr"] if ocr else []),
+            cwd=ROOT, capture_output=True, text=True, check=True
+        )
+        run = json.loads(result.stdout.strip().splitlines()[-1])
+        if run["peak_rss_mb"] is not None:
+            peak = max(peak or 0, run["peak_rss_mb"])
+        if best is None or run["seconds"] < best["seconds"]:
+            best = run
+    best["peak_rss_mb"] = peak
+    return best
+
+
+def environment():
+    try:
+        revision = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT,
+                                  capture_output=True, text=True).stdout.strip() or None
+    except OSError:
+        revision = None
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "git": revision,
+        "tesseract": shutil.which("tesseract") is not None,
+    }
+
+
+def compare(results, baseline, tolerance):
+    """Danh sách hồi quy: thông lượng giảm hoặc RSS tăng quá tolerance so với baseline"""
+    regressions = []
+    for run_id, run in results.items():
+        before = baseline.get(run_id)
+        if before is None:
+            continue
+        if before["throughput"] and run["throughput"] < before["throughput"] * (1 - tolerance):
+            regressions.append(f"{run_id}: {before['throughput']} -> {run['throughput']} {run['unit']}/s")
+        if before["peak_rss_mb"] and run["peak_rss_mb"] and run["peak_rss_mb"] > before["peak_rss_mb"] * (1 + tolerance):
+            regressions.append(f"{run_id}: RSS {before['peak_rss_mb']} -> {run['peak_rss_mb']} MB")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--profile", choices=sorted(PROFILES), default="quick", help="Bộ kích thước tài liệu")
+    parser.add_argument("--only", nargs="+", choices=list(PDF_MAKERS) + ["docx"], help="Chỉ chạy các loại tài liệu này")
+    parser.add_argument("--corpus", default=DEFAULT_CORPUS, help="Thư mục bộ tài liệu (sinh một lần, dùng lại)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=3, help="Số lần chạy mỗi trường hợp, lấy lần nhanh nhất")
+    parser.add_argument("--page-workers", type=int, default=1, help="Số tiến trình xử lý trang PDF")
+    parser.add_argument("--no-ocr", action="store_true", help="Chỉ chạy không OCR")
+    parser.add_argument("--save", help="Ghi kết quả ra file JSON")
+    parser.add_argument("--compare", help="So sánh với file JSON đã lưu")
+    parser.add_argument("--tolerance", type=float, default=0.2,
+                        help="Mức chậm hơn / tốn bộ nhớ hơn cho phép khi so sánh (mặc định: 0.2 = 20%%)")
+    parser.add_argument("--run-one", help=argparse.SUPPRESS)
+    parser.add_argument("--ocr", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.run_one:
+        # Tiến trình con: in kết quả đo dạng JSON ở dòng cuối
+        print(json.dumps(run_one(args.run_one, args.ocr, args.page_workers)))
+        return 0
+
+    ocr_modes = [False]
+    if not args.no_ocr:
+        if shutil.which("tesseract"):
+            ocr_modes.append(True)
+        else:
+            print("⚠️ Chưa cài Tesseract: bỏ qua các lần chạy có OCR")
+
+    results = {}
+    print(f"{'trường hợp':<24}{'giây':>9}{'thông lượng':>18}{'RSS (MB)':>10}{'ZIP (s)':>9}  bước chậm nhất")
+    for kind, sizes in PROFILES[args.profile].items():
+        if args.only and kind not in args.only:
+            continue
+        for size in sizes:
+            start = time.perf_counter()
+            path = corpus_file(args.corpus, kind, size, args.seed)
+            generated = time.perf_counter() - start
+            if generated > 1:
+                print(f"  (sinh {os.path.basename(path)} trong {generated:.1f}s)")
+            for ocr in ocr_modes if kind != "docx" else [False]:
+                run_id = f"{kind}-{size}-{'ocr' if ocr else 'no_ocr'}"
+                run = measure(path, ocr, args.page_workers, args.repeat)
+                results[run_id] = run
+                slowest = next(iter(run["stages"]), "")
+                print(f"{run_id:<24}{run['seconds']:>9.2f}{run['throughput']:>12.1f} {run['unit'][:5] + '/s':<5}"
+                      f"{run['peak_rss_mb'] or 0:>10.0f}{run['zip_seconds']:>9.2f}  {slowest}")
+
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as f:
+            json.dump({"environment": environment(), "profile": args.profile, "seed": args.seed,
+                       "page_workers": args.page_workers, "runs": results}, f, ensure_ascii=False, indent=2)
+            f.write("\n")
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+        if baseline.get("page_workers") != args.page_workers:
+            print(f"⚠️ Baseline chạy với --page-workers {baseline.get('page_workers')}, lần này {args.page_workers}")
+        regressions = compare(results, baseline["runs"], args.tolerance)
+        if regressions:
+            print("❌ Hồi quy hiệu năng:\n  " + "\n  ".join(regressions))
+            return 1
+        print("✅ Không có hồi quy so với", args.compare)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,219 @@
+"""
+Đo độ chính xác và thời gian của bước phát hiện bảng trong ảnh (không gồm OCR).
+
+So sánh bộ phát hiện cũ (morphology + ngưỡng 100 điểm trên ảnh đầy đủ) với
+is_table_image (lọc nhanh trên ảnh thu nhỏ, rồi mới morphology). Mỗi ảnh được
+phát hiện là bảng sẽ bị OCR, nên precision thấp = tốn thời gian OCR vô ích.
+
+Bộ ảnh mẫu có nhãn được tạo tự động (bảng kẻ lưới, bảng chỉ có đường ngang, bảng
+scan có nhiễu; ảnh chụp, đoạn văn, khung viền, sơ đồ, biểu đồ) ở nhiều kích thước.
+Có thể dùng bộ ảnh thật: thư mục chứa ảnh và labels.json dạng {"ten_anh.png": true}.
+
+Chạy:
+    python benchmarks/bench_table_detection.py
+    python benchmarks/bench_table_detection.py --save-fixtures benchmarks/fixtures/tables
+    python benchmarks/bench_table_detection.py --fixtures benchmarks/fixtures/tables
+"""
+import argparse
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import converter  # noqa: E402
+
+SIZES = [(800, 600), (1600, 1200), (4000, 3000)]
+
+
+def draw_text_lines(img, rng, x0, y0, x1, y1, line_height):
+    """Vẽ các dòng chữ giả trong vùng cho trước"""
+    scale = line_height / 40
+    for y in range(y0 + line_height, y1, int(line_height * 1.6)):
+        words = " ".join("abcdefgh"[:rng.integers(3, 8)] for _ in range(rng.integers(3, 10)))
+        cv2.putText(img, words, (x0, y), cv2.FONT_HERSHEY_SIMPLEX, scale, 0, max(1, int(scale * 2)))
+
+
+def make_grid_table(rng, width, height, vertical=True, noisy=False):
+    img = np.full((height, width), 255, np.uint8)
+    rows, cols = rng.integers(3, 9), rng.integers(2, 6)
+    x0, y0 = width // 10, height // 10
+    x1, y1 = width - x0, height - y0
+    thickness = max(1, width // 800) + int(rng.integers(0, 2))
+    ys = np.linspace(y0, y1, rows + 1).astype(int)
+    xs = np.linspace(x0, x1, cols + 1).astype(int)
+    for y in ys:
+        cv2.line(img, (x0, y), (x1, y), 0, thickness)
+    if vertical:
+        for x in xs:
+            cv2.line(img, (x, y0), (x, y1), 0, thickness)
+    for r in range(rows):
+        for c in range(cols):
+            cv2.putText(img, f"{rng.integers(10, 9999)}", (xs[c] + 10, ys[r + 1] - (ys[r + 1] - ys[r]) // 3),
+                        cv2.FONT_HERSHEY_SIMPLEX, (ys[r + 1] - ys[r]) / 80, 0, max(1, thickness))
+    if noisy:
+        img = cv2.GaussianBlur(img, (3, 3), 0)
+        img = np.clip(img.astype(np.int16) - 25 + rng.normal(0, 12, img.shape), 0, 255).astype(np.uint8)
+    return img
+
+
+def make_photo(rng, width, height):
+    """Ảnh chụp giả: nền biến thiên mượt + các hình khối có cạnh sắc"""
+    low = rng.integers(0, 255, (height // 50 + 2, width // 50 + 2)).astype(np.uint8)
+    img = cv2.resize(low, (width, height), interpolation=cv2.INTER_CUBIC)
+    for _ in range(rng.integers(5, 15)):
+        color = int(rng.integers(0, 255))
+        if rng.random() < 0.5:
+            center = (int(rng.integers(0, width)), int(rng.integers(0, height)))
+            cv2.circle(img, center, int(rng.integers(20, max(21, width // 5))), color, -1)
+        else:
+            p1 = (int(rng.integers(0, width)), int(rng.integers(0, height)))
+            p2 = (int(rng.integers(0, width)), int(rng.integers(0, height)))
+            cv2.rectangle(img, p1, p2, color, -1)
+    return np.clip(img + rng.normal(0, 8, img.shape), 0, 255).astype(np.uint8)
+
+
+def make_text(rng, width, height):
+    img = np.full((height, width), 255, np.uint8)
+    draw_text_lines(img, rng, width // 10, height // 10, width - width // 10, height - height // 10, max(12, height // 30))
+    return img
+
+
+def make_framed_text(rng, width, height):
+    """Đoạn văn trong một khung viền (không phải bảng)"""
+    img = make_text(rng, width, height)
+    cv2.rectangle(img, (width // 20, height // 20), (width - width // 20, height - height // 20), 0, max(1, width // 800))
+    return img
+
+
+def make_diagram(rng, width, height):
+    """Sơ đồ: vài hộp rời nhau nối bằng mũi tên"""
+    img = np.full((height, width), 255, np.uint8)
+    thickness = max(1, width // 800)
+    boxes = []
+    for i in range(3):
+        x = width // 10 + i * width // 3
+        y = height // 3 + int(rng.integers(-height // 8, height // 8))
+        boxes.append((x, y))
+        cv2.rectangle(img, (x, y), (x + width // 5, y + height // 6), 0, thickness)
+        cv2.putText(img, f"Step {i + 1}", (x + 10, y + height // 12), cv2.FONT_HERSHEY_SIMPLEX, height / 800, 0, thickness)
+    for (xa, ya), (xb, yb) in zip(boxes, boxes[1:]):
+        cv2.arrowedLine(img, (xa + width // 5, ya + height // 12), (xb, yb + height // 12), 0, thickness)
+    return img
+
+
+def make_chart(rng, width, height):
+    """Biểu đồ cột có trục (trường hợp dễ bị nhận nhầm)"""
+    img = np.full((height, width), 255, np.uint8)
+    thickness = max(1, width // 800)
+    x0, y0, x1, y1 = width // 8, height // 8, width - width // 8, height - height // 8
+    cv2.line(img, (x0, y1), (x1, y1), 0, thickness)
+    cv2.line(img, (x0, y0), (x0, y1), 0, thickness)
+    bars = rng.integers(4, 10)
+    bar_width = (x1 - x0) // (bars * 2)
+    for i in range(bars):
+        top = int(rng.integers(y0, y1 - 10))
+        left = x0 + bar_width // 2 + i * 2 * bar_width
+        cv2.rectangle(img, (left, top), (left + bar_width, y1), int(rng.integers(40, 160)), -1)
+    return img
+
+
+GENERATORS = {
+    'grid_table': (lambda rng, w, h: make_grid_table(rng, w, h), True),
+    'rules_table': (lambda rng, w, h: make_grid_table(rng, w, h, vertical=False), True),
+    'scanned_table': (lambda rng, w, h: make_grid_table(rng, w, h, noisy=True), True),
+    'photo': (make_photo, False),
+    'text': (make_text, False),
+    'framed_text': (make_framed_text, False),
+    'diagram': (make_diagram, False),
+    'chart': (make_chart, False),
+}
+
+
+def make_fixtures(folder, per_kind=3, seed=0):
+    """Tạo bộ ảnh mẫu có nhãn: <folder>/<loại>_<rộng>x<cao>_<i>.png + labels.json"""
+    rng = np.random.default_rng(seed)
+    os.makedirs(folder, exist_ok=True)
+    labels = {}
+    for kind, (make, is_table) in GENERATORS.items():
+        for width, height in SIZES:
+            for i in range(per_kind):
+                name = f"{kind}_{width}x{height}_{i}.png"
+                cv2.imwrite(os.path.join(folder, name), make(rng, width, height))
+                labels[name] = is_table
+    with open(os.path.join(folder, "labels.json"), "w", encoding="utf-8") as f:
+        json.dump(labels, f, indent=2)
+    return labels
+
+
+def legacy_is_table(img):
+    """Bộ phát hiện cũ: morphology trên ảnh đầy đủ, kernel 40px cố định, ngưỡng 100 điểm"""
+    gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
+    thresh = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY_INV + cv2.THRESH_OTSU)[1]
+    horizontal_kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (40, 1))
+    vertical_kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (1, 40))
+    horizontal_lines = cv2.morphologyEx(thresh, cv2.MORPH_OPEN, horizontal_kernel, iterations=2)
+    vertical_lines = cv2.morphologyEx(thresh, cv2.MORPH_OPEN, vertical_kernel, iterations=2)
+    return cv2.countNonZero(cv2.add(horizontal_lines, vertical_lines)) > 100
+
+
+def evaluate(detector, images):
+    """Chạy detector trên các ảnh (đã giải mã), trả về (tp, fp, fn, tn, ms/ảnh, các ảnh sai)"""
+    tp = fp = fn = tn = 0
+    wrong = []
+    elapsed = 0.0
+    for name, img, label in images:
+        start = time.perf_counter()
+        predicted = bool(detector(img))
+        elapsed += time.perf_counter() - start
+        if predicted and label:
+            tp += 1
+        elif predicted:
+            fp += 1
+            wrong.append(name)
+        elif label:
+            fn += 1
+            wrong.append(name)
+        else:
+            tn += 1
+    return tp, fp, fn, tn, elapsed / max(len(images), 1) * 1000, wrong
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--fixtures", help="Thư mục ảnh có labels.json (mặc định: tạo bộ ảnh mẫu tạm thời)")
+    parser.add_argument("--save-fixtures", help="Tạo bộ ảnh mẫu vào thư mục này và giữ lại")
+    parser.add_argument("--per-kind", type=int, default=3, help="Số ảnh mẫu cho mỗi loại và kích thước")
+    parser.add_argument("--verbose", action="store_true", help="In tên các ảnh bị phân loại sai")
+    args = parser.parse_args(argv)
+
+    folder = args.fixtures or args.save_fixtures or tempfile.mkdtemp(prefix="bench_tables_")
+    try:
+        if not args.fixtures:
+            make_fixtures(folder, args.per_kind)
+        with open(os.path.join(folder, "labels.json"), encoding="utf-8") as f:
+            labels = json.load(f)
+        images = [(name, cv2.imread(os.path.join(folder, name)), label) for name, label in sorted(labels.items())]
+
+        print(f"{len(images)} ảnh ({sum(labels.values())} bảng)")
+        print(f"{'bộ phát hiện':<16}{'precision':>10}{'recall':>8}{'ms/ảnh':>10}{'gửi OCR':>9}")
+        for title, detector in (("cũ", legacy_is_table), ("is_table_image", converter.is_table_image)):
+            tp, fp, fn, tn, ms, wrong = evaluate(detector, images)
+            precision = tp / (tp + fp) if tp + fp else 0.0
+            recall = tp / (tp + fn) if tp + fn else 0.0
+            print(f"{title:<16}{precision:>10.2f}{recall:>8.2f}{ms:>10.1f}{tp + fp:>9}")
+            if args.verbose and wrong:
+                print("  sai: " + ", ".join(wrong))
+    finally:
+        if not args.fixtures and not args.save_fixtures:
+            shutil.rmtree(folder, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
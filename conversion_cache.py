@@ -0,0 +1,192 @@
+"""
+Cache kết quả chuyển đổi theo nội dung file (content-addressed).
+
+Khóa cache = SHA-256 của bytes file + các tùy chọn chuyển đổi, nên cùng một
+tài liệu (cùng tùy chọn) chỉ phải chuyển đổi một lần. Kết quả (mô hình tài
+liệu của document.py, thống kê, hình ảnh) được lưu trên đĩa và bị loại bỏ theo
+LRU khi vượt quá dung lượng cho phép.
+"""
+import hashlib
+import json
+import os
+import shutil
+import threading
+import time
+from collections import OrderedDict
+
+from document import Document
+
+# Tăng khi thay đổi output của bộ chuyển đổi để vô hiệu hóa cache cũ
+CACHE_VERSION = 7
+
+DEFAULT_CACHE_DIR = os.environ.get("DOC2MD_CACHE_DIR", ".conversion_cache")
+DEFAULT_MAX_BYTES = int(os.environ.get("DOC2MD_CACHE_MAX_MB", "500")) * 1024 * 1024
+
+_DOCUMENT_FILE = "document.json"
+_META_FILE = "meta.json"
+_IMAGES_DIR = "images"
+
+
+def make_cache_key(file_bytes, file_type, **options):
+    """Tạo khóa cache từ nội dung file và tùy chọn chuyển đổi"""
+    digest = hashlib.sha256()
+    digest.update(file_bytes)
+    digest.update(json.dumps(
+        {'version': CACHE_VERSION, 'type': file_type, 'options': options},
+        sort_keys=True
+    ).encode('utf-8'))
+    return digest.hexdigest()
+
+
+def dir_size(path):
+    """Tổng dung lượng (bytes) của thư mục"""
+    total = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            try:
+                total += os.path.getsize(os.path.join(root, name))
+            except OSError:
+                pass
+    return total
+
+
+class ConversionCache:
+    """Cache kết quả chuyển đổi trên đĩa, giới hạn dung lượng, loại bỏ theo LRU"""
+
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR, max_bytes=DEFAULT_MAX_BYTES):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        # key -> dung lượng; thứ tự = thứ tự sử dụng (cũ nhất ở đầu)
+        self._entries = OrderedDict()
+        self._total_bytes = 0
+
+        os.makedirs(cache_dir, exist_ok=True)
+        self._load_index()
+
+    def _entry_dir(self, key):
+        return os.path.join(self.cache_dir, key)
+
+    def _load_index(self):
+        """Đọc lại các entry đã có trên đĩa, sắp xếp theo lần dùng gần nhất"""
+        found = []
+        for name in os.listdir(self.cache_dir):
+            entry_dir = self._entry_dir(name)
+            meta_path = os.path.join(entry_dir, _META_FILE)
+            if not os.path.isfile(meta_path):
+                # Entry ghi dở (bị ngắt giữa chừng) => xóa
+                if os.path.isdir(entry_dir):
+                    shutil.rmtree(entry_dir, ignore_errors=True)
+                continue
+            found.append((os.path.getmtime(meta_path), name, dir_size(entry_dir)))
+
+        for _, name, size in sorted(found):
+            self._entries[name] = size
+            self._total_bytes += size
+        self._evict()
+
+    def _remove(self, key):
+        size = self._entries.pop(key, 0)
+        self._total_bytes -= size
+        shutil.rmtree(self._entry_dir(key), ignore_errors=True)
+
+    def _evict(self):
+        """Loại bỏ các entry ít dùng nhất cho đến khi dưới giới hạn dung lượng"""
+        while self._total_bytes > self.max_bytes and self._entries:
+            oldest = next(iter(self._entries))
+            self._remove(oldest)
+            self.evictions += 1
+
+    def get(self, key, images_dir):
+        """Lấy kết quả từ cache và chép hình ảnh vào images_dir. Trả về (Document, stats) hoặc None"""
+        with self._lock:
+            if key not in self._entries:
+                self.misses += 1
+                return None
+
+            entry_dir = self._entry_dir(key)
+            try:
+                with open(os.path.join(entry_dir, _DOCUMENT_FILE), encoding='utf-8') as f:
+                    document = Document.from_data(json.load(f))
+                meta_path = os.path.join(entry_dir, _META_FILE)
+                with open(meta_path, encoding='utf-8') as f:
+                    stats = json.load(f)['stats']
+
+                cached_images = os.path.join(entry_dir, _IMAGES_DIR)
+                if os.path.isdir(cached_images):
+                    os.makedirs(images_dir, exist_ok=True)
+                    for filename in os.listdir(cached_images):
+                        shutil.copy2(os.path.join(cached_images, filename), os.path.join(images_dir, filename))
+
+                # Đánh dấu vừa được dùng (giữ thứ tự LRU qua các lần khởi động)
+                os.utime(meta_path)
+            except (OSError, ValueError, KeyError, TypeError):
+                # Entry hỏng => bỏ đi và coi như miss
+                self._remove(key)
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return document, stats
+
+    def put(self, key, document, stats, images_dir):
+        """Lưu kết quả chuyển đổi (Document, kèm hình ảnh trong images_dir) vào cache"""
+        entry_dir = self._entry_dir(key)
+        tmp_dir = f"{entry_dir}.tmp-{os.getpid()}-{threading.get_ident()}"
+
+        try:
+            # Ghi vào thư mục tạm rồi đổi tên để entry luôn đầy đủ
+            os.makedirs(tmp_dir, exist_ok=True)
+            with open(os.path.join(tmp_dir, _DOCUMENT_FILE), 'w', encoding='utf-8') as f:
+                json.dump(document.to_data(), f, ensure_ascii=False, separators=(',', ':'))
+            if os.path.isdir(images_dir):
+                shutil.copytree(images_dir, os.path.join(tmp_dir, _IMAGES_DIR))
+            with open(os.path.join(tmp_dir, _META_FILE), 'w', encoding='utf-8') as f:
+                json.dump({'stats': stats, 'created': time.time()}, f, ensure_ascii=False)
+            size = dir_size(tmp_dir)
+        except (OSError, TypeError, ValueError):
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            return False
+
+        with self._lock:
+            # Kết quả lớn hơn cả cache => không lưu
+            if size > self.max_bytes:
+                shutil.rmtree(tmp_dir, ignore_errors=True)
+                return False
+
+            if key in self._entries:
+                self._remove(key)
+            try:
+                os.replace(tmp_dir, entry_dir)
+            except OSError:
+                shutil.rmtree(tmp_dir, ignore_errors=True)
+                return False
+
+            self._entries[key] = size
+            self._total_bytes += size
+            self._evict()
+            return True
+
+    def clear(self):
+        """Xóa toàn bộ cache"""
+        with self._lock:
+            for key in list(self._entries):
+                self._remove(key)
+
+    def stats(self):
+        """Thống kê hit/miss và dung lượng đang dùng"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'evictions': self.evictions,
+                'entries': len(self._entries),
+                'bytes': self._total_bytes,
+                'max_bytes': self.max_bytes,
+            }
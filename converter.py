@@ -0,0 +1,1203 @@
+"""
+Chuyển đổi PDF/Word sang Markdown (không phụ thuộc Streamlit).
+
+Dùng chung cho giao diện web (app.py) và dòng lệnh (doc2md.py).
+"""
+import hashlib
+import importlib.util
+import io
+import json
+import os
+import shutil
+import tempfile
+import zipfile
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from functools import partial
+import multiprocessing
+
+from docx_reader import find_document_part, iter_body_blocks, iter_image_parts, read_paragraph_styles
+from document import Document, Heading, Image, PageBreak, Paragraph, Span, Table, clean_cell, render_markdown
+from profiling import StageTimer, merge_samples, stage, summarize_samples
+
+# Các thư viện nặng (PyMuPDF, Pillow, OpenCV, NumPy, pytesseract) được
+# import trong từng hàm khi thật sự cần, để khởi động nhanh: chuyển .docx không phải
+# nạp PyMuPDF/OpenCV, tắt OCR thì không nạp OpenCV/pytesseract.
+# Với pytesseract chỉ kiểm tra đã cài hay chưa (import thật sẽ nạp cả pandas).
+# Streamlit Cloud sẽ cài Tesseract tự động
+TESSERACT_AVAILABLE = importlib.util.find_spec("pytesseract") is not None
+
+DEFAULT_OCR_WORKERS = 2
+# Mỗi lần OCR là một tiến trình tesseract riêng => giới hạn số thread OpenMP của từng
+# tiến trình để tổng số thread không vượt quá số CPU. Biến môi trường dùng chung cho cả
+# tiến trình nên chỉ đặt khi khởi động (xem set_ocr_threads), không đặt theo từng lần chuyển đổi
+os.environ.setdefault('OMP_THREAD_LIMIT', '1')
+# Số trang tối đa được xử lý trước trong khi chờ OCR của trang cũ hơn
+PAGE_LOOKAHEAD = 4
+# Trang scan: ít hơn số ký tự này trong lớp văn bản và có ảnh phủ ít nhất
+# tỉ lệ này của trang (logo, ảnh minh họa nhỏ không tính) => OCR cả trang
+SCANNED_TEXT_MIN_CHARS = 20
+SCANNED_IMAGE_MIN_COVERAGE = 0.5
+# Độ phân giải khi chuyển trang scan thành ảnh để OCR
+SCANNED_OCR_DPI = 300
+# Lọc nhanh bảng trong ảnh: cạnh dài tối đa của ảnh thu nhỏ; đường kẻ phủ ít nhất
+# TABLE_LINE_FILL chiều ngang (dọc) và dày không quá TABLE_LINE_MAX_THICKNESS cạnh ảnh;
+# ảnh có hơn TABLE_MAX_DARK_RATIO điểm tối (ảnh chụp) không phải bảng
+TABLE_PREFILTER_MAX_SIDE = 800
+TABLE_LINE_FILL = 0.5
+TABLE_LINE_MAX_THICKNESS = 0.006
+TABLE_MAX_DARK_RATIO = 0.4
+# Tăng khi thay đổi cách nhận diện bảng / OCR để vô hiệu hóa cache OCR cũ (ocr_cache.py)
+OCR_DETECTOR_VERSION = 1
+# Tiêu đề của bảng nhận diện từ ảnh bằng OCR
+OCR_TABLE_CAPTION = "📊 Bảng (OCR):"
+
+def resize_image(img, max_width=1200):
+    """Thu nhỏ ảnh (PIL) nếu rộng hơn max_width, giữ tỉ lệ"""
+    from PIL import Image
+    
+    if img.width > max_width:
+        ratio = max_width / img.width
+        new_height = int(img.height * ratio)
+        img = img.resize((max_width, new_height), Image.LANCZOS)
+    return img
+
+def optimize_image(image_path, max_width=1200, quality=85):
+    """Tối ưu hóa kích thước và chất lượng hình ảnh"""
+    from PIL import Image
+    
+    try:
+        img = Image.open(image_path)
+        
+        # Resize nếu ảnh quá lớn
+        img = resize_image(img, max_width)
+        
+        # Lưu lại với chất lượng tối ưu
+        img.save(image_path, optimize=True, quality=quality)
+        
+        return True
+    except Exception as e:
+        return False
+
+def decode_image(image_bytes):
+    """Giải mã bytes ảnh thành PIL Image (None nếu không đọc được)"""
+    from PIL import Image
+    
+    try:
+        img = Image.open(io.BytesIO(image_bytes))
+        img.load()
+        return img
+    except Exception:
+        return None
+
+def save_image(image_bytes, image_path, optimize_imgs=True, decode=False, max_width=1200, quality=85):
+    """Ghi ảnh ra đĩa đúng một lần (tối ưu trong bộ nhớ nếu bật).
+    
+    Trả về ảnh đã giải mã (PIL) để các bước sau dùng lại mà không đọc lại file,
+    hoặc None nếu không cần/không giải mã được.
+    """
+    img = decode_image(image_bytes) if (optimize_imgs or decode) else None
+    
+    if optimize_imgs and img is not None:
+        img = resize_image(img, max_width)
+        try:
+            img.save(image_path, optimize=True, quality=quality)
+            return img
+        except Exception:
+            # Không encode lại được định dạng này => giữ nguyên bytes gốc
+            pass
+    
+    with open(image_path, "wb") as img_file:
+        img_file.write(image_bytes)
+    return img
+
+def _to_bgr_array(image):
+    """Chuyển ảnh (đường dẫn, PIL Image hoặc mảng BGR) thành mảng NumPy BGR cho OpenCV"""
+    import cv2
+    import numpy as np
+    from PIL import Image
+    
+    if image is None:
+        return None
+    if isinstance(image, str):
+        return cv2.imread(image)
+    if isinstance(image, Image.Image):
+        return cv2.cvtColor(np.asarray(image.convert('RGB')), cv2.COLOR_RGB2BGR)
+    return image
+
+def _count_thin_lines(profile, fill, max_thickness):
+    """Số đường kẻ trong profile: nhóm hàng (cột) liên tiếp có tỉ lệ điểm tối >= fill và đủ mảnh"""
+    import numpy as np
+    
+    is_line = np.concatenate(([False], profile >= fill, [False]))
+    edges = np.flatnonzero(is_line[1:] != is_line[:-1])
+    thickness = edges[1::2] - edges[::2]
+    return int(np.count_nonzero(thickness <= max_thickness))
+
+def table_prefilter(gray):
+    """Bước lọc nhanh trên ảnh xám thu nhỏ: tìm đường kẻ ngang/dọc dài và mảnh bằng projection profile.
+    
+    Ảnh chụp (nhiều vùng tối, cạnh ngắn) và khung viền đơn lẻ bị loại; chỉ ảnh có đủ
+    đường kẻ của một bảng mới được xử lý tiếp ở độ phân giải đầy đủ.
+    """
+    import cv2
+    import numpy as np
+    
+    height, width = gray.shape[:2]
+    scale = TABLE_PREFILTER_MAX_SIDE / max(height, width)
+    if scale < 1:
+        # INTER_AREA lấy trung bình nên đường kẻ mảnh vẫn còn (nhạt hơn) sau khi thu nhỏ
+        gray = cv2.resize(gray, (max(1, round(width * scale)), max(1, round(height * scale))),
+                          interpolation=cv2.INTER_AREA)
+    
+    # Điểm tối so với nền (nền giấy lấy theo trung vị)
+    dark = gray < np.median(gray) * 0.9
+    if dark.mean() > TABLE_MAX_DARK_RATIO:
+        return False
+    
+    height, width = dark.shape
+    max_thickness = max(2, round(max(height, width) * TABLE_LINE_MAX_THICKNESS))
+    horizontal = _count_thin_lines(dark.mean(axis=1), TABLE_LINE_FILL, max_thickness)
+    vertical = _count_thin_lines(dark.mean(axis=0), TABLE_LINE_FILL, max_thickness)
+    # Bảng có ít nhất 2 hàng (3 đường ngang) hoặc 2 cột (3 đường dọc); một khung viền (2 + 2) thì không
+    return (horizontal >= 3 and vertical >= 2) or (horizontal >= 2 and vertical >= 3) or horizontal >= 4
+
+def _line_positions(line_mask, axis, min_length=0):
+    """Tọa độ các đường kẻ trong mask (giữa mỗi nhóm hàng/cột liên tiếp đủ dài); axis=1: đường ngang"""
+    import numpy as np
+    
+    profile = np.count_nonzero(line_mask, axis=axis)
+    if not profile.any():
+        return []
+    # Đường kẻ của bảng dài gần bằng nhau: lấy mốc là đường dài nhất
+    is_line = np.concatenate(([False], profile >= max(profile.max() * 0.5, min_length), [False]))
+    edges = np.flatnonzero(is_line[1:] != is_line[:-1])
+    return [int(start + end - 1) // 2 for start, end in zip(edges[::2], edges[1::2])]
+
+def find_table_grid(image):
+    """Tìm lưới của bảng trong ảnh: lọc nhanh trên ảnh thu nhỏ, rồi mới dùng hình thái học ở độ phân giải đầy đủ.
+    
+    image: đường dẫn, PIL Image hoặc mảng BGR. Trả về None nếu không phải bảng, ngược lại
+    (ảnh xám, mask đường kẻ, tọa độ y các đường ngang, tọa độ x các đường dọc).
+    """
+    import cv2
+    
+    img = _to_bgr_array(image)
+    if img is None:
+        return None
+    
+    # Chuyển sang grayscale
+    gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY) if img.ndim == 3 else img
+    
+    # Bước 1 (rẻ): phần lớn ảnh không phải bảng dừng ở đây
+    if not table_prefilter(gray):
+        return None
+    
+    # Bước 2: áp dụng threshold để làm nổi bật đường viền
+    thresh = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY_INV + cv2.THRESH_OTSU)[1]
+    
+    # Phát hiện đường ngang và dọc (đặc trưng của bảng)
+    horizontal_kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (40, 1))
+    vertical_kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (1, 40))
+    
+    horizontal_lines = cv2.morphologyEx(thresh, cv2.MORPH_OPEN, horizontal_kernel, iterations=2)
+    vertical_lines = cv2.morphologyEx(thresh, cv2.MORPH_OPEN, vertical_kernel, iterations=2)
+    
+    # Kết hợp đường ngang và dọc
+    table_mask = cv2.add(horizontal_lines, vertical_lines)
+    
+    # Đủ nhiều điểm nằm trên đường kẻ (ngưỡng tỉ lệ theo kích thước ảnh) => là bảng
+    height, width = gray.shape
+    if cv2.countNonZero(table_mask) <= max(100, (width + height) // 2):
+        return None
+    
+    # Đường dọc phải dài ít nhất nửa khoảng giữa các đường ngang (nét chữ to không phải đường kẻ)
+    row_lines = _line_positions(horizontal_lines, 1)
+    min_column_length = (row_lines[-1] - row_lines[0]) * 0.5 if len(row_lines) >= 2 else height * 0.25
+    return gray, table_mask, row_lines, _line_positions(vertical_lines, 0, min_column_length)
+
+def is_table_image(image):
+    """Ảnh có phải là bảng không (không OCR)"""
+    return find_table_grid(image) is not None
+
+def _words_to_text(words):
+    """Ghép các từ (top, left, height, text) của một ô theo thứ tự dòng rồi trái sang phải"""
+    lines = []
+    for word in sorted(words):
+        # Cùng dòng nếu lệch nhau không quá nửa chiều cao chữ
+        if lines and word[0] - lines[-1][0][0] <= max(lines[-1][0][2], word[2]) / 2:
+            lines[-1].append(word)
+        else:
+            lines.append([word])
+    return " ".join(word[3] for line in lines for word in sorted(line, key=lambda w: w[1]))
+
+def ocr_table_cells(gray, table_mask, row_lines, column_lines, language='vie+eng'):
+    """OCR các ô của bảng theo lưới đã phát hiện, một lần gọi Tesseract cho cả bảng.
+    
+    Chỉ OCR vùng bên trong lưới (đường kẻ đã xóa); mỗi từ được xếp vào ô chứa tâm của nó.
+    Trả về danh sách hàng, mỗi hàng là danh sách nội dung ô.
+    """
+    import bisect
+    import pytesseract
+    
+    top, bottom = row_lines[0], row_lines[-1]
+    left, right = column_lines[0], column_lines[-1]
+    
+    # Xóa đường kẻ để Tesseract không đọc nhầm thành ký tự (|, _, ...)
+    region = gray[top:bottom + 1, left:right + 1].copy()
+    region[table_mask[top:bottom + 1, left:right + 1] > 0] = 255
+    
+    data = pytesseract.image_to_data(
+        region, lang=language, config='--psm 11', output_type=pytesseract.Output.DICT
+    )
+    
+    cells = {}
+    for text, conf, x, y, w, h in zip(data['text'], data['conf'], data['left'], data['top'],
+                                      data['width'], data['height']):
+        text = text.strip()
+        if not text or float(conf) < 0:
+            continue
+        row = bisect.bisect_right(row_lines, top + y + h / 2) - 1
+        column = bisect.bisect_right(column_lines, left + x + w / 2) - 1
+        if 0 <= row < len(row_lines) - 1 and 0 <= column < len(column_lines) - 1:
+            cells.setdefault((row, column), []).append((y, x, h, text))
+    
+    return [
+        [_words_to_text(cells.get((row, column), [])) for column in range(len(column_lines) - 1)]
+        for row in range(len(row_lines) - 1)
+    ]
+
+def detect_table_in_image(image, language='vie+eng', raise_errors=False, timer=None):
+    """Phát hiện và trích xuất bảng từ hình ảnh bằng OCR (image: đường dẫn, PIL Image hoặc mảng BGR).
+    
+    Trả về danh sách hàng (mỗi hàng là danh sách nội dung ô) hoặc None nếu không phải bảng
+    (hoặc OCR lỗi; raise_errors=True thì ném lỗi ra). timer: StageTimer đo bước OpenCV/Tesseract.
+    """
+    if not TESSERACT_AVAILABLE:
+        return None
+    
+    try:
+        import pytesseract
+        
+        # Đọc ảnh (ảnh đã giải mã trong bộ nhớ thì dùng luôn)
+        with stage(timer, 'table_detect'):
+            img = _to_bgr_array(image)
+            grid = find_table_grid(img)
+        if grid is None:
+            return None
+        
+        gray, table_mask, row_lines, column_lines = grid
+        with stage(timer, 'tesseract'):
+            if len(row_lines) >= 2 and len(column_lines) >= 2:
+                # Có lưới đầy đủ: OCR theo từng ô
+                rows = ocr_table_cells(gray, table_mask, row_lines, column_lines, language)
+            else:
+                # Bảng không có đường dọc: OCR cả ảnh, chia cột theo khoảng trắng
+                ocr_data = pytesseract.image_to_string(img, lang=language)
+                rows = split_table_lines([line.strip() for line in ocr_data.split('\n') if line.strip()])
+        
+        # Ít nhất có header và 1 row
+        rows = [row for row in rows if any(row)]
+        if len(rows) >= 2:
+            return rows
+        
+        return None
+    except Exception:
+        if raise_errors:
+            raise
+        return None
+
+def ocr_page_image(image, language='vie+eng', raise_errors=False, timer=None):
+    """OCR toàn bộ ảnh của một trang scan, trả về văn bản (chuỗi rỗng nếu OCR lỗi)"""
+    if not TESSERACT_AVAILABLE:
+        return ""
+    
+    try:
+        import pytesseract
+        
+        with stage(timer, 'tesseract_page'):
+            return pytesseract.image_to_string(image, lang=language)
+    except Exception:
+        if raise_errors:
+            raise
+        return ""
+
+def cached_ocr_task(task, ocr_cache, key, fallback=None):
+    """Bọc hàm OCR (detect_table_in_image, ocr_page_image) để lưu kết quả vào ocr_cache.
+    
+    OCR lỗi (vd: chưa cài Tesseract) trả về fallback và không được lưu, để lần sau OCR lại.
+    """
+    def run(image, language='vie+eng'):
+        try:
+            result = task(image, language, raise_errors=True)
+        except Exception:
+            return fallback
+        ocr_cache.put(key, result)
+        return result
+    return run
+
+def set_ocr_threads(threads_per_worker):
+    """Số thread OpenMP của mỗi tiến trình tesseract (OMP_THREAD_LIMIT).
+    
+    Gọi một lần khi khởi động, trước khi OCR: biến môi trường dùng chung cho mọi thread
+    của tiến trình (và được tiến trình con kế thừa).
+    """
+    os.environ['OMP_THREAD_LIMIT'] = str(threads_per_worker)
+
+class OcrPool:
+    """Chạy OCR (mặc định detect_table_in_image) song song trên nhiều thread, giới hạn số ảnh chờ trong hàng đợi.
+    
+    Mỗi lần OCR là một tiến trình tesseract riêng nên các thread chạy song song thật sự.
+    """
+    
+    def __init__(self, workers=DEFAULT_OCR_WORKERS, max_pending=None):
+        # OpenCV/pytesseract được import trong tác vụ OCR đầu tiên: PDF không có ảnh
+        # hay trang scan thì không phải nạp chúng (và pandas)
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='ocr')
+        self._slots = threading.BoundedSemaphore(max_pending or workers * 2)
+        self._lock = threading.Lock()
+        self._pending = 0
+        self.max_queue_depth = 0
+        self.latencies = []
+    
+    def submit(self, image, language='vie+eng', task=None):
+        """Đưa ảnh (đường dẫn hoặc ảnh đã giải mã) vào hàng đợi OCR (chặn nếu hàng đợi đầy). Trả về Future
+        
+        task: hàm OCR nhận (ảnh, ngôn ngữ), mặc định detect_table_in_image.
+        """
+        self._slots.acquire()
+        with self._lock:
+            self._pending += 1
+            self.max_queue_depth = max(self.max_queue_depth, self._pending)
+        try:
+            return self._executor.submit(self._run, task or detect_table_in_image, image, language)
+        except Exception:
+            self._done()
+            raise
+    
+    def _run(self, task, image, language):
+        start = time.perf_counter()
+        try:
+            return task(image, language)
+        finally:
+            with self._lock:
+                self.latencies.append(time.perf_counter() - start)
+            self._done()
+    
+    def _done(self):
+        with self._lock:
+            self._pending -= 1
+        self._slots.release()
+    
+    def close(self):
+        self._executor.shutdown(wait=True)
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc):
+        self.close()
+
+def ocr_stats(latencies, max_queue_depth):
+    """Thống kê OCR đưa vào stats: số ảnh, độ trễ trung bình/lớn nhất (ms), độ sâu hàng đợi"""
+    if not latencies:
+        return {}
+    return {
+        'ocr_images': len(latencies),
+        'ocr_ms_avg': round(sum(latencies) / len(latencies) * 1000, 1),
+        'ocr_ms_max': round(max(latencies) * 1000, 1),
+        'ocr_queue_max': max_queue_depth
+    }
+
+def split_table_lines(lines):
+    """Tách các dòng văn bản thành ô theo khoảng trắng (số cột theo dòng đầu tiên)"""
+    if not lines:
+        return []
+    
+    # Header
+    header_parts = [p.strip() for p in lines[0].split() if p.strip()]
+    if not header_parts:
+        return []
+    rows = [header_parts]
+    
+    # Rows
+    for line in lines[1:]:
+        row_parts = [p.strip() for p in line.split() if p.strip()]
+        if len(row_parts) > 0:
+            # Đảm bảo số cột bằng header
+            while len(row_parts) < len(header_parts):
+                row_parts.append("")
+            rows.append(row_parts[:len(header_parts)])
+    
+    return rows
+
+def rows_to_table(rows, caption=None):
+    """Chuyển đổi các hàng ô (hàng đầu là header) thành bảng (Table); None nếu ít hơn 2 hàng có nội dung"""
+    rows = [[clean_cell(cell) for cell in row] for row in rows]
+    rows = [row for row in rows if any(row)]
+    if len(rows) < 2:
+        return None
+    return Table(rows, caption)
+
+class ImageStore:
+    """Kho ảnh đã xử lý dùng chung cho cả lô file, khóa theo hash nội dung.
+    
+    Ảnh giống nhau (cùng bytes, cùng tùy chọn) chỉ được tối ưu/OCR một lần; các
+    lần sau ảnh được hard link (hoặc sao chép) từ kho sang thư mục ảnh của file.
+    Kho nằm trên đĩa nên dùng chung được giữa các tiến trình xử lý trang.
+    """
+    
+    def __init__(self, root):
+        self.root = root
+        os.makedirs(root, exist_ok=True)
+    
+    @staticmethod
+    def make_key(image_bytes, optimize_imgs, enable_ocr, ocr_lang):
+        digest = hashlib.sha256(image_bytes)
+        digest.update(f"|{optimize_imgs}|{enable_ocr}|{ocr_lang}".encode('utf-8'))
+        return digest.hexdigest()
+    
+    def _paths(self, key):
+        return os.path.join(self.root, key), os.path.join(self.root, f"{key}.json")
+    
+    def fetch(self, key, image_path):
+        """Đưa ảnh đã xử lý vào image_path. Trả về (True, table_data) nếu có trong kho"""
+        blob_path, meta_path = self._paths(key)
+        try:
+            with open(meta_path, encoding='utf-8') as f:
+                table_data = json.load(f)['table_data']
+            if os.path.exists(image_path):
+                os.remove(image_path)
+            try:
+                os.link(blob_path, image_path)
+            except OSError:
+                shutil.copyfile(blob_path, image_path)
+        except (OSError, ValueError, KeyError):
+            return False, None
+        return True, table_data
+    
+    def store(self, key, image_path, table_data):
+        """Lưu ảnh đã xử lý và kết quả nhận diện bảng vào kho"""
+        blob_path, meta_path = self._paths(key)
+        tmp_suffix = f".tmp-{os.getpid()}-{threading.get_ident()}"
+        try:
+            shutil.copyfile(image_path, blob_path + tmp_suffix)
+            os.replace(blob_path + tmp_suffix, blob_path)
+            # Ghi meta sau cùng: có meta nghĩa là ảnh đã đầy đủ
+            with open(meta_path + tmp_suffix, 'w', encoding='utf-8') as f:
+                json.dump({'table_data': table_data}, f, ensure_ascii=False)
+            os.replace(meta_path + tmp_suffix, meta_path)
+        except OSError:
+            pass
+
+def read_source(source):
+    """Chuẩn hóa nguồn tài liệu: giữ nguyên đường dẫn, đọc file-like (upload, BytesIO) thành bytes"""
+    if isinstance(source, (str, os.PathLike)):
+        return source
+    if hasattr(source, 'read'):
+        if hasattr(source, 'seek'):
+            source.seek(0)
+        return source.read()
+    return bytes(source)
+
+def open_pdf(source):
+    """Mở PDF từ đường dẫn, bytes hoặc file-like mà không ghi ra đĩa"""
+    import fitz  # PyMuPDF
+    
+    source = read_source(source)
+    if isinstance(source, bytes):
+        return fitz.open(stream=source, filetype="pdf")
+    return fitz.open(source)
+
+def find_first_image_occurrences(doc):
+    """Vị trí (trang, thứ tự) xuất hiện đầu tiên của mỗi ảnh (xref) trong PDF"""
+    first_occurrence = {}
+    for page_num in range(len(doc)):
+        for img_index, img in enumerate(doc[page_num].get_images()):
+            first_occurrence.setdefault(img[0], (page_num, img_index))
+    return first_occurrence
+
+def extract_page_images(doc, page_num, output_folder, optimize_imgs=True, enable_ocr=True, ocr_lang='vie+eng', ocr_pool=None,
+                        seen_xrefs=None, first_occurrence=None, image_store=None, ocr_cache=None, timer=None):
+    """Trích xuất các ảnh của một trang PDF, bỏ qua ảnh (xref) đã xử lý.
+    
+    Trả về (ảnh mới, các xref của trang theo thứ tự). Khi dùng ocr_pool, table_data
+    của ảnh mới có thể là Future - gọi finish_images để lấy kết quả.
+    ocr_cache: kết quả nhận diện bảng của ảnh đã gặp ở lần chạy trước được dùng lại
+    (ảnh có 'ocr_cache' = 'hit' hoặc 'miss'), kết quả mới được lưu vào cache.
+    timer: StageTimer đo từng bước (trích xuất, tối ưu ảnh, OpenCV, Tesseract).
+    """
+    images = []
+    xrefs = []
+    
+    for img_index, img in enumerate(doc[page_num].get_images()):
+        xref = img[0]
+        xrefs.append(xref)
+        
+        # Ảnh lặp lại (logo, header...) chỉ xử lý ở lần xuất hiện đầu tiên
+        if seen_xrefs is not None:
+            if xref in seen_xrefs:
+                continue
+            seen_xrefs.add(xref)
+        if first_occurrence is not None and first_occurrence.get(xref, (page_num, img_index)) != (page_num, img_index):
+            continue
+        
+        with stage(timer, 'extract_image') as measure:
+            base_image = doc.extract_image(xref)
+            measure['bytes'] = len(base_image["image"])
+        image_bytes = base_image["image"]
+        image_ext = base_image["ext"]
+        
+        image_name = f"image_page{page_num + 1}_{img_index + 1}.{image_ext}"
+        image_path = os.path.join(output_folder, image_name)
+        
+        # Ảnh đã xử lý ở file/tiến trình khác trong cùng lô => dùng lại
+        store_key = None
+        if image_store is not None:
+            store_key = ImageStore.make_key(image_bytes, optimize_imgs, enable_ocr, ocr_lang)
+            found, table_data = image_store.fetch(store_key, image_path)
+            if found:
+                images.append({
+                    'page': page_num,
+                    'xref': xref,
+                    'path': image_path,
+                    'name': image_name,
+                    'table_data': table_data
+                })
+                continue
+        
+        # Ảnh đã OCR ở lần chạy trước => không cần giải mã và OCR lại
+        cache_status = None
+        table_data = None
+        run_ocr = enable_ocr and TESSERACT_AVAILABLE
+        detect = partial(detect_table_in_image, timer=timer)
+        if run_ocr and ocr_cache is not None:
+            ocr_key = ocr_cache.make_key(
+                image_bytes, 'table', ocr_lang, optimize=optimize_imgs, version=OCR_DETECTOR_VERSION
+            )
+            with stage(timer, 'ocr_cache'):
+                found, table_data = ocr_cache.get(ocr_key)
+            cache_status = 'hit' if found else 'miss'
+            run_ocr = not found
+            detect = cached_ocr_task(detect, ocr_cache, ocr_key)
+        
+        # Giải mã một lần, tối ưu trong bộ nhớ rồi ghi file đúng một lần
+        with stage(timer, 'save_image', len(image_bytes)):
+            decoded = save_image(image_bytes, image_path, optimize_imgs, decode=run_ocr)
+        
+        # Thử phát hiện bảng trong ảnh nếu OCR được bật (dùng ảnh đã giải mã)
+        # (qua pool thì chạy song song với việc trích xuất các ảnh tiếp theo)
+        if run_ocr and decoded is not None:
+            if ocr_pool is not None:
+                table_data = ocr_pool.submit(decoded, ocr_lang, detect)
+            else:
+                table_data = detect(decoded, ocr_lang)
+        
+        images.append({
+            'page': page_num,
+            'xref': xref,
+            'path': image_path,
+            'name': image_name,
+            'table_data': table_data,
+            'store_key': store_key,
+            'ocr_cache': cache_status
+        })
+    
+    return images, xrefs
+
+def is_scanned_page(page, blocks):
+    """Trang scan: (gần như) không có lớp văn bản (các khối của trang) nhưng có ảnh phủ gần hết trang"""
+    if not page.get_images() or len(render_markdown(blocks).strip()) >= SCANNED_TEXT_MIN_CHARS:
+        return False
+    
+    page_area = abs(page.rect)
+    for info in page.get_image_info():
+        x0, y0, x1, y1 = info['bbox']
+        if page_area and (x1 - x0) * (y1 - y0) / page_area >= SCANNED_IMAGE_MIN_COVERAGE:
+            return True
+    return False
+
+def render_page_image(page, dpi=SCANNED_OCR_DPI):
+    """Ảnh xám của cả trang PDF ở độ phân giải dpi (để OCR trang scan)"""
+    import fitz  # PyMuPDF
+    from PIL import Image
+    
+    pix = page.get_pixmap(dpi=dpi, colorspace=fitz.csGRAY, alpha=False)
+    return Image.frombytes("L", (pix.width, pix.height), pix.samples)
+
+def images_ready(images):
+    """Kiểm tra OCR của các ảnh đã xong chưa"""
+    return all(not isinstance(img['table_data'], Future) or img['table_data'].done() for img in images)
+
+def finish_images(images, image_store=None):
+    """Chờ kết quả OCR, đánh dấu ảnh là bảng và lưu ảnh vào kho dùng chung"""
+    for img in images:
+        if isinstance(img['table_data'], Future):
+            img['table_data'] = img['table_data'].result()
+        img['is_table'] = img['table_data'] is not None
+        store_key = img.pop('store_key', None)
+        if store_key is not None:
+            image_store.store(store_key, img['path'], img['table_data'])
+    return images
+
+def extract_images_from_pdf(pdf_source, output_folder, optimize_imgs=True, enable_ocr=True, ocr_lang='vie+eng', pages=None, ocr_pool=None,
+                            first_occurrence=None, image_store=None, ocr_cache=None, timer=None):
+    """Trích xuất hình ảnh từ PDF, mỗi ảnh (xref) chỉ xử lý và lưu một lần.
+    
+    pdf_source: đường dẫn, bytes, file-like hoặc tài liệu fitz đã mở (không bị đóng);
+    pages: các trang cần xử lý (mặc định tất cả); ocr_pool: OCR song song;
+    first_occurrence: chỉ xử lý ảnh có lần xuất hiện đầu tiên nằm trong pages
+    (dùng khi chia trang cho nhiều tiến trình); image_store: kho ảnh dùng chung cả lô;
+    ocr_cache: cache kết quả OCR trên đĩa (OcrCache); timer: StageTimer đo từng bước.
+    """
+    import fitz  # PyMuPDF
+    
+    owns_doc = not isinstance(pdf_source, fitz.Document)
+    doc = open_pdf(pdf_source) if owns_doc else pdf_source
+    images = []
+    seen_xrefs = set()
+    
+    if pages is None:
+        pages = range(len(doc))
+    
+    for page_num in pages:
+        page_images, _ = extract_page_images(
+            doc, page_num, output_folder, optimize_imgs, enable_ocr, ocr_lang,
+            ocr_pool, seen_xrefs, first_occurrence, image_store, ocr_cache, timer
+        )
+        images.extend(page_images)
+    
+    if owns_doc:
+        doc.close()
+    return finish_images(images, image_store)
+
+def find_page_tables(page):
+    """Bảng kẻ bằng đường vector trong trang PDF (PyMuPDF find_tables), không cần OCR.
+    
+    Trả về danh sách (bbox, Table) theo thứ tự từ trên xuống.
+    """
+    # Trang không có hình vẽ vector thì không có đường kẻ bảng (get_drawings rẻ hơn find_tables nhiều)
+    if not page.get_drawings():
+        return []
+    
+    tables = []
+    for table in page.find_tables().tables:
+        table_node = rows_to_table(table.extract())
+        if table_node is not None:
+            tables.append((tuple(table.bbox), table_node))
+    return sorted(tables, key=lambda table: table[0][1])
+
+def text_to_blocks(text):
+    """Các khối (tiêu đề, đoạn văn) cho văn bản thô của PDF (tiêu đề đoán theo độ dài dòng)"""
+    blocks = []
+    
+    # Phân tích cấu trúc cơ bản
+    for line in text.split('\n'):
+        line = line.strip()
+        if line:
+            # Phát hiện tiêu đề (dòng ngắn, in hoa hoặc có font size lớn)
+            if len(line) < 100 and (line.isupper() or len(line.split()) <= 10):
+                blocks.append(Heading(2, line))
+            else:
+                blocks.append(Paragraph([Span(line)]))
+    
+    return blocks
+
+def page_text_to_blocks(page, tables=None):
+    """Các khối cho phần văn bản của một trang PDF.
+    
+    tables: bảng (bbox, Table) từ find_page_tables - chữ nằm trong bảng được
+    thay bằng bảng đặt đúng vị trí trên trang.
+    """
+    # Lấy văn bản
+    if not tables:
+        return text_to_blocks(page.get_text())
+    
+    blocks = []
+    pending = list(tables)
+    for x0, y0, x1, y1, text, _, block_type in page.get_text("blocks"):
+        if block_type != 0:
+            continue
+        center_x, center_y = (x0 + x1) / 2, (y0 + y1) / 2
+        table = next((
+            table for table in tables
+            if table[0][0] <= center_x <= table[0][2] and table[0][1] <= center_y <= table[0][3]
+        ), None)
+        # Bảng nằm phía trên khối chữ (hoặc chứa khối chữ) được đặt trước khối đó
+        while pending and (pending[0] is table or pending[0][0][3] <= y0):
+            blocks.append(pending.pop(0)[1])
+        if table is None:
+            blocks.extend(text_to_blocks(text))
+    
+    blocks.extend(table_node for _, table_node in pending)
+    return blocks
+
+def iter_pdf_pages(pdf_source, output_folder, start, end, optimize_imgs=True, enable_ocr=True, ocr_lang='vie+eng',
+                   ocr_workers=DEFAULT_OCR_WORKERS, first_occurrence=None, image_store=None,
+                   extract_tables=True, ocr_scanned=True, ocr_dpi=SCANNED_OCR_DPI, ocr_cache=None,
+                   lookahead=PAGE_LOOKAHEAD):
+    """Xử lý lần lượt các trang [start, end) của PDF, yield từng trang theo thứ tự.
+    
+    pdf_source: đường dẫn, bytes, file-like hoặc tài liệu fitz đã mở (không bị đóng);
+    extract_tables: nhận diện bảng kẻ bằng đường vector (find_page_tables);
+    ocr_scanned: trang scan (không có lớp văn bản) được chuyển thành ảnh ở ocr_dpi và OCR cả trang;
+    ocr_cache: cache kết quả OCR trên đĩa (OcrCache), tra trước khi OCR ảnh/trang scan.
+    Mỗi trang là dict: page, blocks (khối văn bản và bảng, xem document.py), tables (số bảng vector), ocr_page
+    (trang đã OCR), xrefs (ảnh của trang), images (ảnh mới xử lý ở trang này), ocr_latencies,
+    ocr_queue_max, ocr_cache_hits, ocr_cache_misses, stages (mẫu thời gian từng bước, xem
+    profiling.py). OCR của tối đa `lookahead` trang chạy trước trong pool (trang scan chỉ được
+    chuyển thành ảnh khi pool còn chỗ) nên bộ nhớ không tăng theo số trang.
+    """
+    import fitz  # PyMuPDF
+    
+    owns_doc = not isinstance(pdf_source, fitz.Document)
+    doc = open_pdf(pdf_source) if owns_doc else pdf_source
+    ocr_pool = None
+    ocr_scanned = ocr_scanned and TESSERACT_AVAILABLE
+    if (enable_ocr or ocr_scanned) and TESSERACT_AVAILABLE and ocr_workers > 0:
+        ocr_pool = OcrPool(ocr_workers)
+    seen_xrefs = set()
+    pending = deque()
+    reported_latencies = 0
+    timer = StageTimer()
+    
+    def page_ready(page):
+        ocr_text = page['ocr_text']
+        return images_ready(page['images']) and (not isinstance(ocr_text, Future) or ocr_text.done())
+    
+    def finish_page(page):
+        nonlocal reported_latencies
+        finish_images(page['images'], image_store)
+        ocr_text = page.pop('ocr_text')
+        if isinstance(ocr_text, Future):
+            ocr_text = ocr_text.result()
+        cache_lookups = [page.pop('ocr_cache')] + [img.get('ocr_cache') for img in page['images']]
+        page['ocr_cache_hits'] = cache_lookups.count('hit')
+        page['ocr_cache_misses'] = cache_lookups.count('miss')
+        if ocr_text and ocr_text.strip():
+            page['blocks'] = text_to_blocks(ocr_text)
+        if ocr_pool is not None:
+            latencies = ocr_pool.latencies[reported_latencies:]
+            reported_latencies += len(latencies)
+            page['ocr_latencies'] = latencies
+            page['ocr_queue_max'] = ocr_pool.max_queue_depth
+        # OCR của trang đã xong => thời gian của nó đã được ghi vào timer
+        page['stages'] = timer.drain()
+        return page
+    
+    try:
+        for page_num in range(start, end):
+            page = doc[page_num]
+            tables = []
+            if extract_tables:
+                with stage(timer, 'find_tables'):
+                    tables = find_page_tables(page)
+            with stage(timer, 'get_text'):
+                blocks = page_text_to_blocks(page, tables)
+            
+            # Trang scan: OCR cả trang (chờ nếu pool đầy => chỉ giữ vài trang ảnh trong bộ nhớ)
+            ocr_text = None
+            cache_status = None
+            scanned = ocr_scanned and is_scanned_page(page, blocks)
+            if scanned:
+                with stage(timer, 'render_page'):
+                    page_image = render_page_image(page, ocr_dpi)
+                found = False
+                ocr_task = partial(ocr_page_image, timer=timer)
+                if ocr_cache is not None:
+                    # Trang scan giống hệt (cùng ảnh, cùng dpi) đã OCR ở lần chạy trước
+                    with stage(timer, 'ocr_cache'):
+                        ocr_key = ocr_cache.make_key(page_image.tobytes(), 'page', ocr_lang,
+                                                     size=page_image.size, version=OCR_DETECTOR_VERSION)
+                        found, ocr_text = ocr_cache.get(ocr_key)
+                    cache_status = 'hit' if found else 'miss'
+                    ocr_task = cached_ocr_task(ocr_task, ocr_cache, ocr_key, fallback="")
+                if not found and ocr_pool is not None:
+                    ocr_text = ocr_pool.submit(page_image, ocr_lang, ocr_task)
+                elif not found:
+                    ocr_text = ocr_task(page_image, ocr_lang)
+                del page_image
+            
+            # Ảnh scan của trang đã được OCR cả trang => không tìm bảng trong ảnh nữa
+            images, xrefs = extract_page_images(
+                doc, page_num, output_folder, optimize_imgs, enable_ocr and not scanned, ocr_lang,
+                ocr_pool, seen_xrefs, first_occurrence, image_store, ocr_cache, timer
+            )
+            pending.append({
+                'page': page_num,
+                'blocks': blocks,
+                'tables': len(tables),
+                'ocr_text': ocr_text,
+                'ocr_cache': cache_status,
+                'ocr_page': scanned,
+                'xrefs': xrefs,
+                'images': images,
+                'ocr_latencies': [],
+                'ocr_queue_max': 0,
+                'ocr_cache_hits': 0,
+                'ocr_cache_misses': 0,
+                'stages': {}
+            })
+            
+            # Trả trang cũ nhất khi OCR của nó đã xong hoặc đã đi trước quá xa
+            while pending and (len(pending) > lookahead or page_ready(pending[0])):
+                yield finish_page(pending.popleft())
+        
+        while pending:
+            yield finish_page(pending.popleft())
+    finally:
+        if ocr_pool is not None:
+            ocr_pool.close()
+        if owns_doc:
+            doc.close()
+
+# Tài liệu PDF đang mở trong tiến trình con, dùng chung cho mọi khoảng trang
+_worker_doc = None
+
+def _init_pdf_worker(pdf_source):
+    """Mở PDF một lần khi tiến trình con khởi động (bytes chỉ gửi sang một lần mỗi tiến trình)"""
+    global _worker_doc
+    _worker_doc = open_pdf(pdf_source)
+
+def _pdf_pages_worker(args):
+    """Chạy iter_pdf_pages trong tiến trình con (phải ở mức module để pickle được)"""
+    return list(iter_pdf_pages(_worker_doc, *args))
+
+def split_page_ranges(total_pages, workers):
+    """Chia các trang thành những khoảng liên tiếp (nhiều khoảng hơn số worker để cân tải)"""
+    chunk_count = min(total_pages, workers * 4)
+    bounds = [total_pages * i // chunk_count for i in range(chunk_count + 1)]
+    return [(bounds[i], bounds[i + 1]) for i in range(chunk_count)]
+
+def image_to_blocks(img):
+    """Các khối cho một ảnh: bảng OCR nếu nhận diện được, ngược lại là ảnh"""
+    # Nếu ảnh là bảng, hiển thị bảng thay vì ảnh
+    if img.get('is_table') and img.get('table_data'):
+        table_node = rows_to_table(img['table_data'], OCR_TABLE_CAPTION)
+        if table_node is not None:
+            return [table_node]
+    return [Image(img['name'])]
+
+def iter_pdf_document(pdf_source, output_folder, optimize_imgs=True, enable_ocr=True, ocr_lang='vie+eng', workers=1,
+                      ocr_workers=DEFAULT_OCR_WORKERS, image_store=None, extract_tables=True,
+                      ocr_scanned=True, ocr_dpi=SCANNED_OCR_DPI, ocr_cache=None):
+    """Chuyển đổi PDF sang mô hình tài liệu (document.py) theo từng trang.
+    
+    pdf_source: đường dẫn, bytes hoặc file-like (vd: file upload) - không cần ghi ra đĩa.
+    extract_tables: bảng kẻ bằng đường vector được nhận diện thẳng (không cần OCR);
+    OCR chỉ dùng cho bảng dạng ảnh.
+    ocr_scanned: trang scan (không có lớp văn bản) được OCR cả trang ở độ phân giải ocr_dpi.
+    ocr_cache: cache kết quả OCR trên đĩa (OcrCache) dùng chung giữa các lần chạy.
+    Yield (các khối của trang, thống kê của trang) theo đúng thứ tự trang ngay khi trang
+    xử lý xong; các trang trừ trang cuối kết thúc bằng PageBreak.
+    """
+    # Tạo thư mục cho hình ảnh
+    os.makedirs(output_folder, exist_ok=True)
+    
+    timer = StageTimer()
+    with stage(timer, 'open_pdf'):
+        pdf_source = read_source(pdf_source)
+        doc = open_pdf(pdf_source)
+        total_pages = len(doc)
+        # Ảnh lặp lại trên nhiều trang chỉ được xử lý ở lần xuất hiện đầu tiên
+        first_occurrence = find_first_image_occurrences(doc)
+    
+    ranges = [(0, total_pages)]
+    workers = max(1, min(workers, total_pages))
+    if workers > 1:
+        ranges = split_page_ranges(total_pages, workers)
+    tasks = [
+        (output_folder, start, end, optimize_imgs, enable_ocr, ocr_lang, ocr_workers,
+         first_occurrence, image_store, extract_tables, ocr_scanned, ocr_dpi, ocr_cache)
+        for start, end in ranges
+    ]
+    
+    executor = None
+    if workers == 1:
+        # Dùng luôn tài liệu đã mở cho cả văn bản và hình ảnh
+        pages = iter_pdf_pages(doc, *tasks[0])
+    else:
+        doc.close()
+        # Mỗi tiến trình mở PDF một lần (từ đường dẫn hoặc bytes); executor.map trả kết quả đúng thứ tự trang
+        # "spawn" an toàn cho tiến trình nhiều thread (Streamlit) và chạy được trên Windows/exe
+        executor = ProcessPoolExecutor(
+            max_workers=workers, mp_context=multiprocessing.get_context('spawn'),
+            initializer=_init_pdf_worker, initargs=(pdf_source,)
+        )
+        pages = (page for range_pages in executor.map(_pdf_pages_worker, tasks) for page in range_pages)
+    
+    image_blocks = {}
+    try:
+        for page in pages:
+            for img in page['images']:
+                image_blocks[img['xref']] = image_to_blocks(img)
+            
+            blocks = list(page['blocks'])
+            
+            # Thêm hình ảnh từ trang này (ảnh lặp lại trỏ về cùng một file)
+            image_refs = 0
+            for xref in page['xrefs']:
+                if xref in image_blocks:
+                    blocks.extend(image_blocks[xref])
+                    image_refs += 1
+            
+            # Phân cách trang
+            if page['page'] < total_pages - 1:
+                blocks.append(PageBreak())
+            
+            yield blocks, {
+                'page': page['page'],
+                'pages': total_pages,
+                'images': len(page['images']),
+                'tables': page['tables'] + sum(1 for img in page['images'] if img.get('is_table', False)),
+                'ocr_page': page['ocr_page'],
+                'image_refs': image_refs,
+                'ocr_latencies': page['ocr_latencies'],
+                'ocr_queue_max': page['ocr_queue_max'],
+                'ocr_cache_hits': page['ocr_cache_hits'],
+                'ocr_cache_misses': page['ocr_cache_misses'],
+                'stages': merge_samples([page['stages'], timer.drain()])
+            }
+    finally:
+        if executor is not None:
+            executor.shutdown(wait=True, cancel_futures=True)
+        else:
+            doc.close()
+
+def iter_pdf_markdown(pdf_source, output_folder, image_path_prefix='', optimize_imgs=True, enable_ocr=True, ocr_lang='vie+eng', workers=1,
+                      ocr_workers=DEFAULT_OCR_WORKERS, image_store=None, extract_tables=True,
+                      ocr_scanned=True, ocr_dpi=SCANNED_OCR_DPI, ocr_cache=None):
+    """Chuyển đổi PDF sang Markdown theo từng trang (tham số như iter_pdf_document).
+    
+    Yield (markdown của trang, thống kê của trang) theo đúng thứ tự trang ngay khi
+    trang xử lý xong, để giao diện cập nhật tiến độ và dòng lệnh ghi thẳng ra file.
+    Ghép các đoạn lại cho ra đúng kết quả của pdf_to_markdown.
+    """
+    for blocks, page_stats in iter_pdf_document(
+        pdf_source, output_folder, optimize_imgs, enable_ocr, ocr_lang, workers, ocr_workers,
+        image_store, extract_tables, ocr_scanned, ocr_dpi, ocr_cache
+    ):
+        yield render_markdown(blocks, image_path_prefix), page_stats
+
+def collect_pdf_stats(page_stats_list, total_pages=None):
+    """Gộp thống kê từng trang (từ iter_pdf_document) thành stats của cả file"""
+    if total_pages is None:
+        total_pages = page_stats_list[0]['pages'] if page_stats_list else 0
+    
+    images = sum(page_stats['images'] for page_stats in page_stats_list)
+    image_refs = sum(page_stats['image_refs'] for page_stats in page_stats_list)
+    stats = {
+        'pages': total_pages,
+        'images': images,
+        'tables': sum(page_stats['tables'] for page_stats in page_stats_list)
+    }
+    if image_refs > images:
+        stats['duplicate_images'] = image_refs - images
+    ocr_pages = sum(1 for page_stats in page_stats_list if page_stats.get('ocr_page'))
+    if ocr_pages:
+        stats['ocr_pages'] = ocr_pages
+    stats.update(ocr_stats(
+        [latency for page_stats in page_stats_list for latency in page_stats['ocr_latencies']],
+        max((page_stats['ocr_queue_max'] for page_stats in page_stats_list), default=0)
+    ))
+    cache_hits = sum(page_stats.get('ocr_cache_hits', 0) for page_stats in page_stats_list)
+    cache_lookups = cache_hits + sum(page_stats.get('ocr_cache_misses', 0) for page_stats in page_stats_list)
+    if cache_lookups:
+        stats['ocr_cache_hits'] = cache_hits
+        stats['ocr_cache_hit_rate'] = round(cache_hits / cache_lookups, 3)
+    stats['stages'] = summarize_samples(merge_samples(page_stats.get('stages') for page_stats in page_stats_list))
+    return stats
+
+def pdf_to_document(pdf_source, output_folder, optimize_imgs=True, enable_ocr=True, ocr_lang='vie+eng', workers=1,
+                    ocr_workers=DEFAULT_OCR_WORKERS, image_store=None, extract_tables=True,
+                    ocr_scanned=True, ocr_dpi=SCANNED_OCR_DPI, ocr_cache=None):
+    """Chuyển đổi PDF (đường dẫn, bytes hoặc file-like) sang Document (workers > 1: xử lý song song theo khoảng trang)"""
+    blocks = []
+    page_stats_list = []
+    
+    for page_blocks, page_stats in iter_pdf_document(
+        pdf_source, output_folder, optimize_imgs, enable_ocr, ocr_lang, workers, ocr_workers,
+        image_store, extract_tables, ocr_scanned, ocr_dpi, ocr_cache
+    ):
+        blocks.extend(page_blocks)
+        page_stats_list.append(page_stats)
+    
+    return Document(blocks), collect_pdf_stats(page_stats_list)
+
+def pdf_to_markdown(pdf_source, output_folder, image_path_prefix='', optimize_imgs=True, enable_ocr=True, ocr_lang='vie+eng', workers=1,
+                    ocr_workers=DEFAULT_OCR_WORKERS, image_store=None, extract_tables=True,
+                    ocr_scanned=True, ocr_dpi=SCANNED_OCR_DPI, ocr_cache=None):
+    """Chuyển đổi PDF (đường dẫn, bytes hoặc file-like) sang Markdown (workers > 1: xử lý song song theo khoảng trang)"""
+    document, stats = pdf_to_document(
+        pdf_source, output_folder, optimize_imgs, enable_ocr, ocr_lang, workers, ocr_workers,
+        image_store, extract_tables, ocr_scanned, ocr_dpi, ocr_cache
+    )
+    return render_markdown(document.blocks, image_path_prefix), stats
+
+def open_docx(source):
+    """Mở gói ZIP của Word từ đường dẫn, bytes hoặc file-like mà không ghi ra đĩa"""
+    source = read_source(source)
+    if isinstance(source, bytes):
+        source = io.BytesIO(source)
+    return zipfile.ZipFile(source)
+
+def extract_images_from_docx(docx_source, output_folder, timer=None):
+    """Trích xuất hình ảnh từ Word (đường dẫn, bytes, file-like hoặc gói ZIP đã mở)"""
+    package = docx_source if isinstance(docx_source, zipfile.ZipFile) else open_docx(docx_source)
+    images = []
+    
+    os.makedirs(output_folder, exist_ok=True)
+    
+    # Trích xuất hình ảnh từ relationships, chép thẳng từ gói ZIP ra file
+    try:
+        for target, part_name in iter_image_parts(package, find_document_part(package)):
+            try:
+                info = package.getinfo(part_name)
+            except KeyError:
+                continue
+            image_ext = target.split('.')[-1]
+            image_name = f"image_{len(images) + 1}.{image_ext}"
+            image_path = os.path.join(output_folder, image_name)
+            
+            with stage(timer, 'save_image', info.file_size), package.open(info) as src, open(image_path, "wb") as img_file:
+                shutil.copyfileobj(src, img_file)
+            
+            images.append({
+                'path': image_path,
+                'name': image_name
+            })
+    finally:
+        if package is not docx_source:
+            package.close()
+    
+    return images
+
+def iter_docx_blocks(docx_source, output_folder, stats=None):
+    """Chuyển đổi Word sang mô hình tài liệu theo từng khối (đoạn văn, bảng) khi đọc document.xml dạng luồng.
+    
+    Yield danh sách khối (document.py) của mỗi phần tử trong body. stats (dict, nếu có) được
+    điền số đoạn văn, ảnh, bảng và thời gian từng bước khi duyệt xong.
+    """
+    timer = StageTimer()
+    with stage(timer, 'open_docx'):
+        package = open_docx(docx_source)
+    try:
+        document_part = find_document_part(package)
+        style_names, default_style = read_paragraph_styles(package, document_part)
+        
+        # Tạo thư mục cho hình ảnh
+        os.makedirs(output_folder, exist_ok=True)
+        
+        # Trích xuất hình ảnh
+        images = extract_images_from_docx(package, output_folder, timer)
+        image_index = 0
+        paragraph_count = 0
+        table_count = 0
+        
+        with package.open(document_part) as document_xml:
+            element_start = time.perf_counter()
+            for block in iter_body_blocks(document_xml):
+                blocks = []
+                if block['type'] == 'paragraph':
+                    paragraph_count += 1
+                    text = block['text'].strip()
+                    
+                    if text:
+                        # Xác định style
+                        style_id = block['style_id']
+                        style = style_names.get(style_id, default_style) if style_id else default_style
+                        level = next((level for level in range(1, 7) if f'heading {level}' in style), None)
+                        
+                        if level is not None:
+                            blocks.append(Heading(level, text))
+                        else:
+                            blocks.append(Paragraph([Span(*run) for run in block['runs']]))
+                    
+                    # Kiểm tra xem paragraph có chứa hình ảnh không
+                    if block['has_image']:
+                        if image_index < len(images):
+                            blocks.append(Image(images[image_index]['name']))
+                            image_index += 1
+                
+                else:
+                    table_count += 1
+                    blocks.append(Table([[clean_cell(cell) for cell in row] for row in block['rows']]))
+                
+                timer.add(block['type'], time.perf_counter() - element_start)
+                if blocks:
+                    yield blocks
+                element_start = time.perf_counter()
+    finally:
+        package.close()
+    
+    if stats is not None:
+        stats.update({
+            'paragraphs': paragraph_count,
+            'images': len(images),
+            'tables': table_count,
+            'stages': summarize_samples(timer.drain()),
+        })
+
+def iter_docx_markdown(docx_source, output_folder, image_path_prefix='', stats=None):
+    """Chuyển đổi Word sang Markdown theo từng khối (xem iter_docx_blocks)"""
+    for blocks in iter_docx_blocks(docx_source, output_folder, stats):
+        yield render_markdown(blocks, image_path_prefix)
+
+def docx_to_document(docx_source, output_folder):
+    """Chuyển đổi Word (đường dẫn, bytes hoặc file-like) sang Document"""
+    stats = {}
+    blocks = [node for blocks in iter_docx_blocks(docx_source, output_folder, stats) for node in blocks]
+    return Document(blocks), stats
+
+def docx_to_markdown(docx_source, output_folder, image_path_prefix=''):
+    """Chuyển đổi Word (đường dẫn, bytes hoặc file-like) sang Markdown"""
+    stats = {}
+    markdown_content = "".join(iter_docx_markdown(docx_source, output_folder, image_path_prefix, stats))
+    return markdown_content, stats
+
+# Định dạng ảnh đã nén sẵn: lưu nguyên (ZIP_STORED), nén lại chỉ tốn CPU mà không nhỏ hơn
+ZIP_STORED_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.gif', '.webp', '.jp2', '.jpx')
+# ZIP nhỏ hơn mức này nằm trong bộ nhớ, lớn hơn thì tự chuyển ra file tạm trên đĩa
+ZIP_SPOOL_MAX_BYTES = 16 * 1024 * 1024
+
+def add_result_to_zip(zip_file, markdown_content, images_dir, md_arcname, images_arcdir="images"):
+    """Thêm markdown (nén) và hình ảnh (lưu nguyên nếu đã nén sẵn) của một kết quả vào ZIP đang mở"""
+    zip_file.writestr(md_arcname, markdown_content, compress_type=zipfile.ZIP_DEFLATED)
+    
+    if os.path.exists(images_dir):
+        for filename in sorted(os.listdir(images_dir)):
+            file_path = os.path.join(images_dir, filename)
+            if os.path.isfile(file_path):
+                if filename.lower().endswith(ZIP_STORED_EXTENSIONS):
+                    compress_type = zipfile.ZIP_STORED
+                else:
+                    compress_type = zipfile.ZIP_DEFLATED
+                zip_file.write(file_path, f"{images_arcdir}/{filename}", compress_type=compress_type)
+
+def _write_zip(output, add_entries):
+    """Ghi ZIP ra output (đường dẫn hoặc file); mặc định là file tạm spooled, trả về đã seek về đầu"""
+    if output is None:
+        output = tempfile.SpooledTemporaryFile(max_size=ZIP_SPOOL_MAX_BYTES)
+    
+    with zipfile.ZipFile(output, 'w') as zip_file:
+        add_entries(zip_file)
+    
+    if hasattr(output, 'seek'):
+        output.seek(0)
+    return output
+
+def create_zip_file(markdown_content, images_dir, md_filename, output=None):
+    """Tạo file ZIP chứa markdown và tất cả hình ảnh (ghi dần ra output, không giữ cả file trong bộ nhớ)"""
+    return _write_zip(output, lambda zip_file: add_result_to_zip(
+        zip_file, markdown_content, images_dir, md_filename
+    ))
+
+def create_batch_zip(results, output=None):
+    """Tạo một file ZIP cho nhiều kết quả: mỗi kết quả (tên, markdown, thư mục ảnh) trong một thư mục riêng"""
+    def add_entries(zip_file):
+        for name, markdown_content, images_dir in results:
+            add_result_to_zip(zip_file, markdown_content, images_dir, f"{name}/{name}.md", f"{name}/images")
+    
+    return _write_zip(output, add_entries)
@@ -0,0 +1,305 @@
+"""
+Chuyển đổi PDF/Word sang Markdown từ dòng lệnh (không cần Streamlit)
+
+Ví dụ:
+    python -m doc2md report.pdf -o output --page-workers 4
+    python -m doc2md "scans/**/*.pdf" contracts/ -o output --jobs 4 --latex --html --zip
+"""
+import argparse
+import contextlib
+import glob
+import json
+import multiprocessing
+import os
+import shutil
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from converter import (
+    DEFAULT_OCR_WORKERS,
+    SCANNED_OCR_DPI,
+    ImageStore,
+    collect_pdf_stats,
+    create_zip_file,
+    iter_docx_blocks,
+    iter_pdf_document,
+    set_ocr_threads,
+)
+from document import (
+    HTML_END,
+    LATEX_BEGIN,
+    LATEX_END,
+    html_begin,
+    render_latex_body,
+    render_markdown,
+    write_html_body,
+)
+from ocr_cache import DEFAULT_OCR_CACHE_PATH, OcrCache
+from profiling import StageTimer, cprofile, stage, summarize_samples
+
+SUPPORTED_EXTENSIONS = ('.pdf', '.docx')
+
+
+def expand_inputs(inputs):
+    """Danh sách file cần xử lý từ các đường dẫn file, thư mục hoặc mẫu glob"""
+    files = []
+    for item in inputs:
+        if os.path.isdir(item):
+            # Trong thư mục chỉ lấy các định dạng được hỗ trợ
+            for root, _, names in os.walk(item):
+                files.extend(
+                    os.path.join(root, name) for name in sorted(names)
+                    if name.lower().endswith(SUPPORTED_EXTENSIONS)
+                )
+        elif glob.has_magic(item):
+            files.extend(sorted(glob.glob(item, recursive=True)))
+        else:
+            files.append(item)
+
+    # Giữ thứ tự, bỏ trùng
+    seen = set()
+    result = []
+    for path in files:
+        key = os.path.abspath(path)
+        if key not in seen:
+            seen.add(key)
+            result.append(path)
+    return result
+
+
+def output_names(paths):
+    """Tên thư mục kết quả cho từng file (report.pdf và report.docx không ghi đè nhau)"""
+    names = []
+    used = set()
+    for path in paths:
+        name = Path(path).stem
+        if name in used:
+            name = f"{name}_{Path(path).suffix.lstrip('.')}"
+        base = name
+        index = 2
+        while name in used:
+            name = f"{base}_{index}"
+            index += 1
+        used.add(name)
+        names.append(name)
+    return names
+
+
+def convert_file(input_path, output_dir, args, image_store=None, name=None, ocr_cache=None):
+    """Chuyển đổi một file, ghi <output_dir>/<tên>/<tên>.md, thư mục images/ và các định dạng xuất thêm"""
+    if not input_path.lower().endswith(SUPPORTED_EXTENSIONS):
+        raise ValueError(f"Định dạng không được hỗ trợ: {input_path}")
+    if not os.path.isfile(input_path):
+        raise FileNotFoundError(f"Không tìm thấy file: {input_path}")
+
+    stem = name or Path(input_path).stem
+    result_dir = os.path.join(output_dir, stem)
+    images_dir = os.path.join(result_dir, "images")
+    os.makedirs(images_dir, exist_ok=True)
+
+    md_path = os.path.join(result_dir, f"{stem}.md")
+    tex_path = os.path.join(result_dir, f"{stem}.tex") if args.latex else None
+    html_path = os.path.join(result_dir, f"{stem}.html") if args.html else None
+
+    if input_path.lower().endswith('.pdf'):
+        page_stats_list = []
+
+        def iter_blocks():
+            for page_blocks, page_stats in iter_pdf_document(
+                input_path, images_dir, not args.no_optimize, not args.no_ocr, args.ocr_lang,
+                workers=args.page_workers, ocr_workers=args.ocr_workers,
+                image_store=image_store, extract_tables=not args.no_native_tables,
+                ocr_scanned=not args.no_scan_ocr, ocr_dpi=args.ocr_dpi, ocr_cache=ocr_cache
+            ):
+                page_stats_list.append(page_stats)
+                yield page_blocks
+
+        blocks_iter = iter_blocks()
+    else:
+        stats = {}
+        blocks_iter = iter_docx_blocks(input_path, images_dir, stats)
+
+    # Ghi từng trang (PDF) / từng khối (Word) ra các file ngay khi xong => bộ nhớ không tăng theo số trang;
+    # Markdown, LaTeX và HTML được sinh từ cùng các khối, không phân tích lại Markdown
+    # (ảnh của trang/khối đã được lưu trước khi khối được trả về nên nhúng được ngay)
+    timer = StageTimer()
+    html_images_dir = images_dir if args.html_inline_images else None
+    with contextlib.ExitStack() as files:
+        md_file = files.enter_context(open(md_path, "w", encoding="utf-8"))
+        tex_file = files.enter_context(open(tex_path, "w", encoding="utf-8")) if tex_path else None
+        html_file = files.enter_context(open(html_path, "w", encoding="utf-8")) if html_path else None
+        if tex_file:
+            tex_file.write(LATEX_BEGIN)
+        if html_file:
+            html_file.write(html_begin(stem))
+        for blocks in blocks_iter:
+            md_file.write(render_markdown(blocks, args.image_prefix))
+            if tex_file:
+                with stage(timer, 'latex'):
+                    tex_file.write(render_latex_body(blocks, args.image_prefix))
+            if html_file:
+                with stage(timer, 'html'):
+                    write_html_body(blocks, html_file, args.image_prefix, html_images_dir)
+        if tex_file:
+            tex_file.write(LATEX_END)
+        if html_file:
+            html_file.write(HTML_END)
+    if input_path.lower().endswith('.pdf'):
+        stats = collect_pdf_stats(page_stats_list)
+
+    outputs = [md_path] + [path for path in (tex_path, html_path) if path]
+    if args.zip:
+        with open(md_path, encoding="utf-8") as f:
+            markdown_content = f.read()
+
+        zip_path = os.path.join(output_dir, f"{stem}.zip")
+        with stage(timer, 'zip') as measure:
+            create_zip_file(markdown_content, images_dir, f"{stem}.md", zip_path)
+            measure['bytes'] = os.path.getsize(zip_path)
+        outputs.append(zip_path)
+
+    stats.setdefault('stages', {}).update(summarize_samples(timer.drain()))
+    return outputs, stats
+
+
+def run_job(input_path, name, output_dir, args, image_store=None, ocr_cache=None):
+    """Chuyển đổi một file, trả về bản ghi cho file tổng hợp JSON (lỗi được ghi lại, không ném ra)"""
+    start = time.perf_counter()
+    record = {'input': input_path, 'name': name}
+    profile_path = None
+    if args.profile_dir:
+        profile_path = os.path.join(args.profile_dir, f"{name}.prof")
+        record['profile'] = profile_path
+    try:
+        with cprofile(profile_path):
+            outputs, stats = convert_file(input_path, output_dir, args, image_store, name, ocr_cache)
+        record.update(status='ok', outputs=outputs, stats=stats)
+    except Exception as e:
+        record.update(status='error', error=str(e))
+    record['seconds'] = round(time.perf_counter() - start, 3)
+    return record
+
+
+def print_record(record):
+    if record['status'] == 'ok':
+        # Thời gian từng bước chỉ ghi vào file JSON tổng hợp (hoặc in riêng với --stages)
+        stats = {key: value for key, value in record['stats'].items() if key != 'stages'}
+        print(f"✅ {record['input']} -> {record['outputs'][0]} ({record['seconds']:.2f}s) {stats}")
+    else:
+        print(f"❌ {record['input']}: {record['error']}", file=sys.stderr)
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="doc2md", description="Chuyển đổi PDF/Word sang Markdown")
+    parser.add_argument("inputs", nargs="+", help="File PDF/Word (.docx), thư mục hoặc mẫu glob (vd: \"scans/**/*.pdf\")")
+    parser.add_argument("-o", "--output", default="output", help="Thư mục kết quả (mặc định: output)")
+    parser.add_argument("-j", "--jobs", type=int, default=1,
+                        help="Số file xử lý song song, mỗi file một tiến trình (mặc định: 1)")
+    parser.add_argument("--page-workers", type=int, default=1,
+                        help="Số tiến trình xử lý song song các trang PDF (mặc định: 1)")
+    parser.add_argument("--no-ocr", action="store_true", help="Tắt OCR nhận diện bảng")
+    parser.add_argument("--no-native-tables", action="store_true",
+                        help="Không nhận diện bảng kẻ bằng đường vector trong PDF")
+    parser.add_argument("--no-scan-ocr", action="store_true",
+                        help="Không OCR cả trang với trang scan (PDF không có lớp văn bản)")
+    parser.add_argument("--ocr-dpi", type=int, default=SCANNED_OCR_DPI,
+                        help=f"Độ phân giải khi OCR trang scan (mặc định: {SCANNED_OCR_DPI})")
+    parser.add_argument("--ocr-lang", default="vie+eng", help="Ngôn ngữ OCR (mặc định: vie+eng)")
+    parser.add_argument("--ocr-workers", type=int, default=DEFAULT_OCR_WORKERS,
+                        help=f"Số ảnh được OCR cùng lúc (mặc định: {DEFAULT_OCR_WORKERS})")
+    parser.add_argument("--ocr-threads", type=int, default=1,
+                        help="Số thread của mỗi tiến trình Tesseract - OMP_THREAD_LIMIT (mặc định: 1)")
+    parser.add_argument("--ocr-cache", default=DEFAULT_OCR_CACHE_PATH,
+                        help=f"File cache kết quả OCR dùng chung giữa các lần chạy (mặc định: {DEFAULT_OCR_CACHE_PATH})")
+    parser.add_argument("--no-ocr-cache", action="store_true", help="Không dùng cache kết quả OCR")
+    parser.add_argument("--no-optimize", action="store_true", help="Không tối ưu kích thước ảnh")
+    parser.add_argument("--image-prefix", default="images/", help="Tiền tố đường dẫn ảnh trong Markdown")
+    parser.add_argument("--latex", action="store_true", help="Xuất thêm file LaTeX (.tex)")
+    parser.add_argument("--html", action="store_true", help="Xuất thêm file HTML")
+    parser.add_argument("--html-inline-images", action="store_true",
+                        help="Nhúng ảnh vào file HTML (data URI) thay vì link tới thư mục images/")
+    parser.add_argument("--zip", action="store_true", help="Xuất thêm file ZIP (Markdown + ảnh)")
+    parser.add_argument("--summary", default=None,
+                        help="File JSON tổng hợp thống kê và thời gian (mặc định: <output>/summary.json)")
+    parser.add_argument("--stages", action="store_true",
+                        help="In thời gian từng bước (đọc văn bản, ảnh, OpenCV, Tesseract, ZIP...) của cả lô")
+    parser.add_argument("--profile-dir", default=None,
+                        help="Chạy từng file dưới cProfile, ghi <thư mục>/<tên>.prof (xem bằng pstats/snakeviz)")
+    return parser
+
+
+def total_stages(records):
+    """Gộp thời gian từng bước của các file: số lần gọi, tổng ms, bytes (bước tốn nhiều thời gian nhất trước)"""
+    totals = {}
+    for record in records:
+        for name, values in record.get('stats', {}).get('stages', {}).items():
+            total = totals.setdefault(name, {'calls': 0, 'total_ms': 0.0, 'bytes': 0})
+            total['calls'] += values['calls']
+            total['total_ms'] = round(total['total_ms'] + values['total_ms'], 1)
+            total['bytes'] += values['bytes']
+    return dict(sorted(totals.items(), key=lambda item: -item[1]['total_ms']))
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+
+    files = expand_inputs(args.inputs)
+    if not files:
+        print("❌ Không tìm thấy file PDF/Word nào", file=sys.stderr)
+        return 1
+    names = output_names(files)
+    os.makedirs(args.output, exist_ok=True)
+    if args.profile_dir:
+        os.makedirs(args.profile_dir, exist_ok=True)
+
+    # Đặt một lần trước khi chạy (tiến trình con của --jobs/--page-workers kế thừa)
+    set_ocr_threads(args.ocr_threads)
+    # Ảnh giống nhau giữa các file chỉ xử lý một lần
+    image_store = ImageStore(tempfile.mkdtemp(prefix="doc2md_images_"))
+    # Ảnh đã OCR ở các lần chạy trước không phải OCR lại
+    ocr_cache = None if args.no_ocr_cache else OcrCache(args.ocr_cache)
+    start = time.perf_counter()
+    records = []
+    try:
+        if args.jobs > 1 and len(files) > 1:
+            # Mỗi file một tiến trình; in kết quả theo đúng thứ tự đầu vào
+            with ProcessPoolExecutor(max_workers=args.jobs, mp_context=multiprocessing.get_context('spawn')) as executor:
+                futures = [
+                    executor.submit(run_job, path, name, args.output, args, image_store, ocr_cache)
+                    for path, name in zip(files, names)
+                ]
+                for future in futures:
+                    records.append(future.result())
+                    print_record(records[-1])
+        else:
+            for path, name in zip(files, names):
+                records.append(run_job(path, name, args.output, args, image_store, ocr_cache))
+                print_record(records[-1])
+    finally:
+        shutil.rmtree(image_store.root, ignore_errors=True)
+
+    failed = sum(1 for record in records if record['status'] != 'ok')
+    summary = {
+        'files': records,
+        'ok': len(records) - failed,
+        'failed': failed,
+        'seconds': round(time.perf_counter() - start, 3),
+        'stages': total_stages(records),
+    }
+    summary_path = args.summary or os.path.join(args.output, "summary.json")
+    with open(summary_path, "w", encoding="utf-8") as f:
+        json.dump(summary, f, ensure_ascii=False, indent=2)
+    print(f"📊 {summary['ok']} thành công, {failed} lỗi trong {summary['seconds']:.2f}s -> {summary_path}")
+    if args.stages:
+        for name, values in summary['stages'].items():
+            print(f"  {name:<16}{values['calls']:>8} lần{values['total_ms']:>12.1f} ms{values['bytes'] / 1e6:>10.1f} MB")
+
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    multiprocessing.freeze_support()
+    sys.exit(main())
@@ -0,0 +1,420 @@
+"""
+Mô hình tài liệu trung gian dùng chung cho mọi định dạng xuất.
+
+Bộ chuyển đổi PDF/Word tạo các khối (tiêu đề, đoạn văn, bảng, ảnh, ngắt trang) một lần;
+Markdown, LaTeX, HTML và xem trước được sinh từ các khối này, mỗi định dạng một lượt
+duyệt, thay vì phân tích lại Markdown bằng biểu thức chính quy. Các nút dùng __slots__
+cho gọn bộ nhớ, gửi được qua pickle (tiến trình xử lý trang) và JSON (cache kết quả).
+"""
+import base64
+import html
+import io
+import mimetypes
+import os
+
+PAGE_SEPARATOR = "\n---\n\n"
+
+
+class Node:
+    """Nút của mô hình: so sánh và hiển thị theo các thuộc tính trong __slots__"""
+    __slots__ = ()
+
+    def __eq__(self, other):
+        return type(self) is type(other) and all(
+            getattr(self, name) == getattr(other, name) for name in self.__slots__
+        )
+
+    def __repr__(self):
+        values = ", ".join(repr(getattr(self, name)) for name in self.__slots__)
+        return f"{type(self).__name__}({values})"
+
+
+class Span(Node):
+    """Đoạn chữ cùng định dạng trong một đoạn văn"""
+    __slots__ = ('text', 'bold', 'italic')
+
+    def __init__(self, text, bold=False, italic=False):
+        self.text = text
+        self.bold = bool(bold)
+        self.italic = bool(italic)
+
+
+class Heading(Node):
+    __slots__ = ('level', 'text')
+
+    def __init__(self, level, text):
+        self.level = level
+        self.text = text
+
+
+class Paragraph(Node):
+    __slots__ = ('spans',)
+
+    def __init__(self, spans):
+        self.spans = spans
+
+
+class Table(Node):
+    """Bảng: rows là danh sách hàng ô (chuỗi), hàng đầu là header; caption: tiêu đề (vd: bảng OCR)"""
+    __slots__ = ('rows', 'caption')
+
+    def __init__(self, rows, caption=None):
+        self.rows = rows
+        self.caption = caption
+
+
+class Image(Node):
+    """Ảnh: tên file trong thư mục ảnh (tiền tố đường dẫn được thêm khi xuất)"""
+    __slots__ = ('name', 'alt')
+
+    def __init__(self, name, alt="Image"):
+        self.name = name
+        self.alt = alt
+
+
+class PageBreak(Node):
+    __slots__ = ()
+
+
+# Dạng JSON gọn của từng loại khối: [mã, thuộc tính...]
+_BLOCK_CODES = {Heading: "h", Paragraph: "p", Table: "t", Image: "i", PageBreak: "-"}
+
+
+class Document(Node):
+    """Danh sách khối của cả tài liệu; trang được phân cách bằng PageBreak"""
+    __slots__ = ('blocks',)
+
+    def __init__(self, blocks=None):
+        self.blocks = blocks if blocks is not None else []
+
+    def pages(self):
+        """Các khối của từng trang (trang PDF; Word là một trang)"""
+        pages = []
+        start = 0
+        for index, block in enumerate(self.blocks):
+            if isinstance(block, PageBreak):
+                pages.append(self.blocks[start:index])
+                start = index + 1
+        pages.append(self.blocks[start:])
+        return pages
+
+    def images(self):
+        """Tên các file ảnh được tham chiếu, theo thứ tự xuất hiện (không lặp)"""
+        return list(dict.fromkeys(block.name for block in self.blocks if isinstance(block, Image)))
+
+    def to_data(self):
+        """Dạng JSON được (list) của tài liệu"""
+        data = []
+        for block in self.blocks:
+            code = _BLOCK_CODES[type(block)]
+            if code == "p":
+                data.append([code, [[span.text, span.bold, span.italic] for span in block.spans]])
+            else:
+                data.append([code] + [getattr(block, name) for name in block.__slots__])
+        return data
+
+    @classmethod
+    def from_data(cls, data):
+        blocks = []
+        for code, *values in data:
+            if code == "p":
+                blocks.append(Paragraph([Span(*span) for span in values[0]]))
+            elif code == "h":
+                blocks.append(Heading(*values))
+            elif code == "t":
+                blocks.append(Table(*values))
+            elif code == "i":
+                blocks.append(Image(*values))
+            else:
+                blocks.append(PageBreak())
+        return cls(blocks)
+
+
+def clean_cell(cell):
+    """Nội dung ô bảng trên một dòng (None -> "", gộp khoảng trắng và xuống dòng)"""
+    return "" if cell is None else " ".join(str(cell).split())
+
+
+def merge_spans(spans):
+    """(văn bản, đậm, nghiêng) với các span liền kề cùng định dạng đã được gộp"""
+    merged = []
+    for span in spans:
+        if not span.text:
+            continue
+        if merged and merged[-1][1] == span.bold and merged[-1][2] == span.italic:
+            merged[-1][0].append(span.text)
+        else:
+            merged.append(([span.text], span.bold, span.italic))
+    return [("".join(texts), bold, italic) for texts, bold, italic in merged]
+
+
+# ---------------------------------------------------------------- Markdown
+
+def format_runs(runs):
+    """Markdown của một đoạn văn từ các run (văn bản, đậm, nghiêng), duyệt một lần.
+
+    Các run liền kề cùng định dạng được gộp; ký hiệu ** và * được mở/đóng đúng chỗ định
+    dạng thay đổi (lồng nhau khi cần), khoảng trắng ở biên được đưa ra ngoài ký hiệu.
+    """
+    # Gộp run liền kề cùng định dạng; run chỉ có khoảng trắng không làm đổi định dạng
+    groups = []
+    for text, bold, italic in runs:
+        if not text:
+            continue
+        markers = ("**",) * bool(bold) + ("*",) * bool(italic)
+        if not text.strip():
+            markers = None
+        if groups and (markers is None or groups[-1][0] == markers):
+            groups[-1][1].append(text)
+        elif groups and groups[-1][0] is None:
+            groups[-1] = (markers, groups[-1][1] + [text])
+        else:
+            groups.append((markers, [text]))
+
+    parts = []
+    open_markers = []
+    for index, (markers, texts) in enumerate(groups):
+        text = "".join(texts)
+        core = text.strip()
+        if not core:
+            parts.append(text)
+            continue
+        lead = text[:len(text) - len(text.lstrip())]
+        trail = text[len(core) + len(lead):]
+
+        # Đóng các ký hiệu không còn dùng (và các ký hiệu mở sau chúng)
+        keep = 0
+        while keep < len(open_markers) and open_markers[keep] in markers:
+            keep += 1
+        parts.append("".join(reversed(open_markers[keep:])))
+        del open_markers[keep:]
+        parts.append(lead)
+
+        # Mở ký hiệu mới; ký hiệu còn dùng ở nhóm sau được mở trước (nằm ngoài)
+        following = groups[index + 1][0] if index + 1 < len(groups) else ()
+        opening = sorted((m for m in markers if m not in open_markers), key=lambda m: m not in following)
+        parts.append("".join(opening))
+        open_markers.extend(opening)
+        parts.append(core)
+        if trail and any(m not in following for m in open_markers):
+            # Nhóm sau đóng bớt ký hiệu: đóng ngay để khoảng trắng cuối nằm ngoài
+            parts.append("".join(reversed(open_markers)))
+            open_markers.clear()
+        parts.append(trail)
+    parts.append("".join(reversed(open_markers)))
+    return "".join(parts).strip()
+
+
+def markdown_table(rows):
+    """Các dòng bảng Markdown (hàng đầu là header, hàng ngắn được thêm ô trống)"""
+    if not rows:
+        return ""
+    column_count = max(len(row) for row in rows)
+    lines = []
+    for index, row in enumerate(rows):
+        cells = [cell.replace("|", "\\|") for cell in row] + [""] * (column_count - len(row))
+        lines.append("| " + " | ".join(cells) + " |\n")
+        if index == 0:
+            lines.append("| " + " | ".join(["---"] * column_count) + " |\n")
+    return "".join(lines)
+
+
+def render_markdown(blocks, image_path_prefix='', image=None):
+    """Markdown của các khối. image(node): chuỗi thay cho link ảnh (vd: ảnh nhúng khi xem trước) hoặc None"""
+    parts = []
+    for block in blocks:
+        kind = type(block)
+        if kind is Paragraph:
+            parts.append(f"{format_runs((span.text, span.bold, span.italic) for span in block.spans)}\n\n")
+        elif kind is Heading:
+            parts.append(f"{'#' * block.level} {block.text}\n\n")
+        elif kind is Table:
+            if block.caption:
+                parts.append(f"\n**{block.caption}**\n\n{markdown_table(block.rows)}\n\n")
+            else:
+                parts.append(f"\n{markdown_table(block.rows)}\n")
+        elif kind is Image:
+            custom = image(block) if image is not None else None
+            if custom is None:
+                custom = f"![{block.alt}]({image_path_prefix}{block.name})"
+            parts.append(f"{custom}\n\n")
+        elif kind is PageBreak:
+            parts.append(PAGE_SEPARATOR)
+    return "".join(parts)
+
+
+# ---------------------------------------------------------------- LaTeX
+
+LATEX_BEGIN = """\\documentclass[12pt,a4paper]{article}
+\\usepackage[utf8]{inputenc}
+\\usepackage[vietnamese]{babel}
+\\usepackage{graphicx}
+\\usepackage{amsmath}
+\\usepackage{hyperref}
+\\usepackage{booktabs}
+\\usepackage{longtable}
+
+\\title{Converted Document}
+\\author{PDF to Markdown Converter}
+\\date{\\today}
+
+\\begin{document}
+
+\\maketitle
+
+"""
+LATEX_END = "\n\\end{document}\n"
+
+LATEX_HEADINGS = ("section", "subsection", "subsubsection", "paragraph", "subparagraph", "subparagraph")
+
+_LATEX_ESCAPES = str.maketrans({
+    "\\": r"\textbackslash{}",
+    "&": r"\&",
+    "%": r"\%",
+    "$": r"\$",
+    "#": r"\#",
+    "_": r"\_",
+    "{": r"\{",
+    "}": r"\}",
+    "~": r"\textasciitilde{}",
+    "^": r"\textasciicircum{}",
+})
+
+
+def latex_escape(text):
+    return text.translate(_LATEX_ESCAPES)
+
+
+def render_latex_body(blocks, image_path_prefix=''):
+    """Phần thân LaTeX của các khối (ghép giữa LATEX_BEGIN và LATEX_END)"""
+    parts = []
+    for block in blocks:
+        kind = type(block)
+        if kind is Paragraph:
+            inline = []
+            for text, bold, italic in merge_spans(block.spans):
+                text = latex_escape(text)
+                if italic:
+                    text = f"\\textit{{{text}}}"
+                if bold:
+                    text = f"\\textbf{{{text}}}"
+                inline.append(text)
+            parts.append("".join(inline).strip() + "\n\n")
+        elif kind is Heading:
+            command = LATEX_HEADINGS[min(block.level, len(LATEX_HEADINGS)) - 1]
+            parts.append(f"\\{command}{{{latex_escape(block.text)}}}\n\n")
+        elif kind is Table and block.rows:
+            column_count = max(len(row) for row in block.rows)
+            lines = [
+                " & ".join([latex_escape(cell) for cell in row] + [""] * (column_count - len(row))) + " \\\\\n"
+                for row in block.rows
+            ]
+            caption = f"\\caption{{{latex_escape(block.caption)}}}\n" if block.caption else ""
+            parts.append(
+                f"\\begin{{table}}[h]\n\\centering\n{caption}\\begin{{tabular}}{{{'l' * column_count}}}\n"
+                f"\\toprule\n{lines[0]}\\midrule\n{''.join(lines[1:])}\\bottomrule\n\\end{{tabular}}\n\\end{{table}}\n\n"
+            )
+        elif kind is Image:
+            parts.append(
+                f"\\begin{{figure}}[h]\n\\centering\n"
+                f"\\includegraphics[width=0.8\\textwidth]{{{image_path_prefix}{block.name}}}\n"
+                f"\\caption{{{latex_escape(block.alt)}}}\n\\end{{figure}}\n\n"
+            )
+        elif kind is PageBreak:
+            parts.append("\\hrulefill\n\n")
+    return "".join(parts)
+
+
+def render_latex(blocks, image_path_prefix=''):
+    """Tài liệu LaTeX hoàn chỉnh"""
+    return LATEX_BEGIN + render_latex_body(blocks, image_path_prefix) + LATEX_END
+
+
+# ---------------------------------------------------------------- HTML
+
+HTML_STYLE = """        body { font-family: Arial, sans-serif; max-width: 800px; margin: 50px auto; padding: 20px; }
+        img { max-width: 100%; height: auto; }
+        table { border-collapse: collapse; width: 100%; margin: 20px 0; }
+        th, td { border: 1px solid #ddd; padding: 8px; text-align: left; }
+        th { background-color: #f2f2f2; }
+"""
+HTML_END = "</body>\n</html>\n"
+
+
+def html_begin(title):
+    return (
+        "<!DOCTYPE html>\n<html>\n<head>\n    <meta charset=\"UTF-8\">\n"
+        f"    <title>{html.escape(title)}</title>\n    <style>\n{HTML_STYLE}    </style>\n</head>\n<body>\n"
+    )
+
+
+# Ảnh nhúng được đọc và mã hóa base64 từng đoạn (bội số của 3 byte để các đoạn ghép lại đúng)
+INLINE_IMAGE_CHUNK = 3 * 64 * 1024
+
+
+def write_data_uri(output, image_path):
+    """Ghi ảnh dạng data URI vào output theo từng đoạn, không đọc cả file vào bộ nhớ"""
+    mime = mimetypes.guess_type(image_path)[0] or "application/octet-stream"
+    output.write(f"data:{mime};base64,")
+    with open(image_path, "rb") as image_file:
+        for chunk in iter(lambda: image_file.read(INLINE_IMAGE_CHUNK), b""):
+            output.write(base64.b64encode(chunk).decode("ascii"))
+
+
+def write_html_body(blocks, output, image_path_prefix='', images_dir=None):
+    """Ghi phần thân HTML của các khối vào output (file văn bản, StringIO...), từng khối một.
+
+    images_dir: ảnh có trong thư mục này được nhúng thẳng vào HTML (data URI) thay vì link.
+    """
+    escape = html.escape
+    for block in blocks:
+        kind = type(block)
+        if kind is Paragraph:
+            inline = []
+            for text, bold, italic in merge_spans(block.spans):
+                text = escape(text).replace("\n", "<br>\n")
+                if italic:
+                    text = f"<em>{text}</em>"
+                if bold:
+                    text = f"<strong>{text}</strong>"
+                inline.append(text)
+            output.write(f"<p>{''.join(inline).strip()}</p>\n")
+        elif kind is Heading:
+            level = min(block.level, 6)
+            output.write(f"<h{level}>{escape(block.text)}</h{level}>\n")
+        elif kind is Table and block.rows:
+            column_count = max(len(row) for row in block.rows)
+            parts = ["<table>\n"]
+            if block.caption:
+                parts.append(f"<caption>{escape(block.caption)}</caption>\n")
+            for index, row in enumerate(block.rows):
+                tag = "th" if index == 0 else "td"
+                cells = "".join(f"<{tag}>{escape(cell)}</{tag}>" for cell in row)
+                cells += f"<{tag}></{tag}>" * (column_count - len(row))
+                parts.append(f"<thead>\n<tr>{cells}</tr>\n</thead>\n<tbody>\n" if index == 0 else f"<tr>{cells}</tr>\n")
+            parts.append("</tbody>\n</table>\n")
+            output.write("".join(parts))
+        elif kind is Image:
+            image_path = os.path.join(images_dir, block.name) if images_dir else None
+            if image_path and os.path.isfile(image_path):
+                output.write('<p><img src="')
+                write_data_uri(output, image_path)
+            else:
+                output.write(f'<p><img src="{escape(image_path_prefix + block.name)}')
+            output.write(f'" alt="{escape(block.alt)}"></p>\n')
+        elif kind is PageBreak:
+            output.write("<hr>\n")
+
+
+def write_html(blocks, output, image_path_prefix='', title="Document", images_dir=None):
+    """Ghi tài liệu HTML hoàn chỉnh vào output (xem write_html_body)"""
+    output.write(html_begin(title))
+    write_html_body(blocks, output, image_path_prefix, images_dir)
+    output.write(HTML_END)
+
+
+def render_html(blocks, image_path_prefix='', title="Document", images_dir=None):
+    """Tài liệu HTML hoàn chỉnh dạng chuỗi"""
+    buffer = io.StringIO()
+    write_html(blocks, buffer, image_path_prefix, title, images_dir)
+    return buffer.getvalue()
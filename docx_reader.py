@@ -0,0 +1,217 @@
+"""
+Đọc file Word (.docx) dạng luồng, không cần python-docx.
+
+File .docx là gói ZIP: word/document.xml được đọc bằng iterparse, mỗi phần tử con của
+<w:body> (đoạn văn, bảng) được xử lý ngay khi đọc xong rồi xóa khỏi cây XML, nên bộ nhớ
+chỉ phụ thuộc vào khối lớn nhất chứ không phụ thuộc vào độ dài tài liệu. Cách lấy văn bản,
+định dạng run, style và ô gộp giống python-docx để Markdown không đổi.
+"""
+import posixpath
+import xml.etree.ElementTree as ET
+
+W_NS = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+REL_NS = "{http://schemas.openxmlformats.org/package/2006/relationships}"
+PIC_PIC = "{http://schemas.openxmlformats.org/drawingml/2006/picture}pic"
+
+W_BODY = W_NS + "body"
+W_P = W_NS + "p"
+W_TBL = W_NS + "tbl"
+W_TR = W_NS + "tr"
+W_TC = W_NS + "tc"
+W_R = W_NS + "r"
+W_T = W_NS + "t"
+W_BR = W_NS + "br"
+W_HYPERLINK = W_NS + "hyperlink"
+W_VAL = W_NS + "val"
+
+# Phần tử trong run -> văn bản tương ứng (như CT_R.text của python-docx)
+RUN_TEXT_ELEMENTS = {
+    W_NS + "tab": "\t",
+    W_NS + "ptab": "\t",
+    W_NS + "cr": "\n",
+    W_NS + "noBreakHyphen": "-",
+}
+
+
+def _on_off(parent, tag):
+    """Giá trị bật/tắt (w:b, w:i...): None nếu không có phần tử"""
+    element = parent.find(tag)
+    if element is None:
+        return None
+    return element.get(W_VAL, "true") in ("1", "true", "on")
+
+
+def _int_val(parent, path, default):
+    element = parent.find(path) if parent is not None else None
+    if element is None:
+        return default
+    try:
+        return int(element.get(W_VAL))
+    except (TypeError, ValueError):
+        return default
+
+
+def read_relationships(package, part_name):
+    """Các quan hệ (Id, Type, Target, TargetMode) của một phần trong gói, theo thứ tự trong file .rels"""
+    directory, name = posixpath.split(part_name)
+    try:
+        data = package.read(posixpath.join(directory, "_rels", name + ".rels"))
+    except KeyError:
+        return []
+    return [
+        {
+            'id': rel.get("Id"),
+            'type': rel.get("Type", ""),
+            'target': rel.get("Target", ""),
+            'external': rel.get("TargetMode") == "External",
+        }
+        for rel in ET.fromstring(data).iter(REL_NS + "Relationship")
+    ]
+
+
+def resolve_target(part_name, target):
+    """Tên file trong gói ZIP mà quan hệ của part_name trỏ tới"""
+    if target.startswith("/"):
+        return target.lstrip("/")
+    return posixpath.normpath(posixpath.join(posixpath.dirname(part_name), target))
+
+
+def find_document_part(package):
+    """Tên phần văn bản chính (thường là word/document.xml)"""
+    for rel in read_relationships(package, ""):
+        if rel['type'].endswith("/officeDocument"):
+            return resolve_target("", rel['target'])
+    return "word/document.xml"
+
+
+def iter_image_parts(package, document_part):
+    """(đường dẫn trong .rels, tên file trong gói) của các ảnh, theo thứ tự quan hệ như doc.part.rels"""
+    for rel in read_relationships(package, document_part):
+        if "image" in rel['target'] and not rel['external']:
+            yield rel['target'], resolve_target(document_part, rel['target'])
+
+
+def read_paragraph_styles(package, document_part):
+    """(style id -> tên style viết thường, tên style đoạn văn mặc định)"""
+    names = {}
+    default = ""
+    for rel in read_relationships(package, document_part):
+        if rel['type'].endswith("/styles") and not rel['external']:
+            try:
+                root = ET.fromstring(package.read(resolve_target(document_part, rel['target'])))
+            except KeyError:
+                break
+            for style in root.iter(W_NS + "style"):
+                if style.get(W_NS + "type") != "paragraph":
+                    continue
+                name_element = style.find(W_NS + "name")
+                name = (name_element.get(W_VAL) or "") if name_element is not None else ""
+                names[style.get(W_NS + "styleId")] = name.lower()
+                if style.get(W_NS + "default") in ("1", "true", "on"):
+                    # Theo đặc tả: style mặc định cuối cùng trong file
+                    default = name.lower()
+            break
+    return names, default
+
+
+def run_text(run):
+    """Văn bản của một <w:r>: w:t, tab, xuống dòng, gạch nối"""
+    parts = []
+    for child in run:
+        tag = child.tag
+        if tag == W_T:
+            parts.append(child.text or "")
+        elif tag == W_BR:
+            # Ngắt trang/cột không thành ký tự
+            if child.get(W_NS + "type", "textWrapping") == "textWrapping":
+                parts.append("\n")
+        else:
+            text = RUN_TEXT_ELEMENTS.get(tag)
+            if text is not None:
+                parts.append(text)
+    return "".join(parts)
+
+
+def read_run(run):
+    """(văn bản, đậm, nghiêng) của một <w:r>; đậm/nghiêng là None nếu run không tự đặt"""
+    rpr = run.find(W_NS + "rPr")
+    if rpr is None:
+        return run_text(run), None, None
+    return run_text(run), _on_off(rpr, W_NS + "b"), _on_off(rpr, W_NS + "i")
+
+
+def read_paragraph(p):
+    """Khối đoạn văn: văn bản, các run theo thứ tự (gồm cả run trong hyperlink), style id, có ảnh hay không"""
+    runs = []
+    style_id = None
+    for child in p:
+        tag = child.tag
+        if tag == W_R:
+            runs.append(read_run(child))
+        elif tag == W_HYPERLINK:
+            runs.extend(read_run(run) for run in child.findall(W_R))
+        elif tag == W_NS + "pPr":
+            style = child.find(W_NS + "pStyle")
+            if style is not None:
+                style_id = style.get(W_VAL)
+    return {
+        'type': 'paragraph',
+        'text': "".join(run[0] for run in runs),
+        'runs': runs,
+        'style_id': style_id,
+        'has_image': next(p.iter(PIC_PIC), None) is not None,
+    }
+
+
+def paragraph_text(p):
+    return "".join(
+        run_text(child) if child.tag == W_R else "".join(run_text(run) for run in child.findall(W_R))
+        for child in p if child.tag in (W_R, W_HYPERLINK)
+    )
+
+
+def read_table(tbl):
+    """Khối bảng: các hàng, mỗi ô lặp lại theo số cột nó chiếm (gridSpan), ô gộp dọc lấy nội dung ô phía trên"""
+    rows = []
+    above = {}
+    for tr in tbl.findall(W_TR):
+        offset = _int_val(tr.find(W_NS + "trPr"), W_NS + "gridBefore", 0)
+        cells = []
+        current = {}
+        for tc in tr.findall(W_TC):
+            tcpr = tc.find(W_NS + "tcPr")
+            span = _int_val(tcpr, W_NS + "gridSpan", 1)
+            merge = tcpr.find(W_NS + "vMerge") if tcpr is not None else None
+            if merge is not None and merge.get(W_VAL, "continue") == "continue" and offset in above:
+                cell = above[offset]
+            else:
+                cell = ("\n".join(paragraph_text(p) for p in tc.findall(W_P)), span)
+            current[offset] = cell
+            cells.extend([cell[0]] * cell[1])
+            offset += span
+        above = current
+        rows.append(cells)
+    return {'type': 'table', 'rows': rows}
+
+
+def iter_body_blocks(stream):
+    """Đọc document.xml dạng luồng, sinh khối đoạn văn/bảng của <w:body> theo thứ tự"""
+    depth = 0
+    body = None
+    for event, element in ET.iterparse(stream, events=("start", "end")):
+        if event == "start":
+            depth += 1
+            if depth == 2 and element.tag == W_BODY:
+                body = element
+            continue
+        depth -= 1
+        if body is None or depth != 2:
+            if element is body:
+                body = None
+            continue
+        # Phần tử con trực tiếp của body vừa đọc xong
+        if element.tag == W_P:
+            yield read_paragraph(element)
+        elif element.tag == W_TBL:
+            yield read_table(element)
+        body.clear()
@@ -0,0 +1,635 @@
+"""
+Hàng đợi chuyển đổi chạy nền: nhiều worker, trạng thái job lưu trên đĩa (SQLite).
+
+Giao diện web chỉ đưa file vào hàng đợi rồi hỏi lại trạng thái (queued / running /
+done / failed) và tiến độ từng job, nên script Streamlit không bị chặn và kết quả vẫn
+lấy lại được sau khi rerun hoặc trình duyệt kết nối lại. Trạng thái nằm trong SQLite
+nên dòng lệnh dùng chung được hàng đợi (`python -m job_queue ...`): đưa file vào, chạy
+worker, xem trạng thái, xuất kết quả. Mỗi job có thư mục riêng <root>/<job>: file đầu
+vào (xóa khi job xong hoặc lỗi), document.json (mô hình tài liệu) và images/.
+
+Worker giữ job bằng heartbeat; job đang chạy mà heartbeat quá cũ (tiến trình bị dừng
+đột ngột) được đưa lại vào hàng đợi. Job đã xong quá thời gian giữ lại bị xóa; khi tổng
+dung lượng vượt giới hạn, job đã xong ít dùng nhất bị xóa trước. Job chờ/đang chạy
+không bao giờ bị xóa (trình duyệt mất kết nối vẫn lấy lại được kết quả).
+
+Ví dụ:
+    python -m job_queue submit report.pdf contracts/ --wait -o output
+    python -m job_queue worker --workers 4
+    python -m job_queue status
+"""
+import argparse
+import json
+import logging
+import multiprocessing
+import os
+import shutil
+import socket
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+import uuid
+
+from conversion_cache import dir_size
+
+DEFAULT_JOB_DIR = os.environ.get("DOC2MD_JOB_DIR", os.path.join(tempfile.gettempdir(), "doc2md_jobs"))
+DEFAULT_JOB_WORKERS = int(os.environ.get("DOC2MD_JOB_WORKERS", "2"))
+# Job đã xong/lỗi được giữ lại trong thời gian này (giây) để lấy lại kết quả
+DEFAULT_JOB_TTL = int(os.environ.get("DOC2MD_JOB_TTL", "86400"))
+# Tổng dung lượng thư mục job; vượt quá thì job đã xong ít dùng nhất bị xóa trước (LRU)
+DEFAULT_JOB_MAX_BYTES = int(os.environ.get("DOC2MD_JOB_MAX_MB", "1024")) * 1024 * 1024
+# Worker cập nhật heartbeat của job đang chạy sau mỗi HEARTBEAT_SECONDS; job không có
+# heartbeat quá STALE_SECONDS được chạy lại (tối đa MAX_ATTEMPTS lần)
+HEARTBEAT_SECONDS = 5
+STALE_SECONDS = 60
+MAX_ATTEMPTS = 2
+# Worker rảnh hỏi lại hàng đợi sau mỗi khoảng này (job từ tiến trình khác)
+IDLE_POLL_SECONDS = 1.0
+# Số job đã xong gần nhất dùng để tính độ trễ trong stats()
+METRICS_WINDOW = 100
+# Worker xóa job hết hạn sau mỗi khoảng này (giây)
+PURGE_SECONDS = 600
+
+STATUSES = ('queued', 'running', 'done', 'failed')
+SUPPORTED_TYPES = ('pdf', 'docx')
+
+_DOCUMENT_FILE = "document.json"
+_IMAGES_DIR = "images"
+
+logger = logging.getLogger(__name__)
+
+
+def file_type_of(filename):
+    """Loại file ('pdf', 'docx') theo phần mở rộng, None nếu không hỗ trợ"""
+    extension = os.path.splitext(filename)[1].lower().lstrip('.')
+    return extension if extension in SUPPORTED_TYPES else None
+
+
+def cache_options(options):
+    """Các tùy chọn ảnh hưởng tới kết quả (dùng làm khóa cache chuyển đổi)"""
+    return {
+        'enable_ocr': options.get('enable_ocr', True),
+        'ocr_lang': options.get('ocr_lang', 'vie+eng'),
+        'optimize_imgs': options.get('optimize_imgs', True),
+        'extract_tables': options.get('extract_tables', True),
+        'ocr_scanned': options.get('ocr_scanned', True),
+        'ocr_dpi': options.get('ocr_dpi'),
+    }
+
+
+def run_conversion(input_source, file_type, images_dir, options, on_progress=None, ocr_cache=None, image_store=None):
+    """Chuyển đổi một file sang (Document, stats); on_progress(tỉ lệ, thông báo) được gọi sau mỗi trang PDF"""
+    from converter import SCANNED_OCR_DPI, DEFAULT_OCR_WORKERS, collect_pdf_stats, docx_to_document, iter_pdf_document
+    from document import Document
+
+    if file_type == 'docx':
+        return docx_to_document(input_source, images_dir)
+
+    blocks = []
+    page_stats_list = []
+    for page_blocks, page_stats in iter_pdf_document(
+        input_source, images_dir, options.get('optimize_imgs', True), options.get('enable_ocr', True),
+        options.get('ocr_lang', 'vie+eng'), workers=options.get('page_workers', 1),
+        ocr_workers=options.get('ocr_workers', DEFAULT_OCR_WORKERS), image_store=image_store,
+        extract_tables=options.get('extract_tables', True), ocr_scanned=options.get('ocr_scanned', True),
+        ocr_dpi=options.get('ocr_dpi') or SCANNED_OCR_DPI, ocr_cache=ocr_cache
+    ):
+        blocks.extend(page_blocks)
+        page_stats_list.append(page_stats)
+        if on_progress is not None:
+            done, total = page_stats['page'] + 1, page_stats['pages']
+            on_progress(done / total, f"trang {done}/{total}")
+    return Document(blocks), collect_pdf_stats(page_stats_list)
+
+
+class JobQueue:
+    """Hàng đợi job chuyển đổi trên đĩa, dùng chung giữa các phiên web và tiến trình dòng lệnh.
+
+    conversion_cache (ConversionCache) và ocr_cache (OcrCache) được dùng khi chạy job, nếu có.
+    """
+
+    def __init__(self, root=DEFAULT_JOB_DIR, ttl=DEFAULT_JOB_TTL, max_bytes=DEFAULT_JOB_MAX_BYTES,
+                 conversion_cache=None, ocr_cache=None):
+        self.root = root
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.evictions = 0
+        self.conversion_cache = conversion_cache
+        self.ocr_cache = ocr_cache
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}"
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stopping = threading.Event()
+        self._threads = []
+        self.workers = 0
+        # job đang chạy trong tiến trình này (heartbeat)
+        self._running = set()
+
+        os.makedirs(root, exist_ok=True)
+        self._conn = sqlite3.connect(
+            os.path.join(root, "jobs.sqlite3"), timeout=30, check_same_thread=False, isolation_level=None
+        )
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS jobs ("
+            "id TEXT PRIMARY KEY, batch TEXT, filename TEXT NOT NULL, file_type TEXT NOT NULL, "
+            "options TEXT NOT NULL, status TEXT NOT NULL, progress REAL NOT NULL DEFAULT 0, message TEXT, "
+            "error TEXT, stats TEXT, cached INTEGER NOT NULL DEFAULT 0, attempts INTEGER NOT NULL DEFAULT 0, "
+            "owner TEXT, heartbeat REAL, created REAL NOT NULL, started REAL, finished REAL, "
+            "bytes INTEGER NOT NULL DEFAULT 0, last_used REAL)"
+        )
+        # Hàng đợi tạo bởi phiên bản trước chưa có các cột dung lượng
+        existing = {row[1] for row in self._conn.execute("PRAGMA table_info(jobs)")}
+        for column in ("bytes INTEGER NOT NULL DEFAULT 0", "last_used REAL"):
+            if column.split()[0] not in existing:
+                self._conn.execute(f"ALTER TABLE jobs ADD COLUMN {column}")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, created)")
+        self.purge()
+
+    # ------------------------------------------------------------ trạng thái
+
+    def _execute(self, sql, params=()):
+        with self._lock:
+            return self._conn.execute(sql, params).fetchall()
+
+    def job_dir(self, job_id):
+        return os.path.join(self.root, job_id)
+
+    def submit(self, source, filename, options=None, batch=None):
+        """Đưa file (đường dẫn hoặc bytes) vào hàng đợi. Trả về mã job"""
+        file_type = file_type_of(filename)
+        if file_type is None:
+            raise ValueError(f"Định dạng không được hỗ trợ: {filename}")
+
+        job_id = uuid.uuid4().hex
+        job_dir = self.job_dir(job_id)
+        os.makedirs(job_dir)
+        input_path = os.path.join(job_dir, f"input.{file_type}")
+        try:
+            if isinstance(source, (str, os.PathLike)):
+                shutil.copyfile(source, input_path)
+            else:
+                with open(input_path, "wb") as f:
+                    f.write(source)
+
+            now = time.time()
+            self._execute(
+                "INSERT INTO jobs (id, batch, filename, file_type, options, status, created, bytes, last_used) "
+                "VALUES (?, ?, ?, ?, ?, 'queued', ?, ?, ?)",
+                (job_id, batch, filename, file_type, json.dumps(options or {}), now,
+                 os.path.getsize(input_path), now)
+            )
+        except Exception:
+            # Thư mục chưa có trong cơ sở dữ liệu thì không được dọn (TTL, giới hạn dung lượng) => xóa ngay
+            shutil.rmtree(job_dir, ignore_errors=True)
+            raise
+        self._evict(keep=job_id)
+        self._wakeup.set()
+        return job_id
+
+    def get(self, job_id):
+        """Thông tin một job (dict) hoặc None nếu không có"""
+        jobs = self.jobs([job_id])
+        return jobs[0] if jobs else None
+
+    def jobs(self, job_ids=None):
+        """Thông tin các job (mặc định tất cả, mới nhất trước); giữ thứ tự của job_ids nếu có"""
+        columns = ("id", "batch", "filename", "file_type", "options", "status", "progress", "message", "error",
+                   "stats", "cached", "attempts", "created", "started", "finished")
+        if job_ids is None:
+            rows = self._execute(f"SELECT {', '.join(columns)} FROM jobs ORDER BY created DESC")
+        else:
+            job_ids = list(job_ids)
+            placeholders = ", ".join("?" * len(job_ids))
+            rows = self._execute(f"SELECT {', '.join(columns)} FROM jobs WHERE id IN ({placeholders})", job_ids)
+        jobs = []
+        for row in rows:
+            job = dict(zip(columns, row))
+            job['options'] = json.loads(job['options'])
+            job['stats'] = json.loads(job['stats']) if job['stats'] else None
+            job['cached'] = bool(job['cached'])
+            jobs.append(job)
+        if job_ids is not None:
+            order = {job_id: index for index, job_id in enumerate(job_ids)}
+            jobs.sort(key=lambda job: order[job['id']])
+        return jobs
+
+    def result(self, job_id):
+        """(Document, stats, thư mục ảnh) của job đã xong, None nếu chưa xong hoặc kết quả đã bị xóa"""
+        from document import Document
+
+        job = self.get(job_id)
+        if job is None or job['status'] != 'done':
+            return None
+        self.touch([job_id])
+        try:
+            with open(os.path.join(self.job_dir(job_id), _DOCUMENT_FILE), encoding='utf-8') as f:
+                document = Document.from_data(json.load(f))
+        except (OSError, ValueError, KeyError, TypeError):
+            return None
+        return document, job['stats'], os.path.join(self.job_dir(job_id), _IMAGES_DIR)
+
+    def update(self, path):
+        """Đo lại dung lượng thư mục job sau khi ghi thêm file (ZIP, HTML), loại bỏ job cũ nếu vượt giới hạn"""
+        if os.path.dirname(os.path.abspath(path)) != os.path.abspath(self.root):
+            return
+        job_id = os.path.basename(path)
+        if not self._execute("SELECT 1 FROM jobs WHERE id = ?", (job_id,)):
+            # Job đã bị xóa (hết hạn, vượt giới hạn dung lượng) => dọn phần còn sót lại
+            shutil.rmtree(path, ignore_errors=True)
+            return
+        self._execute("UPDATE jobs SET bytes = ?, last_used = ? WHERE id = ?", (dir_size(path), time.time(), job_id))
+        self._evict(keep=job_id)
+
+    def touch(self, job_ids):
+        """Đánh dấu các job vừa được dùng (LRU)"""
+        job_ids = list(job_ids)
+        if job_ids:
+            self._execute(f"UPDATE jobs SET last_used = ? WHERE id IN ({', '.join('?' * len(job_ids))})",
+                          (time.time(), *job_ids))
+
+    def release(self, job_ids):
+        """Xóa các job đã xong/lỗi không còn dùng (kèm thư mục); job chờ/đang chạy được giữ lại"""
+        for job_id in job_ids:
+            if self._execute("SELECT 1 FROM jobs WHERE id = ? AND status IN ('done', 'failed')", (job_id,)):
+                self._execute("DELETE FROM jobs WHERE id = ?", (job_id,))
+                shutil.rmtree(self.job_dir(job_id), ignore_errors=True)
+
+    def _evict(self, keep=None):
+        """Xóa job đã xong/lỗi ít dùng nhất cho đến khi dưới giới hạn dung lượng (không xóa job keep)"""
+        total = self._execute("SELECT COALESCE(SUM(bytes), 0) FROM jobs")[0][0]
+        if total <= self.max_bytes:
+            return
+        candidates = self._execute(
+            "SELECT id, bytes FROM jobs WHERE status IN ('done', 'failed') AND id != ? "
+            "ORDER BY COALESCE(last_used, finished)", (keep or "",)
+        )
+        for job_id, size in candidates:
+            if total <= self.max_bytes:
+                break
+            self.release([job_id])
+            total -= size
+            self.evictions += 1
+
+    def stats(self):
+        """Số job theo trạng thái (queued: độ sâu hàng đợi) và độ trễ (ms) của các job đã xong gần nhất"""
+        counts = dict.fromkeys(STATUSES, 0)
+        counts.update(self._execute("SELECT status, COUNT(*) FROM jobs GROUP BY status"))
+        oldest = self._execute("SELECT MIN(created) FROM jobs WHERE status = 'queued'")[0][0]
+        finished = self._execute(
+            "SELECT started - created, finished - started FROM jobs "
+            "WHERE status IN ('done', 'failed') AND started IS NOT NULL ORDER BY finished DESC LIMIT ?",
+            (METRICS_WINDOW,)
+        )
+        waits = [wait for wait, _ in finished]
+        runs = [run for _, run in finished]
+        return {
+            **counts,
+            'workers': self.workers,
+            'bytes': self._execute("SELECT COALESCE(SUM(bytes), 0) FROM jobs")[0][0],
+            'max_bytes': self.max_bytes,
+            'evictions': self.evictions,
+            'oldest_queued_s': round(time.time() - oldest, 1) if oldest else 0.0,
+            'wait_ms_avg': round(sum(waits) / len(waits) * 1000, 1) if waits else 0.0,
+            'wait_ms_max': round(max(waits) * 1000, 1) if waits else 0.0,
+            'run_ms_avg': round(sum(runs) / len(runs) * 1000, 1) if runs else 0.0,
+            'run_ms_max': round(max(runs) * 1000, 1) if runs else 0.0,
+        }
+
+    def purge(self):
+        """Xóa các job đã xong/lỗi quá thời gian giữ lại (kèm thư mục). Trả về số job bị xóa"""
+        cutoff = time.time() - self.ttl
+        expired = [row[0] for row in self._execute(
+            "SELECT id FROM jobs WHERE status IN ('done', 'failed') AND finished < ?", (cutoff,)
+        )]
+        self.release(expired)
+        return len(expired)
+
+    # ------------------------------------------------------------ worker
+
+    def start(self, workers=DEFAULT_JOB_WORKERS):
+        """Chạy workers thread xử lý job (thread nền: tiến trình thoát không phải chờ)"""
+        for index in range(workers):
+            thread = threading.Thread(target=self._worker, name=f"job-{index}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        self.workers += workers
+        heartbeat = threading.Thread(target=self._heartbeat, name="job-heartbeat", daemon=True)
+        heartbeat.start()
+        self._threads.append(heartbeat)
+        return self
+
+    def close(self):
+        """Dừng nhận job mới và chờ các job đang chạy xong"""
+        self._stopping.set()
+        self._wakeup.set()
+        for thread in self._threads:
+            thread.join()
+        self._threads = []
+        self.workers = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def wait(self, job_ids, timeout=None, on_update=None):
+        """Chờ các job xong (done/failed); on_update(danh sách job) được gọi mỗi lần kiểm tra"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            jobs = self.jobs(job_ids)
+            if on_update is not None:
+                on_update(jobs)
+            if all(job['status'] in ('done', 'failed') for job in jobs):
+                return jobs
+            if deadline is not None and time.monotonic() >= deadline:
+                return jobs
+            time.sleep(0.5)
+
+    def _claim(self):
+        """Nhận job cũ nhất đang chờ (nguyên tử giữa các tiến trình); job bị bỏ dở được đưa lại hàng đợi"""
+        now = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._conn.execute(
+                    "UPDATE jobs SET status = 'failed', finished = ?, error = 'Job bị gián đoạn nhiều lần' "
+                    "WHERE status = 'running' AND heartbeat < ? AND attempts >= ?",
+                    (now, now - STALE_SECONDS, MAX_ATTEMPTS)
+                )
+                self._conn.execute(
+                    "UPDATE jobs SET status = 'queued', owner = NULL, progress = 0, message = NULL "
+                    "WHERE status = 'running' AND heartbeat < ?",
+                    (now - STALE_SECONDS,)
+                )
+                row = self._conn.execute(
+                    "SELECT id, filename, file_type, options, batch FROM jobs "
+                    "WHERE status = 'queued' ORDER BY created LIMIT 1"
+                ).fetchone()
+                if row is not None:
+                    self._conn.execute(
+                        "UPDATE jobs SET status = 'running', owner = ?, heartbeat = ?, started = ?, "
+                        "attempts = attempts + 1 WHERE id = ?",
+                        (self.owner, now, now, row[0])
+                    )
+                    self._running.add(row[0])
+                self._conn.execute("COMMIT")
+            except sqlite3.Error:
+                self._conn.execute("ROLLBACK")
+                raise
+        if row is None:
+            return None
+        job_id, filename, file_type, options, batch = row
+        return {'id': job_id, 'filename': filename, 'file_type': file_type,
+                'options': json.loads(options), 'batch': batch}
+
+    def _worker(self):
+        while not self._stopping.is_set():
+            try:
+                job = self._claim()
+            except sqlite3.Error:
+                job = None
+            if job is None:
+                self._wakeup.wait(IDLE_POLL_SECONDS)
+                self._wakeup.clear()
+                continue
+            try:
+                self._run(job)
+            except Exception:
+                # Lỗi khi ghi trạng thái (vd: SQLite bận) không được làm dừng worker; job chưa
+                # ghi được trạng thái sẽ được chạy lại khi heartbeat quá cũ
+                logger.exception("Job %s: lỗi khi cập nhật trạng thái", job['id'])
+            finally:
+                with self._lock:
+                    self._running.discard(job['id'])
+
+    def _heartbeat(self):
+        last_purge = time.monotonic()
+        while not self._stopping.wait(HEARTBEAT_SECONDS):
+            with self._lock:
+                running = list(self._running)
+            try:
+                for job_id in running:
+                    self._execute("UPDATE jobs SET heartbeat = ? WHERE id = ? AND owner = ?",
+                                  (time.time(), job_id, self.owner))
+                if time.monotonic() - last_purge > PURGE_SECONDS:
+                    self.purge()
+                    last_purge = time.monotonic()
+            except sqlite3.Error:
+                # Cơ sở dữ liệu đang bận (tiến trình khác giữ khóa) => thử lại lần sau
+                pass
+
+    def _update(self, job_id, **fields):
+        assignments = ", ".join(f"{name} = ?" for name in fields)
+        self._execute(f"UPDATE jobs SET {assignments} WHERE id = ? AND owner = ?",
+                      (*fields.values(), job_id, self.owner))
+
+    def _batch_store(self, batch):
+        """Kho ảnh dùng chung của các job cùng lô (ảnh giống nhau chỉ xử lý một lần)"""
+        from converter import ImageStore
+
+        return ImageStore(os.path.join(self.root, "stores", batch)) if batch else None
+
+    def _release_batch_store(self, batch):
+        """Xóa kho ảnh của lô khi lô không còn job chờ/đang chạy"""
+        if batch and not self._execute(
+            "SELECT 1 FROM jobs WHERE batch = ? AND status IN ('queued', 'running') LIMIT 1", (batch,)
+        ):
+            shutil.rmtree(os.path.join(self.root, "stores", batch), ignore_errors=True)
+
+    def _run(self, job):
+        from conversion_cache import make_cache_key
+
+        job_id = job['id']
+        job_dir = self.job_dir(job_id)
+        input_path = os.path.join(job_dir, f"input.{job['file_type']}")
+        images_dir = os.path.join(job_dir, _IMAGES_DIR)
+        try:
+            # Thư mục ảnh của lần chạy bị gián đoạn trước (nếu có) được làm lại từ đầu
+            shutil.rmtree(images_dir, ignore_errors=True)
+            os.makedirs(images_dir)
+            with open(input_path, "rb") as f:
+                file_bytes = f.read()
+
+            cache_key = make_cache_key(file_bytes, job['file_type'], **cache_options(job['options']))
+            cached = self.conversion_cache.get(cache_key, images_dir) if self.conversion_cache else None
+            if cached is not None:
+                document, stats = cached
+            else:
+                def on_progress(progress, message):
+                    self._update(job_id, progress=progress, message=message, heartbeat=time.time())
+
+                document, stats = run_conversion(
+                    file_bytes, job['file_type'], images_dir, job['options'], on_progress,
+                    self.ocr_cache, self._batch_store(job['batch'])
+                )
+                if self.conversion_cache is not None:
+                    self.conversion_cache.put(cache_key, document, stats, images_dir)
+
+            with open(os.path.join(job_dir, _DOCUMENT_FILE), "w", encoding="utf-8") as f:
+                json.dump(document.to_data(), f, ensure_ascii=False, separators=(',', ':'))
+            self._update(job_id, status='done', progress=1.0, message=None, stats=json.dumps(stats, ensure_ascii=False),
+                         cached=cached is not None, finished=time.time())
+        except Exception as e:
+            self._update(job_id, status='failed', error=str(e), finished=time.time())
+        finally:
+            # File đầu vào chỉ cần cho lần chạy này: job xong hay lỗi đều không chạy lại
+            try:
+                os.remove(input_path)
+            except OSError:
+                pass
+            self._release_batch_store(job['batch'])
+            self.update(job_dir)
+
+
+# ---------------------------------------------------------------- dòng lệnh
+
+def export_result(queue, job, output_dir, image_prefix="images/", name=None):
+    """Ghi <output_dir>/<tên>/<tên>.md và images/ của một job đã xong. Trả về đường dẫn file .md"""
+    from document import render_markdown
+
+    document, _, images_dir = queue.result(job['id'])
+    stem = name or os.path.splitext(job['filename'])[0]
+    result_dir = os.path.join(output_dir, stem)
+    os.makedirs(result_dir, exist_ok=True)
+    md_path = os.path.join(result_dir, f"{stem}.md")
+    with open(md_path, "w", encoding="utf-8") as f:
+        f.write(render_markdown(document.blocks, image_prefix))
+    if os.path.isdir(images_dir):
+        shutil.copytree(images_dir, os.path.join(result_dir, _IMAGES_DIR), dirs_exist_ok=True)
+    return md_path
+
+
+def format_job(job):
+    progress = f"{job['progress']:.0%}" if job['status'] == 'running' else ""
+    detail = job['error'] or job['message'] or ("cache" if job['cached'] else "")
+    return f"{job['id'][:12]}  {job['status']:<8}{progress:>5}  {job['filename']}  {detail}"
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="job_queue", description="Hàng đợi chuyển đổi PDF/Word chạy nền")
+    parser.add_argument("--job-dir", default=DEFAULT_JOB_DIR, help=f"Thư mục hàng đợi (mặc định: {DEFAULT_JOB_DIR})")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    submit = commands.add_parser("submit", help="Đưa file vào hàng đợi")
+    submit.add_argument("inputs", nargs="+", help="File PDF/Word (.docx), thư mục hoặc mẫu glob")
+    submit.add_argument("--wait", action="store_true", help="Chạy worker trong tiến trình này và chờ các job xong")
+    submit.add_argument("-o", "--output", default=None, help="Với --wait: ghi Markdown + ảnh của kết quả vào thư mục này")
+    submit.add_argument("--workers", type=int, default=DEFAULT_JOB_WORKERS, help="Số job chạy song song khi --wait")
+    submit.add_argument("--image-prefix", default="images/", help="Tiền tố đường dẫn ảnh trong Markdown")
+    submit.add_argument("--no-ocr", action="store_true", help="Tắt OCR nhận diện bảng")
+    submit.add_argument("--no-native-tables", action="store_true", help="Không nhận diện bảng kẻ bằng đường vector")
+    submit.add_argument("--no-scan-ocr", action="store_true", help="Không OCR cả trang với trang scan")
+    submit.add_argument("--ocr-dpi", type=int, default=None, help="Độ phân giải khi OCR trang scan (mặc định: 300)")
+    submit.add_argument("--ocr-lang", default="vie+eng", help="Ngôn ngữ OCR (mặc định: vie+eng)")
+    submit.add_argument("--no-optimize", action="store_true", help="Không tối ưu kích thước ảnh")
+    submit.add_argument("--page-workers", type=int, default=1, help="Số tiến trình xử lý song song các trang PDF")
+
+    worker = commands.add_parser("worker", help="Xử lý các job trong hàng đợi (kể cả job từ giao diện web)")
+    worker.add_argument("--workers", type=int, default=DEFAULT_JOB_WORKERS, help="Số job chạy song song")
+    worker.add_argument("--exit-when-empty", action="store_true", help="Thoát khi hàng đợi hết job")
+
+    status = commands.add_parser("status", help="Trạng thái các job và số liệu hàng đợi")
+    status.add_argument("job_ids", nargs="*", help="Mã job (mặc định: tất cả)")
+    status.add_argument("--json", action="store_true", help="In dạng JSON")
+
+    export = commands.add_parser("export", help="Ghi Markdown + ảnh của job đã xong")
+    export.add_argument("job_ids", nargs="+", help="Mã job")
+    export.add_argument("-o", "--output", default="output", help="Thư mục kết quả (mặc định: output)")
+    export.add_argument("--image-prefix", default="images/", help="Tiền tố đường dẫn ảnh trong Markdown")
+    return parser
+
+
+def _find_jobs(queue, prefixes):
+    """Job theo mã đầy đủ hoặc phần đầu của mã (như status in ra)"""
+    jobs = queue.jobs()
+    return [job for prefix in prefixes for job in jobs if job['id'].startswith(prefix)]
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    from conversion_cache import ConversionCache
+    from ocr_cache import OcrCache
+
+    queue = JobQueue(args.job_dir, conversion_cache=ConversionCache(), ocr_cache=OcrCache())
+
+    if args.command == "submit":
+        from converter import SCANNED_OCR_DPI
+        from doc2md import expand_inputs, output_names
+
+        files = expand_inputs(args.inputs)
+        options = {
+            'enable_ocr': not args.no_ocr, 'ocr_lang': args.ocr_lang, 'optimize_imgs': not args.no_optimize,
+            'extract_tables': not args.no_native_tables, 'ocr_scanned': not args.no_scan_ocr,
+            'ocr_dpi': args.ocr_dpi or SCANNED_OCR_DPI, 'page_workers': args.page_workers,
+        }
+        batch = uuid.uuid4().hex
+        job_ids = []
+        for path in files:
+            try:
+                job_ids.append(queue.submit(path, os.path.basename(path), options, batch))
+                print(f"📥 {job_ids[-1][:12]}  {path}")
+            except (ValueError, OSError) as e:
+                print(f"❌ {path}: {e}", file=sys.stderr)
+        if not args.wait:
+            return 0 if len(job_ids) == len(files) else 1
+
+        reported = set()
+
+        def report(jobs):
+            for job in jobs:
+                if job['status'] in ('done', 'failed') and job['id'] not in reported:
+                    reported.add(job['id'])
+                    print(("✅ " if job['status'] == 'done' else "❌ ") + format_job(job))
+
+        with queue.start(args.workers):
+            jobs = queue.wait(job_ids, on_update=report)
+        if args.output:
+            names = output_names([job['filename'] for job in jobs])
+            for job, name in zip(jobs, names):
+                if job['status'] == 'done':
+                    print(f"📄 {export_result(queue, job, args.output, args.image_prefix, name)}")
+        return 0 if all(job['status'] == 'done' for job in jobs) and len(job_ids) == len(files) else 1
+
+    if args.command == "worker":
+        queue.start(args.workers)
+        try:
+            while True:
+                time.sleep(IDLE_POLL_SECONDS)
+                stats = queue.stats()
+                if args.exit_when_empty and not stats['queued'] and not stats['running']:
+                    break
+        except KeyboardInterrupt:
+            pass
+        queue.close()
+        return 0
+
+    if args.command == "status":
+        jobs = _find_jobs(queue, args.job_ids) if args.job_ids else queue.jobs()
+        if args.json:
+            print(json.dumps({'jobs': jobs, 'stats': queue.stats()}, ensure_ascii=False, indent=2))
+        else:
+            for job in jobs:
+                print(format_job(job))
+            stats = queue.stats()
+            print(f"📊 chờ {stats['queued']}, đang chạy {stats['running']}, xong {stats['done']}, lỗi {stats['failed']} | "
+                  f"chờ TB {stats['wait_ms_avg']:.0f} ms, chạy TB {stats['run_ms_avg']:.0f} ms")
+        return 0
+
+    # export
+    failed = 0
+    for job in _find_jobs(queue, args.job_ids):
+        if queue.result(job['id']) is None:
+            print(f"❌ {format_job(job)}", file=sys.stderr)
+            failed += 1
+        else:
+            print(f"📄 {export_result(queue, job, args.output, args.image_prefix)}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    multiprocessing.freeze_support()
+    sys.exit(main())
@@ -0,0 +1,165 @@
+"""
+Cache kết quả OCR trên đĩa (SQLite), khóa theo hash nội dung ảnh.
+
+Con dấu, khối chữ ký, bảng header... lặp lại trong rất nhiều tài liệu: kết quả
+nhận diện bảng / OCR của chúng được lưu lại theo SHA-256 của ảnh + ngôn ngữ OCR +
+phiên bản bộ nhận diện, dùng chung giữa các phiên web và các lần chạy dòng lệnh.
+Tổng dung lượng bị giới hạn, entry ít dùng nhất bị loại bỏ trước (LRU).
+"""
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+DEFAULT_OCR_CACHE_PATH = os.environ.get("DOC2MD_OCR_CACHE", ".ocr_cache.sqlite3")
+DEFAULT_MAX_BYTES = int(os.environ.get("DOC2MD_OCR_CACHE_MAX_MB", "100")) * 1024 * 1024
+
+# Số entry bị xóa mỗi lượt khi vượt giới hạn dung lượng
+_EVICT_BATCH = 64
+
+
+class OcrCache:
+    """Cache kết quả OCR dùng chung giữa các tiến trình, giới hạn dung lượng, loại bỏ theo LRU.
+
+    Mỗi tiến trình mở kết nối SQLite riêng khi dùng lần đầu, nên đối tượng gửi
+    được sang tiến trình con (pickle chỉ mang theo đường dẫn và giới hạn).
+    """
+
+    def __init__(self, path=DEFAULT_OCR_CACHE_PATH, max_bytes=DEFAULT_MAX_BYTES):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self._conn = None
+
+    def __getstate__(self):
+        return {'path': self.path, 'max_bytes': self.max_bytes}
+
+    def __setstate__(self, state):
+        self.__init__(state['path'], state['max_bytes'])
+
+    @staticmethod
+    def make_key(data, kind, language, **options):
+        """Khóa từ nội dung ảnh (bytes), loại kết quả ('table', 'page'), ngôn ngữ OCR và tùy chọn"""
+        digest = hashlib.sha256(data)
+        digest.update(json.dumps(
+            {'kind': kind, 'lang': language, 'options': options}, sort_keys=True
+        ).encode('utf-8'))
+        return digest.hexdigest()
+
+    def _connect(self):
+        if self._conn is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            # Nhiều tiến trình cùng ghi: chờ khóa thay vì báo lỗi ngay
+            conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS ocr ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, size INTEGER NOT NULL, last_used REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS ocr_last_used ON ocr (last_used)")
+            conn.commit()
+            self._conn = conn
+        return self._conn
+
+    def get(self, key):
+        """Tra cache. Trả về (True, kết quả) nếu có, ngược lại (False, None)"""
+        with self._lock:
+            try:
+                conn = self._connect()
+                row = conn.execute("SELECT value FROM ocr WHERE key = ?", (key,)).fetchone()
+                if row is not None:
+                    # Đánh dấu vừa được dùng (thứ tự LRU)
+                    conn.execute("UPDATE ocr SET last_used = ? WHERE key = ?", (time.time(), key))
+                    conn.commit()
+                    result = json.loads(row[0])
+            except (sqlite3.Error, OSError, ValueError):
+                row = None
+            if row is None:
+                self.misses += 1
+                return False, None
+            self.hits += 1
+            return True, result
+
+    def put(self, key, result):
+        """Lưu kết quả OCR (kiểu JSON: danh sách hàng, chuỗi hoặc None)"""
+        try:
+            value = json.dumps(result, ensure_ascii=False)
+        except (TypeError, ValueError):
+            return False
+        size = len(value.encode('utf-8'))
+        if size > self.max_bytes:
+            return False
+
+        with self._lock:
+            try:
+                conn = self._connect()
+                conn.execute(
+                    "INSERT OR REPLACE INTO ocr (key, value, size, last_used) VALUES (?, ?, ?, ?)",
+                    (key, value, size, time.time())
+                )
+                self._evict(conn)
+                conn.commit()
+            except (sqlite3.Error, OSError):
+                return False
+            return True
+
+    def _evict(self, conn):
+        """Xóa các entry ít dùng nhất cho đến khi dưới giới hạn dung lượng"""
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM ocr").fetchone()[0]
+        while total > self.max_bytes:
+            oldest = conn.execute(
+                "SELECT key, size FROM ocr ORDER BY last_used LIMIT ?", (_EVICT_BATCH,)
+            ).fetchall()
+            if not oldest:
+                break
+            removed = []
+            for key, size in oldest:
+                if total <= self.max_bytes:
+                    break
+                removed.append((key,))
+                total -= size
+            conn.executemany("DELETE FROM ocr WHERE key = ?", removed)
+            self.evictions += len(removed)
+
+    def clear(self):
+        """Xóa toàn bộ cache"""
+        with self._lock:
+            try:
+                conn = self._connect()
+                conn.execute("DELETE FROM ocr")
+                conn.commit()
+            except (sqlite3.Error, OSError):
+                pass
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    def stats(self):
+        """Thống kê hit/miss (của tiến trình này) và dung lượng đang dùng"""
+        with self._lock:
+            try:
+                entries, total = self._connect().execute(
+                    "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM ocr"
+                ).fetchone()
+            except (sqlite3.Error, OSError):
+                entries, total = 0, 0
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'evictions': self.evictions,
+                'entries': entries,
+                'bytes': total,
+                'max_bytes': self.max_bytes,
+            }
@@ -0,0 +1,102 @@
+"""
+Đo thời gian theo từng bước xử lý (stage) của một lần chuyển đổi.
+
+StageTimer ghi lại thời gian (và số bytes) của mỗi lần gọi từng bước: đọc văn bản,
+trích xuất ảnh, tối ưu ảnh, OpenCV, Tesseract... Các mẫu đi kèm thống kê từng trang
+(kể cả từ tiến trình con) rồi được gộp thành stats['stages']: số lần gọi,
+tổng/p50/p95/max (ms) và tổng bytes của mỗi bước.
+"""
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+
+
+class StageTimer:
+    """Bộ đếm thời gian theo bước, dùng được từ nhiều thread (pool OCR)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # bước -> [danh sách thời gian (giây), tổng bytes]
+        self._samples = {}
+
+    @contextmanager
+    def stage(self, name, nbytes=0):
+        """Đo một lần gọi bước name. Có thể gán số bytes sau khi biết: `with ... as m: m['bytes'] = n`"""
+        measure = {'bytes': nbytes}
+        start = time.perf_counter()
+        try:
+            yield measure
+        finally:
+            self.add(name, time.perf_counter() - start, measure['bytes'])
+
+    def add(self, name, seconds, nbytes=0):
+        with self._lock:
+            sample = self._samples.setdefault(name, [[], 0])
+            sample[0].append(seconds)
+            sample[1] += nbytes
+
+    def drain(self):
+        """Lấy các mẫu đã ghi (dict gửi được qua pickle/JSON) và xóa khỏi timer"""
+        with self._lock:
+            samples, self._samples = self._samples, {}
+        return {name: {'seconds': times, 'bytes': nbytes} for name, (times, nbytes) in samples.items()}
+
+
+def stage(timer, name, nbytes=0):
+    """timer.stage(name) hoặc không đo gì nếu timer là None"""
+    if timer is None:
+        return nullcontext({'bytes': nbytes})
+    return timer.stage(name, nbytes)
+
+
+def merge_samples(samples_list):
+    """Gộp các mẫu (từ StageTimer.drain) của nhiều trang/tiến trình"""
+    merged = {}
+    for samples in samples_list:
+        for name, sample in (samples or {}).items():
+            target = merged.setdefault(name, {'seconds': [], 'bytes': 0})
+            target['seconds'].extend(sample['seconds'])
+            target['bytes'] += sample['bytes']
+    return merged
+
+
+def _percentile(sorted_values, fraction):
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * fraction))]
+
+
+def summarize_samples(samples):
+    """Thống kê từng bước: calls, total_ms, p50_ms, p95_ms, max_ms, bytes (bước tốn nhiều thời gian nhất trước)"""
+    summary = {}
+    for name, sample in samples.items():
+        times = sorted(sample['seconds'])
+        if not times:
+            continue
+        summary[name] = {
+            'calls': len(times),
+            'total_ms': round(sum(times) * 1000, 1),
+            'p50_ms': round(_percentile(times, 0.5) * 1000, 2),
+            'p95_ms': round(_percentile(times, 0.95) * 1000, 2),
+            'max_ms': round(times[-1] * 1000, 2),
+            'bytes': sample['bytes'],
+        }
+    return dict(sorted(summary.items(), key=lambda item: -item[1]['total_ms']))
+
+
+@contextmanager
+def cprofile(path=None):
+    """Chạy khối lệnh dưới cProfile và ghi kết quả ra path (xem bằng pstats/snakeviz).
+
+    path=None: không profile. Chỉ đo tiến trình hiện tại (không gồm tiến trình con xử lý trang).
+    """
+    if path is None:
+        yield None
+        return
+    import cProfile
+
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield profiler
+    finally:
+        profiler.disable()
+        profiler.dump_stats(path)
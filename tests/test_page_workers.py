@@ -0,0 +1,89 @@
+"""
+Chuyển đổi PDF song song theo khoảng trang (workers > 1) phải cho kết quả giống hệt chạy tuần tự.
+"""
+import io
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+fitz = pytest.importorskip("fitz")
+pytest.importorskip("PIL")
+
+from converter import pdf_to_markdown  # noqa: E402
+
+PAGES = 9
+
+
+def make_image(color, text):
+    from PIL import Image, ImageDraw
+
+    img = Image.new("RGB", (200, 60), color)
+    ImageDraw.Draw(img).text((20, 20), text, fill="white")
+    buffer = io.BytesIO()
+    img.save(buffer, "PNG")
+    return buffer.getvalue()
+
+
+@pytest.fixture(scope="module")
+def sample_pdf(tmp_path_factory):
+    """PDF nhiều trang: logo lặp lại trên mọi trang, ảnh riêng mỗi trang chẵn, bảng kẻ trên trang 3k"""
+    logo = make_image("navy", "LOGO")
+    doc = fitz.open()
+    for page_num in range(PAGES):
+        page = doc.new_page()
+        page.insert_image(fitz.Rect(72, 20, 172, 50), stream=logo)
+        page.insert_text((72, 80), f"Chương {page_num + 1}", fontsize=14)
+        page.insert_textbox(fitz.Rect(72, 100, 540, 180), f"Đoạn văn của trang {page_num + 1}. " * 5, fontsize=9)
+        if page_num % 2 == 0:
+            page.insert_image(fitz.Rect(72, 500, 272, 560), stream=make_image("darkgreen", f"P{page_num}"))
+        if page_num % 3 == 0:
+            top, left, row_height, col_width = 220, 72, 24, 117
+            for r in range(5):
+                page.draw_line((left, top + r * row_height), (left + 3 * col_width, top + r * row_height))
+            for c in range(4):
+                page.draw_line((left + c * col_width, top), (left + c * col_width, top + 4 * row_height))
+            for r in range(4):
+                for c in range(3):
+                    page.insert_text((left + c * col_width + 5, top + r * row_height + 16), f"ô {r}.{c}", fontsize=9)
+    path = tmp_path_factory.mktemp("pdf") / "sample.pdf"
+    doc.save(str(path))
+    doc.close()
+    return str(path)
+
+
+def convert(path, output_dir, workers):
+    return pdf_to_markdown(
+        path, str(output_dir), "images/", enable_ocr=False, ocr_scanned=False, workers=workers
+    )
+
+
+def read_images(images_dir):
+    return {name: (images_dir / name).read_bytes() for name in sorted(os.listdir(images_dir))}
+
+
+def test_parallel_output_matches_sequential(sample_pdf, tmp_path):
+    sequential_md, sequential_stats = convert(sample_pdf, tmp_path / "sequential", workers=1)
+    parallel_md, parallel_stats = convert(sample_pdf, tmp_path / "parallel", workers=3)
+
+    assert parallel_md == sequential_md
+    # Thời gian từng bước khác nhau giữa các lần chạy, các số liệu còn lại phải giống hệt
+    sequential_stats.pop('stages')
+    parallel_stats.pop('stages')
+    assert parallel_stats == sequential_stats
+    assert read_images(tmp_path / "parallel") == read_images(tmp_path / "sequential")
+
+
+def test_repeated_images_and_tables_counted_once(sample_pdf, tmp_path):
+    markdown, stats = convert(sample_pdf, tmp_path / "parallel", workers=3)
+
+    # Logo chỉ xử lý ở lần xuất hiện đầu tiên, các trang sau trỏ về cùng một file
+    distinct_images = 1 + len(range(0, PAGES, 2))
+    assert stats['pages'] == PAGES
+    assert stats['images'] == distinct_images
+    assert stats['duplicate_images'] == PAGES - 1
+    assert stats['tables'] == len(range(0, PAGES, 3))
+    assert len(os.listdir(tmp_path / "parallel")) == distinct_images
+    assert markdown.count("| ô 0.0 |") == stats['tables']
@@ -0,0 +1,141 @@
+"""
+Thư mục làm việc tạm riêng cho từng phiên (session) và từng lần chuyển đổi (job).
+
+Mỗi job có một thư mục duy nhất <root>/<session>/<job>, nên hai người dùng cùng
+tải lên report.pdf không ghi đè ảnh của nhau. Tổng dung lượng bị giới hạn: khi
+vượt quá, các job ít dùng nhất bị xóa (LRU). Thư mục của một phiên bị xóa khi
+phiên kết thúc hoặc không hoạt động quá lâu.
+"""
+import os
+import re
+import shutil
+import tempfile
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+from conversion_cache import dir_size
+
+DEFAULT_WORKSPACE_DIR = os.environ.get(
+    "DOC2MD_WORKSPACE_DIR", os.path.join(tempfile.gettempdir(), "doc2md_workspaces")
+)
+DEFAULT_MAX_BYTES = int(os.environ.get("DOC2MD_WORKSPACE_MAX_MB", "1024")) * 1024 * 1024
+# Phiên không hoạt động quá thời gian này (giây) bị dọn dẹp
+DEFAULT_SESSION_TTL = int(os.environ.get("DOC2MD_WORKSPACE_TTL", "3600"))
+
+
+def _safe_name(name):
+    """Tên file an toàn để dùng làm một phần tên thư mục"""
+    return re.sub(r'[^\w.-]+', '_', name)[:50] or "job"
+
+
+class WorkspaceManager:
+    """Cấp phát thư mục tạm theo phiên/job, giới hạn dung lượng, loại bỏ theo LRU"""
+
+    def __init__(self, root=DEFAULT_WORKSPACE_DIR, max_bytes=DEFAULT_MAX_BYTES, session_ttl=DEFAULT_SESSION_TTL):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.session_ttl = session_ttl
+        self.evictions = 0
+        self.released_sessions = 0
+        self._lock = threading.Lock()
+        # đường dẫn job -> (session, dung lượng); thứ tự = thứ tự sử dụng (cũ nhất ở đầu)
+        self._jobs = OrderedDict()
+        # session -> lần hoạt động gần nhất
+        self._sessions = {}
+        self._total_bytes = 0
+
+        os.makedirs(root, exist_ok=True)
+        self._remove_stale()
+
+    def _remove_stale(self):
+        """Xóa thư mục phiên còn sót lại từ lần chạy trước (tiến trình bị dừng đột ngột)"""
+        cutoff = time.time() - self.session_ttl
+        for name in os.listdir(self.root):
+            path = os.path.join(self.root, name)
+            try:
+                if os.path.getmtime(path) < cutoff:
+                    shutil.rmtree(path, ignore_errors=True)
+            except OSError:
+                pass
+
+    def _remove(self, path):
+        _, size = self._jobs.pop(path, (None, 0))
+        self._total_bytes -= size
+        shutil.rmtree(path, ignore_errors=True)
+
+    def _evict(self, keep=None):
+        """Loại bỏ các job ít dùng nhất cho đến khi dưới giới hạn dung lượng (không xóa job keep)"""
+        for path in list(self._jobs):
+            if self._total_bytes <= self.max_bytes:
+                break
+            if path != keep:
+                self._remove(path)
+                self.evictions += 1
+
+    def allocate(self, session_id, name="job"):
+        """Tạo thư mục mới, duy nhất cho một job của phiên"""
+        path = os.path.join(self.root, session_id, f"{uuid.uuid4().hex[:12]}_{_safe_name(name)}")
+        os.makedirs(path)
+        with self._lock:
+            self._jobs[path] = (session_id, 0)
+            self._sessions[session_id] = time.time()
+        return path
+
+    def update(self, path):
+        """Đo lại dung lượng job sau khi ghi xong, loại bỏ job cũ nếu vượt giới hạn"""
+        size = dir_size(path)
+        with self._lock:
+            if path not in self._jobs:
+                return
+            session_id, old_size = self._jobs[path]
+            self._jobs[path] = (session_id, size)
+            self._jobs.move_to_end(path)
+            self._total_bytes += size - old_size
+            self._evict(keep=path)
+
+    def touch(self, path):
+        """Đánh dấu job vừa được dùng. Trả về False nếu job đã bị loại bỏ"""
+        with self._lock:
+            if path not in self._jobs:
+                return False
+            self._jobs.move_to_end(path)
+            self._sessions[self._jobs[path][0]] = time.time()
+            return True
+
+    def release(self, path):
+        """Xóa một job không còn dùng"""
+        with self._lock:
+            self._remove(path)
+
+    def release_session(self, session_id):
+        """Xóa toàn bộ job của một phiên (khi phiên kết thúc)"""
+        with self._lock:
+            for path, (owner, _) in list(self._jobs.items()):
+                if owner == session_id:
+                    self._remove(path)
+            if self._sessions.pop(session_id, None) is not None:
+                self.released_sessions += 1
+        shutil.rmtree(os.path.join(self.root, session_id), ignore_errors=True)
+
+    def release_idle_sessions(self):
+        """Xóa các phiên không hoạt động quá session_ttl giây"""
+        cutoff = time.time() - self.session_ttl
+        with self._lock:
+            idle = [session_id for session_id, last_used in self._sessions.items() if last_used < cutoff]
+        for session_id in idle:
+            self.release_session(session_id)
+        return len(idle)
+
+    def stats(self):
+        """Số phiên/job và dung lượng đang dùng"""
+        with self._lock:
+            return {
+                'sessions': len(self._sessions),
+                'jobs': len(self._jobs),
+                'bytes': self._total_bytes,
+                'max_bytes': self.max_bytes,
+                'evictions': self.evictions,
+                'released_sessions': self.released_sessions,
+            }